@@ -0,0 +1,261 @@
+"""
+Comprobación diferencial de los cálculos de probabilidad de OpoSim.
+
+Cualquier núcleo más rápido tiene que dar lo mismo que
+``calculate_probability``. Este script genera casos (N, k, n) al azar
+(reproducibles con --seed), más los casos límite, y compara contra el
+valor exacto con enteros grandes y fracciones:
+
+- ``calculate_probability`` (combinaciones exactas y una división).
+- Una versión en espacio logarítmico con ``lgamma`` (coma flotante).
+- ``probability_curve`` (recurrencia) y ``probability_grid`` (NumPy).
+- La tabla precalculada de ``oposim.lut``, si existe.
+- ``scipy.stats.hypergeom``, si SciPy está instalado (extra "stats").
+
+Además comprueba la simulación:
+
+- Monte Carlo: la frecuencia de éxito de lotes de ``simulate_draw`` cae
+  dentro de un intervalo de confianza amplio (5 sigmas) de la probabilidad.
+- Chi-cuadrado: en millones de sorteos de ``draw_topic_positions`` cada
+  tema sale con la misma frecuencia, y también como primera bola.
+
+Uso:
+    python benchmarks/differential.py                    # Todo, semilla 0
+    python benchmarks/differential.py --cases 20000      # Más casos (N, k, n)
+    python benchmarks/differential.py --draws 5000000    # Más sorteos en chi-cuadrado
+    python benchmarks/differential.py --seed 7           # Otra semilla
+
+Sale con código 1 si alguna comprobación falla.
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections.abc import Callable
+from fractions import Fraction
+from math import comb, lgamma
+from pathlib import Path
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from oposim.engine import (  # noqa: E402
+    calculate_probability,
+    draw_topic_positions,
+    minimum_studied_topics,
+    probability_curve,
+    probability_grid,
+    simulate_draw,
+)
+from oposim.lut import get_probability_table  # noqa: E402
+from oposim.topics import generate_default_topics  # noqa: E402
+
+
+MAX_TOTAL = 5_000
+MAX_DRAWN = 50
+DEFAULT_CASES = 2_000
+DEFAULT_DRAWS = 1_000_000
+
+# Error absoluto máximo frente al valor exacto, por camino de cálculo
+TOLERANCES = {
+    "calculate_probability": 1e-12,
+    "log_space": 1e-9,
+    "probability_curve": 1e-10,
+    "probability_grid": 1e-12,
+    "lut": 1e-12,
+    "scipy_hypergeom": 1e-9,
+}
+
+MONTE_CARLO_CASES = 10
+MONTE_CARLO_RUNS = 2_000
+MONTE_CARLO_SIGMAS = 5.0
+CHI_SQUARE_TOPICS = 100
+CHI_SQUARE_DRAWN = 5
+CHI_SQUARE_ALPHA = 1e-4
+
+
+# =============================================================================
+# CAMINOS DE CÁLCULO
+# =============================================================================
+def exact_probability(total: int, studied: int, drawn: int) -> Fraction:
+    """P(X >= 1) exacta como fracción (comb da 0 si n > N - k)."""
+    return 1 - Fraction(comb(total - studied, drawn), comb(total, drawn))
+
+
+def log_space_probability(total: int, studied: int, drawn: int) -> float:
+    """P(X >= 1) en coma flotante a partir de log C(N-k, n) - log C(N, n)."""
+    not_studied = total - studied
+    if drawn > not_studied:
+        return 1.0
+    log_none = (
+        lgamma(not_studied + 1) - lgamma(not_studied - drawn + 1)
+        - lgamma(total + 1) + lgamma(total - drawn + 1)
+    )
+    return -math.expm1(log_none)
+
+
+def random_cases(count: int, rng: random.Random) -> list[tuple[int, int, int]]:
+    """Casos límite más `count` casos al azar, con N pequeños más frecuentes."""
+    cases = [
+        (1, 0, 1), (1, 1, 1), (2, 1, 1), (2, 1, 2), (20, 0, 20), (20, 20, 1),
+        (90, 85, 5), (90, 86, 5), (MAX_TOTAL, 1, 1), (MAX_TOTAL, 1, MAX_DRAWN),
+        (MAX_TOTAL, MAX_TOTAL - MAX_DRAWN, MAX_DRAWN), (MAX_TOTAL, MAX_TOTAL - 1, MAX_DRAWN),
+    ]
+    for _ in range(count):
+        # Log-uniforme en N: tan probable un temario de 10 temas como uno de 1000
+        total = int(math.exp(rng.uniform(0, math.log(MAX_TOTAL)))) or 1
+        drawn = rng.randint(1, min(total, MAX_DRAWN))
+        studied = rng.randint(0, total)
+        cases.append((total, studied, drawn))
+    return cases
+
+
+def compute_paths(cases: list[tuple[int, int, int]]) -> dict[str, list[float | None]]:
+    """Resultado de cada camino para cada caso (None si no se aplica)."""
+    totals, studied, drawn = (np.array(column) for column in zip(*cases))
+    results: dict[str, list[float | None]] = {
+        "calculate_probability": [calculate_probability(*case) for case in cases],
+        "log_space": [log_space_probability(*case) for case in cases],
+        "probability_curve": [probability_curve(total, n)[k] for total, k, n in cases],
+        "probability_grid": probability_grid(totals, studied, drawn).tolist(),
+    }
+
+    table = get_probability_table()
+    if table is not None:
+        results["lut"] = [
+            table.probability(*case) if table.covers(case[0], case[2]) else None
+            for case in cases
+        ]
+
+    try:
+        from scipy.stats import hypergeom
+    except ImportError:
+        pass
+    else:
+        # sf(0) = P(X > 0) con M = N, n = k estudiados, N = bolas (notación de SciPy)
+        results["scipy_hypergeom"] = hypergeom.sf(0, totals, studied, drawn).tolist()
+    return results
+
+
+def check_paths(cases: list[tuple[int, int, int]]) -> bool:
+    """Compara cada camino con el valor exacto e informa del peor caso."""
+    exact = [float(exact_probability(*case)) for case in cases]
+    ok = True
+    for name, values in compute_paths(cases).items():
+        worst_error, worst_case, compared = 0.0, None, 0
+        for case, expected, value in zip(cases, exact, values):
+            if value is None:
+                continue
+            compared += 1
+            error = abs(value - expected) if value == value else math.inf  # NaN = fallo
+            if error > worst_error:
+                worst_error, worst_case = error, case
+        passed = worst_error <= TOLERANCES[name]
+        ok &= passed
+        detail = f"peor caso N, k, n = {worst_case}" if worst_case else ""
+        print(f"{'✓' if passed else '✗'} {name:<24} {compared:>7} casos  error máx {worst_error:.2e}  {detail}")
+    return ok
+
+
+# =============================================================================
+# SIMULACIÓN
+# =============================================================================
+def check_monte_carlo(rng: random.Random) -> bool:
+    """Frecuencia de éxito de `simulate_draw` frente a la probabilidad exacta."""
+    ok = True
+    for _ in range(MONTE_CARLO_CASES):
+        total = rng.randint(2, 500)
+        drawn = rng.randint(1, min(total, 20))
+        # k para una probabilidad intermedia: P cercana a 0 o 1 no dice nada
+        studied = minimum_studied_topics(total, drawn, rng.uniform(0.05, 0.95))
+        topics_df = generate_default_topics(total)
+
+        successes = 0
+        for _ in range(MONTE_CARLO_RUNS):
+            numbers = simulate_draw(topics_df, drawn, rng)["Número"]
+            # Temas estudiados: los k primeros
+            successes += bool((numbers <= studied).any())
+            if len(numbers) != drawn or numbers.nunique() != drawn:
+                print(f"✗ simulate_draw devolvió temas repetidos o de más (N={total}, n={drawn})")
+                return False
+
+        p = calculate_probability(total, studied, drawn)
+        estimate = successes / MONTE_CARLO_RUNS
+        bound = MONTE_CARLO_SIGMAS * math.sqrt(p * (1 - p) / MONTE_CARLO_RUNS) + 1 / MONTE_CARLO_RUNS
+        passed = abs(estimate - p) <= bound
+        ok &= passed
+        print(f"{'✓' if passed else '✗'} monte_carlo N={total:<4} k={studied:<4} n={drawn:<3} "
+              f"P={p:.4f}  estimado={estimate:.4f}  ±{bound:.4f}")
+    return ok
+
+
+def chi_square_pvalue(statistic: float, dof: int) -> float:
+    """P-valor de la cola derecha (SciPy si está; si no, Wilson-Hilferty)."""
+    try:
+        from scipy.stats import chi2
+    except ImportError:
+        z = ((statistic / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+        return 0.5 * math.erfc(z / math.sqrt(2))
+    return float(chi2.sf(statistic, dof))
+
+
+def chi_square(counts: list[int], expected: float) -> tuple[float, float]:
+    """Estadístico y p-valor de uniformidad de unos recuentos."""
+    statistic = sum((count - expected) ** 2 / expected for count in counts)
+    return statistic, chi_square_pvalue(statistic, len(counts) - 1)
+
+
+def check_uniformity(draws: int, rng: random.Random) -> bool:
+    """Chi-cuadrado de la frecuencia de cada tema en `draws` sorteos."""
+    total, drawn = CHI_SQUARE_TOPICS, CHI_SQUARE_DRAWN
+    counts = [0] * total
+    first_counts = [0] * total
+
+    start = time.perf_counter()
+    for _ in range(draws):
+        positions = draw_topic_positions(total, drawn, rng)
+        first_counts[positions[0]] += 1
+        for position in positions:
+            counts[position] += 1
+    elapsed = time.perf_counter() - start
+
+    ok = True
+    for name, observed, expected in (
+        ("temas sorteados", counts, draws * drawn / total),
+        ("primera bola", first_counts, draws / total),
+    ):
+        statistic, pvalue = chi_square(observed, expected)
+        passed = pvalue >= CHI_SQUARE_ALPHA
+        ok &= passed
+        print(f"{'✓' if passed else '✗'} chi_cuadrado {name:<16} χ²={statistic:9.1f}  "
+              f"gl={total - 1}  p={pvalue:.4f}")
+    print(f"  ({draws:,} sorteos de {drawn} entre {total} en {elapsed:.1f} s)")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=DEFAULT_CASES, help="Casos (N, k, n) al azar")
+    parser.add_argument("--draws", type=int, default=DEFAULT_DRAWS, help="Sorteos para el chi-cuadrado")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los casos y sorteos")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    checks: list[Callable[[], bool]] = [
+        lambda: check_paths(random_cases(args.cases, rng)),
+        lambda: check_monte_carlo(rng),
+        lambda: check_uniformity(args.draws, rng),
+    ]
+    failed = False
+    for check in checks:
+        failed |= not check()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Micro-benchmarks del motor y los parsers de OpoSim.
+
+Recorre temarios de 50, 500, 5.000 y 50.000 temas (y varios tamaños de
+sorteo) midiendo:
+
+- ``calculate_probability`` y ``simulate_draw`` para n = 1, 5 y 20 bolas.
+- ``parse_text_topics`` y ``parse_excel_topics`` sobre temarios generados.
+- ``calculate_stats`` con un progreso sintético de todo el temario.
+
+Los temarios de Excel se generan la primera vez en ``benchmarks/fixtures/``
+(ignorado por git) y se reutilizan en las siguientes ejecuciones.
+
+Cada caso se repite varias veces y se guarda el mejor tiempo por llamada,
+que es el más estable para funciones cortas.
+
+Uso:
+    python benchmarks/engine.py                  # Mide y compara con la línea base
+    python benchmarks/engine.py --save-baseline  # Guarda la línea base actual
+    python benchmarks/engine.py --sizes 50 500   # Solo esos tamaños de temario
+    python benchmarks/engine.py -k excel         # Solo casos cuyo nombre contenga "excel"
+    python benchmarks/engine.py --tolerance 0.5  # Margen de regresión (50%)
+
+Sale con código 1 si algún caso supera la línea base más el margen.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from oposim.engine import calculate_probability, simulate_draw  # noqa: E402
+from oposim.progress import MAX_ESTADO, calculate_stats  # noqa: E402
+from oposim.topics import (  # noqa: E402
+    generate_default_topics,
+    parse_excel_topics,
+    parse_text_topics,
+    write_topics,
+)
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "engine.json"
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+TOPIC_SIZES = [50, 500, 5_000, 50_000]
+DRAW_SIZES = [1, 5, 20]
+MIN_MEASURE_SECONDS = 0.05  # Duración mínima de cada repetición
+
+
+# =============================================================================
+# DATOS DE PRUEBA
+# =============================================================================
+def excel_fixture(size: int) -> Path:
+    """Devuelve la ruta de un temario Excel de `size` temas, generándolo si falta."""
+    path = FIXTURES_DIR / f"temario_{size}.xlsx"
+    if not path.exists():
+        FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+        write_topics(generate_default_topics(size), path)
+    return path
+
+
+def synthetic_progress(size: int, seed: int = 0) -> dict:
+    """Progreso aleatorio (reproducible) con un registro por tema."""
+    rng = random.Random(seed)
+    return {
+        topic_num: {
+            "nombre_tema": f"Tema {topic_num}",
+            "estado": rng.randint(0, MAX_ESTADO),
+            "repasos": rng.randint(0, 20),
+            "descartado": rng.random() < 0.05,
+            "planeado": rng.random() < 0.2,
+        }
+        for topic_num in range(1, size + 1)
+    }
+
+
+def build_cases(sizes: list[int]) -> Iterator[tuple[str, Callable[[], object]]]:
+    """Genera los casos (nombre, función sin argumentos) a medir."""
+    for size in sizes:
+        topics_df = generate_default_topics(size)
+        for drawn in DRAW_SIZES:
+            if drawn > size:
+                continue
+            studied = size // 4
+            yield (
+                f"calculate_probability[N={size},n={drawn}]",
+                lambda size=size, studied=studied, drawn=drawn: calculate_probability(size, studied, drawn),
+            )
+            rng = random.Random(0)
+            yield (
+                f"simulate_draw[N={size},n={drawn}]",
+                lambda topics_df=topics_df, drawn=drawn, rng=rng: simulate_draw(topics_df, drawn, rng),
+            )
+
+        text = "\n".join(topics_df["Nombre del Tema"])
+        yield f"parse_text_topics[N={size}]", lambda text=text: parse_text_topics(text)
+
+        path = excel_fixture(size)
+        yield f"parse_excel_topics[N={size}]", lambda path=path: parse_excel_topics(path)
+
+        progress = synthetic_progress(size)
+        yield f"calculate_stats[N={size}]", lambda progress=progress: calculate_stats(progress)
+
+
+# =============================================================================
+# MEDICIÓN
+# =============================================================================
+def time_case(func: Callable[[], object], repeats: int) -> float:
+    """Mejor tiempo por llamada (en segundos) de `repeats` repeticiones."""
+    # Calibrar cuántas llamadas caben en MIN_MEASURE_SECONDS
+    start = time.perf_counter()
+    func()
+    single = time.perf_counter() - start
+    number = max(1, int(MIN_MEASURE_SECONDS / max(single, 1e-9)))
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def format_seconds(seconds: float) -> str:
+    """Formatea un tiempo con la unidad más legible."""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:9.2f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:9.2f} ms"
+    return f"{seconds:9.2f} s "
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5, help="Repeticiones por caso")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Margen de regresión permitido")
+    parser.add_argument("--sizes", type=int, nargs="+", default=TOPIC_SIZES, help="Tamaños de temario")
+    parser.add_argument("-k", dest="keyword", help="Solo casos cuyo nombre contenga este texto")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar como línea base")
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in build_cases(args.sizes):
+        if args.keyword and args.keyword not in name:
+            continue
+        results[name] = time_case(func, args.repeats)
+        print(f"{name:<40} {format_seconds(results[name])}", flush=True)
+
+    if args.save_baseline:
+        # Se conservan los casos de la línea base que no se han medido ahora
+        baseline = {}
+        if BASELINE_PATH.exists():
+            baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+        baseline.update({name: {"per_call_s": float(f"{seconds:.4g}")} for name, seconds in results.items()})
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Línea base guardada en {BASELINE_PATH.relative_to(ROOT)}")
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print("No hay línea base; ejecuta con --save-baseline para crearla.")
+        return 0
+
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    failed = False
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        limit = baseline[name]["per_call_s"] * (1 + args.tolerance)
+        if seconds > limit:
+            print(f"✗ Regresión en {name}: {format_seconds(seconds).strip()} > {format_seconds(limit).strip()}")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
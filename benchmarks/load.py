@@ -0,0 +1,503 @@
+"""
+Prueba de carga de OpoSim con sesiones concurrentes y un Supabase falso.
+
+Arranca una instancia real de la aplicación (``streamlit run``) en un
+subproceso, con un sustituto en memoria del cliente de Supabase, y abre
+contra ella muchas sesiones simultáneas por websocket, hablando el mismo
+protocolo que el navegador. Cada sesión recorre el flujo de un candidato:
+
+    inicio → iniciar sesión → cargar temario → editar temas
+           → simular sorteos → elegir tema → temporizador (iniciar y aviso)
+
+Para cada nivel de concurrencia informa de los percentiles de latencia
+por rerun (p50/p95/p99, desde que se envía la interacción hasta que el
+script termina), el rendimiento (reruns/s) y el uso de CPU y la memoria
+residente (RSS) del proceso del servidor.
+
+Uso:
+    python benchmarks/load.py                          # Niveles 1, 2, 4, 8 y 16
+    python benchmarks/load.py --levels 1 4 16 32       # Otros niveles
+    python benchmarks/load.py --sessions 3             # Sesiones por cliente y nivel
+    python benchmarks/load.py --backend-latency 20     # Simular 20 ms por consulta
+    python benchmarks/load.py --json resultados.json   # Guardar los resultados
+
+Requiere el paquete ``websockets`` (``pip install -e ".[dev]"``) y Linux
+(CPU y RSS se leen de /proc).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from streamlit.runtime.state.common import user_key_from_element_id
+
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = ROOT / "src" / "app.py"
+
+DEFAULT_LEVELS = [1, 2, 4, 8, 16]
+DEFAULT_PORT = 8599
+TEMARIO_TOPICS = 60
+USER_PIN = "1234"
+SERVER_START_TIMEOUT = 60
+RERUN_TIMEOUT = 120
+
+SECRETS_TOML = '[supabase]\nurl = "http://supabase.invalid"\nkey = "fake"\n'
+
+
+# =============================================================================
+# SUPABASE FALSO
+# =============================================================================
+class FakeResult:
+    """Resultado de una consulta, con la misma forma que el del cliente real."""
+
+    def __init__(self, data: list[dict]):
+        self.data = data
+
+
+class FakeQuery:
+    """Constructor de consultas encadenable (select/insert/upsert/update + eq)."""
+
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.payload = None
+        self.on_conflict: list[str] = []
+        self.filters: list[tuple[str, object]] = []
+
+    def select(self, *columns: str) -> "FakeQuery":
+        self.action = "select"
+        return self
+
+    def insert(self, record: dict) -> "FakeQuery":
+        self.action, self.payload = "insert", record
+        return self
+
+    def upsert(self, record: dict, on_conflict: str = "") -> "FakeQuery":
+        self.action, self.payload = "upsert", record
+        self.on_conflict = [column.strip() for column in on_conflict.split(",") if column.strip()]
+        return self
+
+    def update(self, values: dict) -> "FakeQuery":
+        self.action, self.payload = "update", values
+        return self
+
+    def eq(self, column: str, value: object) -> "FakeQuery":
+        self.filters.append((column, value))
+        return self
+
+    def execute(self) -> FakeResult:
+        return self.client.execute(self)
+
+
+class FakeSupabase:
+    """Sustituto en memoria del cliente de Supabase, seguro entre hilos."""
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.tables: dict[str, list[dict]] = defaultdict(list)
+        self.calls: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def execute(self, query: FakeQuery) -> FakeResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)  # Ida y vuelta de red simulada
+
+        with self._lock:
+            self.calls[f"{query.table}.{query.action}"] += 1
+            rows = self.tables[query.table]
+            matches = [
+                row for row in rows
+                if all(row.get(column) == value for column, value in query.filters)
+            ]
+
+            if query.action == "select":
+                return FakeResult([dict(row) for row in matches])
+
+            if query.action == "insert":
+                if query.table == "users" and any(
+                    row["user_code"] == query.payload["user_code"] for row in rows
+                ):
+                    raise RuntimeError("duplicate key value violates unique constraint")
+                rows.append(dict(query.payload))
+                return FakeResult([dict(query.payload)])
+
+            if query.action == "upsert":
+                for row in rows:
+                    if all(row.get(column) == query.payload.get(column) for column in query.on_conflict):
+                        row.update(query.payload)
+                        return FakeResult([dict(row)])
+                rows.append(dict(query.payload))
+                return FakeResult([dict(query.payload)])
+
+            # update
+            for row in matches:
+                row.update(query.payload)
+            return FakeResult([dict(row) for row in matches])
+
+    def add_user(self, user_code: str, pin: str) -> None:
+        """Da de alta un usuario con el mismo hash de PIN que la aplicación."""
+        pin_hash = hashlib.sha256(pin.encode()).hexdigest()
+        with self._lock:
+            self.tables["users"].append({"user_code": user_code, "pin_hash": pin_hash})
+
+
+def install_fake_supabase(client: FakeSupabase) -> None:
+    """Sustituye el paquete `supabase` para que la aplicación use el cliente falso."""
+    module = types.ModuleType("supabase")
+    module.create_client = lambda url, key: client
+    module.Client = FakeSupabase
+    sys.modules["supabase"] = module
+
+
+def load_user_code(index: int) -> str:
+    """Código del usuario de carga número `index`."""
+    return f"carga_{index}"
+
+
+def serve_app(port: int, users: int, latency_ms: float) -> None:
+    """
+    Ejecuta la aplicación con el Supabase falso (proceso del servidor).
+
+    Se lanza desde `start_server` en un subproceso cuyo directorio de
+    trabajo contiene los secretos de prueba.
+    """
+    client = FakeSupabase(latency_ms / 1000)
+    for index in range(users):
+        client.add_user(load_user_code(index), USER_PIN)
+    install_fake_supabase(client)
+
+    from streamlit.web.cli import main as streamlit_main
+
+    sys.argv = [
+        "streamlit", "run", str(APP_PATH),
+        "--server.port", str(port),
+        "--server.address", "127.0.0.1",
+        "--server.headless", "true",
+        "--server.fileWatcherType", "none",
+        "--browser.gatherUsageStats", "false",
+        "--logger.level", "warning",
+    ]
+    streamlit_main()
+
+
+# =============================================================================
+# SERVIDOR
+# =============================================================================
+def start_server(port: int, users: int, latency_ms: float, workdir: Path) -> subprocess.Popen:
+    """Arranca la aplicación en un subproceso y espera a que responda."""
+    if server_is_up(port):
+        raise RuntimeError(f"El puerto {port} ya está en uso; usa --port para elegir otro")
+
+    streamlit_dir = workdir / ".streamlit"
+    streamlit_dir.mkdir(parents=True, exist_ok=True)
+    (streamlit_dir / "secrets.toml").write_text(SECRETS_TOML, encoding="utf-8")
+
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", str(port), str(users), str(latency_ms)],
+        cwd=workdir,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al arrancar (código {process.returncode})")
+        if server_is_up(port):
+            return process
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+def server_is_up(port: int) -> bool:
+    """Si hay un servidor de Streamlit respondiendo en el puerto."""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def process_usage(pid: int) -> tuple[float, float]:
+    """CPU acumulada (segundos) y RSS (MB) de un proceso, leídas de /proc."""
+    with open(f"/proc/{pid}/stat") as handle:
+        # Los campos tras el nombre del proceso (que puede tener espacios)
+        fields = handle.read().rsplit(")", 1)[1].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    with open(f"/proc/{pid}/statm") as handle:
+        resident_pages = int(handle.read().split()[1])
+    return cpu_seconds, resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+# =============================================================================
+# CLIENTE DE STREAMLIT
+# =============================================================================
+class SessionClient:
+    """
+    Sesión de navegador mínima sobre el websocket de Streamlit.
+
+    Guarda los valores de los widgets que ha tocado y los reenvía en cada
+    rerun, como el frontend; los botones (disparadores) solo se envían una vez.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.elements: list[tuple[str, object]] = []  # (tipo, proto) de la última ejecución
+        self.values: dict[str, WidgetState] = {}
+
+    async def rerun(self) -> float:
+        """Envía los widgets y espera al final del script; devuelve la latencia."""
+        present = {getattr(proto, "id", "") for _, proto in self.elements}
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        for widget_id, state in self.values.items():
+            if widget_id in present:
+                message.rerun_script.widget_states.widgets.append(state)
+        self.values = {
+            widget_id: state for widget_id, state in self.values.items()
+            if not state.HasField("trigger_value")
+        }
+
+        start = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        elements = []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(self.websocket.recv(), RERUN_TIMEOUT))
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                elements = []  # Empieza otra ejecución (p. ej. tras st.rerun())
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                elements.append((element_type, getattr(element, element_type)))
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        self.elements = elements
+        return time.perf_counter() - start
+
+    def errors(self) -> list[str]:
+        """Excepciones mostradas por la aplicación en la última ejecución."""
+        return [proto.message for element_type, proto in self.elements if element_type == "exception"]
+
+    def find(self, element_type: str, key: str | None = None, label: str | None = None):
+        """Primer elemento del tipo con esa clave (o prefijo) o texto."""
+        for found_type, proto in self.elements:
+            if found_type != element_type:
+                continue
+            if key is not None:
+                user_key = user_key_from_element_id(proto.id) or ""
+                if not (user_key == key or key.endswith("*") and user_key.startswith(key[:-1])):
+                    continue
+            if label is not None and label not in proto.label:
+                continue
+            return proto
+        raise LookupError(f"No se encontró {element_type} (clave={key}, texto={label})")
+
+    def set_string(self, proto, value: str) -> None:
+        """Texto, área de texto, radio o selectbox (por texto de la opción)."""
+        self.values[proto.id] = WidgetState(id=proto.id, string_value=value)
+
+    def set_number(self, proto, value: float) -> None:
+        """Slider de un valor."""
+        state = WidgetState(id=proto.id)
+        state.double_array_value.data[:] = [value]
+        self.values[proto.id] = state
+
+    def set_json(self, proto, value: dict) -> None:
+        """Valor devuelto por un componente personalizado."""
+        self.values[proto.id] = WidgetState(id=proto.id, json_value=json.dumps(value))
+
+    def click(self, proto) -> None:
+        """Pulsación de un botón (incluidos los de envío de formulario)."""
+        self.values[proto.id] = WidgetState(id=proto.id, trigger_value=True)
+
+
+async def run_session(url: str, user_code: str, temario_text: str) -> tuple[list[tuple[str, float]], list[str]]:
+    """
+    Recorre el flujo completo de un candidato.
+
+    Returns:
+        Tupla (lista de (paso, segundos) por rerun, lista de errores)
+    """
+    latencies = []
+    errors = []
+
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as websocket:
+        session = SessionClient(websocket)
+
+        async def step(name: str) -> None:
+            latencies.append((name, await session.rerun()))
+            errors.extend(f"{name}: {message}" for message in session.errors())
+
+        try:
+            await step("inicio")
+            session.set_string(session.find("radio", key="active_view"), "📊 Mi Progreso")
+            await step("vista_progreso")
+
+            session.set_string(session.find("text_input", key="login_user_code"), user_code)
+            session.set_string(session.find("text_input", key="login_pin"), USER_PIN)
+            session.click(session.find("button", label="Entrar"))
+            await step("login")
+
+            session.set_string(session.find("text_area", key="text_topics_input"), temario_text)
+            session.click(session.find("button", label="Cargar Temas"))
+            await step("cargar_temario")
+
+            for index in range(3):
+                selector = session.find("selectbox", key="topic_selector")
+                session.set_string(selector, selector.options[index])
+                session.click(session.find("button", label="Editar"))
+                await step("editar")
+                session.set_number(session.find("slider", key="edit_estado_*"), 8)
+                session.click(session.find("button", label="Guardar cambios"))
+                await step("guardar")
+
+            session.set_string(session.find("radio", key="active_view"), "🎲 Simulador")
+            await step("vista_simulador")
+            for _ in range(3):
+                session.click(session.find("button", label="Simular Sorteo"))
+                await step("sorteo")
+            session.click(session.find("button", label="Elegir este tema"))
+            await step("elegir_tema")
+            session.click(session.find("button", label="Iniciar"))
+            await step("temporizador")
+
+            # Aviso de últimos minutos, como lo enviaría el componente del navegador
+            timer = session.find("component_instance", key="exam_timer")
+            timer_id = json.loads(timer.json_args).get("timer_id")
+            session.set_json(timer, {"timer_id": timer_id, "event": "warning"})
+            await step("aviso_temporizador")
+        except Exception as e:  # noqa: BLE001 - se informa y sigue la prueba
+            errors.append(f"{type(e).__name__}: {e}")
+
+    return latencies, errors
+
+
+# =============================================================================
+# MEDICIÓN
+# =============================================================================
+def percentile(values: list[float], q: float) -> float:
+    """Percentil por rango más cercano."""
+    ordered = sorted(values)
+    rank = max(1, int(round(q * len(ordered))))
+    return ordered[rank - 1]
+
+
+async def run_level(url: str, pid: int, concurrency: int, sessions_per_client: int, first_user: int) -> dict:
+    """Ejecuta `concurrency` clientes con `sessions_per_client` sesiones cada uno."""
+    temario_text = "\n".join(f"Tema de carga {i}" for i in range(1, TEMARIO_TOPICS + 1))
+
+    async def client(client_index: int) -> tuple[list, list]:
+        latencies, errors = [], []
+        for session in range(sessions_per_client):
+            user_code = load_user_code(first_user + client_index * sessions_per_client + session)
+            session_latencies, session_errors = await run_session(url, user_code, temario_text)
+            latencies.extend(session_latencies)
+            errors.extend(session_errors)
+        return latencies, errors
+
+    cpu_start, _ = process_usage(pid)
+    wall_start = time.perf_counter()
+    outcomes = await asyncio.gather(*(client(index) for index in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+    cpu_end, rss_mb = process_usage(pid)
+
+    latencies = [seconds for client_latencies, _ in outcomes for _, seconds in client_latencies]
+    by_step = defaultdict(list)
+    for client_latencies, _ in outcomes:
+        for name, seconds in client_latencies:
+            by_step[name].append(seconds)
+    errors = [error for _, client_errors in outcomes for error in client_errors]
+
+    return {
+        "concurrency": concurrency,
+        "sessions": concurrency * sessions_per_client,
+        "reruns": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 0.95) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else None,
+        "reruns_per_s": len(latencies) / wall if wall else 0.0,
+        "cpu_percent": 100 * (cpu_end - cpu_start) / wall if wall else 0.0,
+        "rss_mb": rss_mb,
+        "steps_p50_ms": {
+            name: statistics.median(values) * 1000 for name, values in sorted(by_step.items())
+        },
+        "errors": errors,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=DEFAULT_LEVELS, help="Sesiones simultáneas")
+    parser.add_argument("--sessions", type=int, default=2, help="Sesiones por cliente en cada nivel")
+    parser.add_argument("--backend-latency", type=float, default=0.0, help="Latencia simulada por consulta (ms)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Puerto del servidor de prueba")
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    parser.add_argument("--serve", nargs=3, help=argparse.SUPPRESS)  # Proceso del servidor
+    args = parser.parse_args()
+
+    if args.serve:
+        port, users, latency_ms = args.serve
+        serve_app(int(port), int(users), float(latency_ms))
+        return 0
+
+    users = sum(args.levels) * args.sessions
+    url = f"ws://127.0.0.1:{args.port}/_stcore/stream"
+    with tempfile.TemporaryDirectory(prefix="oposim-load-") as workdir:
+        server = start_server(args.port, users, args.backend_latency, Path(workdir))
+        try:
+            print(f"{'sesiones':>8} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                  f"{'reruns/s':>9} {'CPU %':>6} {'RSS MB':>7}  concurrencia")
+            results = []
+            failed = False
+            first_user = 0
+            for concurrency in args.levels:
+                result = asyncio.run(run_level(url, server.pid, concurrency, args.sessions, first_user))
+                first_user += concurrency * args.sessions
+                results.append(result)
+                if not result["reruns"]:
+                    print(f"{result['sessions']:>8} {0:>7}  (sin reruns){'':>40}  {concurrency}")
+                else:
+                    print(
+                        f"{result['sessions']:>8} {result['reruns']:>7} {result['p50_ms']:>8.1f} "
+                        f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['reruns_per_s']:>9.1f} "
+                        f"{result['cpu_percent']:>6.0f} {result['rss_mb']:>7.0f}  {concurrency}",
+                        flush=True,
+                    )
+                if result["errors"]:
+                    failed = True
+                    for error in result["errors"][:5]:
+                        print(f"  ✗ {error}")
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
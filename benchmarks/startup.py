@@ -0,0 +1,132 @@
+"""
+Benchmark de arranque de OpoSim.
+
+Mide en procesos de Python nuevos (sin cachés calientes de módulos):
+
+- ``import``: tiempo de importar ``src/app.py``.
+- ``first_render``: tiempo hasta completar la primera ejecución del script
+  con ``AppTest`` (usuario anónimo con el temario por defecto).
+
+Además comprueba que los módulos de carga diferida (Supabase, SciPy...)
+no se importan durante el arranque.
+
+Uso:
+    python benchmarks/startup.py                  # Mide y compara con la línea base
+    python benchmarks/startup.py --save-baseline  # Guarda la línea base actual
+    python benchmarks/startup.py --tolerance 0.5  # Margen de regresión (50%)
+
+Sale con código 1 si alguna mediana supera la línea base más el margen o si
+se importa algún módulo diferido.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = ROOT / "src" / "app.py"
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "startup.json"
+
+# Módulos que solo deben cargarse cuando una funcionalidad los necesita
+LAZY_MODULES = ["supabase", "openpyxl", "scipy"]
+
+IMPORT_SNIPPET = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+loaded = [m for m in {lazy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+FIRST_RENDER_SNIPPET = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+elapsed = time.perf_counter() - start
+loaded = [m for m in {lazy!r} if m in sys.modules]
+errors = [str(e.value) for e in at.exception]
+print(json.dumps({{"seconds": elapsed, "loaded": loaded, "errors": errors}}))
+"""
+
+
+def run_snippet(snippet: str) -> dict:
+    """Ejecuta un fragmento en un intérprete nuevo y devuelve su resultado JSON."""
+    completed = subprocess.run(
+        [sys.executable, "-c", snippet],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure(repeats: int) -> dict:
+    """Mide import y primer render `repeats` veces y devuelve las medianas."""
+    snippets = {
+        "import": IMPORT_SNIPPET.format(src=str(APP_PATH.parent), lazy=LAZY_MODULES),
+        "first_render": FIRST_RENDER_SNIPPET.format(app=str(APP_PATH), lazy=LAZY_MODULES),
+    }
+    results = {}
+    for name, snippet in snippets.items():
+        runs = [run_snippet(snippet) for _ in range(repeats)]
+        results[name] = {
+            "median_s": statistics.median(run["seconds"] for run in runs),
+            "min_s": min(run["seconds"] for run in runs),
+            "loaded": sorted({m for run in runs for m in run["loaded"]}),
+            "errors": sorted({e for run in runs for e in run.get("errors", [])}),
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5, help="Repeticiones por medida")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Margen de regresión permitido")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar como línea base")
+    args = parser.parse_args()
+
+    results = measure(args.repeats)
+    failed = False
+
+    for name, result in results.items():
+        print(f"{name:>13}: mediana {result['median_s'] * 1000:8.1f} ms  (mín {result['min_s'] * 1000:.1f} ms)")
+        if result["loaded"]:
+            print(f"{'':>13}  ✗ módulos diferidos importados: {', '.join(result['loaded'])}")
+            failed = True
+        if result["errors"]:
+            print(f"{'':>13}  ✗ excepciones: {result['errors']}")
+            failed = True
+
+    if args.save_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        baseline = {name: {"median_s": round(r["median_s"], 4)} for name, r in results.items()}
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+        print(f"Línea base guardada en {BASELINE_PATH.relative_to(ROOT)}")
+        return 1 if failed else 0
+
+    if BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            limit = baseline[name]["median_s"] * (1 + args.tolerance)
+            if result["median_s"] > limit:
+                print(f"✗ Regresión en {name}: {result['median_s']:.3f} s > {limit:.3f} s")
+                failed = True
+    else:
+        print("No hay línea base; ejecuta con --save-baseline para crearla.")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
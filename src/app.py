@@ -7,37 +7,129 @@ de temas en oposiciones españolas.
 Autor: OpoSim Team
 """
 
-import random
-import time
 import hashlib
+import io
+import os
+import time
+from collections.abc import Callable, MutableMapping
 from datetime import datetime, timedelta
-from math import comb
-from typing import NamedTuple
+from pathlib import Path
+from typing import TYPE_CHECKING
 
+import numpy as np
 import pandas as pd
 import streamlit as st
-from supabase import create_client, Client
+import streamlit.components.v1 as components
+
+from oposim.engine import draw_topic_positions, monte_carlo_success_rate, probability_grid
+from oposim.jobs import JOB_CANCELLED, JOB_DONE, JOB_PENDING, Job, JobContext, JobRunner
+from oposim.lut import LUT_MAX_DRAWN, LUT_MAX_TOTAL, lookup_probability
+from oposim.memory import format_bytes, session_memory_report
+from oposim.metrics import REGISTRY, start_metrics_server, timed, write_metrics_file
+from oposim.planner import (
+    PLAN_DEFAULT_TOPIC_HOURS,
+    PLAN_DOMINATED_ESTADO,
+    PLAN_MODE_AT_LEAST,
+    PLAN_MODE_BEST,
+    StudyPlan,
+    estimate_study_hours,
+    optimize_study_plan,
+)
+from oposim.profiling import Profiler, span, traced
+from oposim.progress import (
+    BUCKET_CODES,
+    BUCKET_LABELS,
+    BUCKET_STYLES,
+    MAX_ESTADO,
+    STATE_COLORS,
+    TOPIC_BUCKETS,
+    ProgressStats,
+    ProgressStore,
+    TopicBitset,
+    classify_progress,
+    get_topic_color,
+    get_topic_status,
+)
+from oposim.resultcache import get_result_cache, persistent_cache
+from oposim.review import ReviewQueue, review_anchor
+from oposim.topics import (
+    DEFAULT_TOTAL_TOPICS,
+    TemarioCache,
+    TemarioIndex,
+    generate_default_topics,
+    parse_excel_topics,
+    parse_text_topics,
+    topics_to_text,
+)
+
+if TYPE_CHECKING:
+    # Solo para anotaciones: el cliente se importa al conectar (ver get_supabase_client)
+    from supabase import Client
 
 
 # =============================================================================
 # CONSTANTES
 # =============================================================================
-DEFAULT_TOTAL_TOPICS = 100
 DEFAULT_BALLS_DRAWN = 5
 DEFAULT_STUDIED_TOPICS = 25
+DEFAULT_STUDIED_MIN_ESTADO = 8  # Estado a partir del cual un tema cuenta como estudiado
 TIMER_DEFAULT_MINUTES = 120  # 2 horas
-TIMER_REFRESH_INTERVAL = 1  # segundos
-
-# Colores para estados de temas
-STATE_COLORS = {
-    "sin_evaluar": "#e5e7eb",  # Gris claro
-    "rojo": "#ef4444",          # Estado 1-3
-    "naranja": "#f97316",       # Estado 4-5
-    "amarillo": "#eab308",      # Estado 6-7
-    "verde": "#22c55e",         # Estado 8-10
-    "azul": "#3b82f6",          # Planeado
-    "descartado": "#9ca3af",    # Gris
+TIMER_WARNING_SECONDS = 300  # 5 minutos
+
+# Componente del temporizador que cuenta hacia atrás en el navegador
+TIMER_COMPONENT_DIR = Path(__file__).parent / "components" / "countdown_timer"
+
+# Temas por página en el mapa de progreso
+TOPIC_MAP_PAGE_SIZE = 100
+
+# Temas que se muestran en la lista "Repasar ahora"
+REVIEW_LIST_SIZE = 5
+
+# Formas de indicar los temas estudiados (etiqueta -> identificador)
+STUDIED_MODES = {
+    "🔢 Cantidad": "count",
+    "📊 Mi progreso": "progress",
+    "✏️ Rangos": "ranges",
+    "☑️ Lista": "select",
+}
+
+# Vistas principales (etiqueta -> identificador)
+MAIN_VIEWS = {
+    "🎲 Simulador": "simulator",
+    "🔭 Escenarios": "explorer",
+    "📊 Mi Progreso": "progress",
+}
+
+# Ejecuciones que se guardan para el panel de depuración (?debug=1)
+PROFILER_RERUNS = 20
+
+# Intervalo mínimo entre escrituras del archivo de métricas (OPOSIM_METRICS_FILE)
+METRICS_FILE_INTERVAL_SECONDS = 15
+
+# Ejes del explorador de escenarios (etiqueta -> identificador)
+EXPLORER_AXES = {
+    "k × n (N fijo)": "k_n",
+    "N × k (n fijo)": "N_k",
+}
+EXPLORER_MAX_AXIS_POINTS = 120  # Puntos por eje; rangos mayores se muestrean
+
+# Compactación del estado de sesión (ver compact_session_state)
+SESSION_STALE_RERUNS = {
+    "grid_render_cache": 30,  # Caché del mapa de temas si no se abre la vista de progreso
+}
+SESSION_TEXT_COMPACT_CHARS = 20_000  # Texto del temario a partir del cual se libera si ya está guardado
+SESSION_TEXT_IDLE_RERUNS = 30  # Ejecuciones sin mostrar el cuadro de texto antes de liberarlo
+
+# Trabajos en segundo plano
+JOB_POLL_SECONDS = 0.5  # Intervalo de consulta del progreso (solo se ejecuta el fragmento)
+MONTE_CARLO_RUN_OPTIONS = [10_000, 100_000, 1_000_000]  # Sorteos de la simulación masiva
+
+# Objetivos del plan de estudio (etiqueta -> identificador)
+PLAN_MODES = {
+    "🏆 Mejor tema del sorteo": PLAN_MODE_BEST,
+    "✅ Al menos m temas dominados": PLAN_MODE_AT_LEAST,
 }
+PLAN_DEFAULT_BUDGET_HOURS = 40
 
 
 # =============================================================================
@@ -105,6 +197,47 @@ CUSTOM_CSS = """
         display: none;
     }
     
+    /* Navegación principal - Radio con aspecto de pestañas */
+    .st-key-main_nav [role="radiogroup"] {
+        gap: 8px;
+        background-color: #f5f5f5;
+        padding: 8px;
+        border-radius: 12px;
+        border: 1px solid #e5e5e5;
+        width: 100%;
+    }
+    
+    .st-key-main_nav [role="radiogroup"] label {
+        background-color: transparent;
+        border-radius: 8px;
+        padding: 12px 24px;
+        margin: 0;
+        cursor: pointer;
+        transition: all 0.2s ease;
+    }
+    
+    .st-key-main_nav [role="radiogroup"] label > div:first-child {
+        display: none;
+    }
+    
+    .st-key-main_nav [role="radiogroup"] label p {
+        font-weight: 600;
+        color: #525252 !important;
+    }
+    
+    .st-key-main_nav [role="radiogroup"] label:hover {
+        background-color: #e5e5e5;
+    }
+    
+    .st-key-main_nav [role="radiogroup"] label:has(input:checked) {
+        background-color: white;
+        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1);
+    }
+    
+    .st-key-main_nav [role="radiogroup"] label:has(input:checked) p {
+        color: #171717 !important;
+    }
+    
     /* Header principal - Gris claro */
     .main-header {
         background: linear-gradient(135deg, #f5f5f5 0%, #e5e5e5 100%);
@@ -755,22 +888,20 @@ CUSTOM_CSS = """
 """
 
 
-# =============================================================================
-# MODELOS DE DATOS
-# =============================================================================
-class Topic(NamedTuple):
-    """Representa un tema del temario."""
-    numero: int
-    nombre: str
-
-
 # =============================================================================
 # FUNCIONES DE SUPABASE Y AUTENTICACIÓN
 # =============================================================================
 @st.cache_resource
-def get_supabase_client() -> Client | None:
-    """Obtiene el cliente de Supabase."""
+def get_supabase_client() -> "Client | None":
+    """
+    Obtiene el cliente de Supabase.
+
+    El paquete `supabase` se importa aquí y no al arrancar: cuesta más que
+    el resto de la aplicación y solo se necesita al iniciar sesión.
+    """
     try:
+        from supabase import create_client
+
         url = st.secrets["supabase"]["url"]
         key = st.secrets["supabase"]["key"]
         return create_client(url, key)
@@ -784,6 +915,8 @@ def hash_pin(pin: str) -> str:
     return hashlib.sha256(pin.encode()).hexdigest()
 
 
+@traced("storage")
+@timed("oposim_storage_seconds", "Latencia de las operaciones de Supabase")
 def register_user(user_code: str, pin: str) -> bool:
     """Registra un nuevo usuario."""
     supabase = get_supabase_client()
@@ -805,6 +938,8 @@ def register_user(user_code: str, pin: str) -> bool:
         return False
 
 
+@traced("storage")
+@timed("oposim_storage_seconds", "Latencia de las operaciones de Supabase")
 def verify_user(user_code: str, pin: str) -> bool:
     """Verifica las credenciales del usuario."""
     supabase = get_supabase_client()
@@ -821,6 +956,8 @@ def verify_user(user_code: str, pin: str) -> bool:
         return False
 
 
+@traced("storage")
+@timed("oposim_storage_seconds", "Latencia de las operaciones de Supabase")
 def user_exists(user_code: str) -> bool:
     """Verifica si un usuario existe."""
     supabase = get_supabase_client()
@@ -836,33 +973,30 @@ def user_exists(user_code: str) -> bool:
         return False
 
 
-def get_user_progress(user_code: str) -> dict:
+@traced("storage")
+@timed("oposim_storage_seconds", "Latencia de las operaciones de Supabase")
+def get_user_progress(user_code: str) -> "ProgressStore":
     """Obtiene el progreso de todos los temas del usuario."""
     supabase = get_supabase_client()
     if not supabase:
-        return {}
+        return ProgressStore()
     
     try:
         result = supabase.table("topic_progress").select("*").eq(
             "user_code", user_code.lower().strip()
         ).execute()
         
-        # Convertir a diccionario indexado por tema_numero
-        progress = {}
-        for row in result.data:
-            progress[row["tema_numero"]] = {
-                "nombre_tema": row.get("nombre_tema", ""),
-                "estado": row.get("estado", 0),
-                "repasos": row.get("repasos", 0),
-                "descartado": row.get("descartado", False),
-                "planeado": row.get("planeado", False),
-            }
-        return progress
+        # Convertir a almacén columnar indexado por tema_numero
+        return ProgressStore.from_records(
+            (row["tema_numero"], row) for row in result.data
+        )
     except Exception as e:
         st.error(f"Error al cargar progreso: {e}")
-        return {}
+        return ProgressStore()
 
 
+@traced("storage")
+@timed("oposim_storage_seconds", "Latencia de las operaciones de Supabase")
 def save_topic_progress(user_code: str, tema_numero: int, data: dict) -> bool:
     """Guarda o actualiza el progreso de un tema."""
     supabase = get_supabase_client()
@@ -878,7 +1012,7 @@ def save_topic_progress(user_code: str, tema_numero: int, data: dict) -> bool:
             "repasos": data.get("repasos", 0),
             "descartado": data.get("descartado", False),
             "planeado": data.get("planeado", False),
-            "updated_at": datetime.now().isoformat(),
+            "updated_at": data.get("updated_at") or datetime.now().isoformat(),
         }
         
         # Upsert: insertar o actualizar si existe
@@ -892,6 +1026,8 @@ def save_topic_progress(user_code: str, tema_numero: int, data: dict) -> bool:
         return False
 
 
+@traced("storage")
+@timed("oposim_storage_seconds", "Latencia de las operaciones de Supabase")
 def save_user_temario(user_code: str, temario_csv: str) -> bool:
     """Guarda el temario del usuario en Supabase."""
     supabase = get_supabase_client()
@@ -916,6 +1052,8 @@ def save_user_temario(user_code: str, temario_csv: str) -> bool:
         return False
 
 
+@traced("storage")
+@timed("oposim_storage_seconds", "Latencia de las operaciones de Supabase")
 def get_user_temario(user_code: str) -> str | None:
     """Obtiene el temario guardado del usuario."""
     supabase = get_supabase_client()
@@ -934,248 +1072,241 @@ def get_user_temario(user_code: str) -> str | None:
         return None
 
 
-def get_topic_color(estado: int, descartado: bool, planeado: bool) -> str:
-    """Determina el color de un tema basado en su estado."""
-    if descartado:
-        return STATE_COLORS["descartado"]
-    if planeado:
-        return STATE_COLORS["azul"]
-    if estado == 0:
-        return STATE_COLORS["sin_evaluar"]
-    if estado <= 3:
-        return STATE_COLORS["rojo"]
-    if estado <= 5:
-        return STATE_COLORS["naranja"]
-    if estado <= 7:
-        return STATE_COLORS["amarillo"]
-    return STATE_COLORS["verde"]
-
-
-def get_topic_css_class(estado: int, descartado: bool, planeado: bool) -> str:
-    """Determina la clase CSS para el botón de un tema."""
-    if descartado:
-        return "topic-btn-gray"
-    if planeado:
-        return "topic-btn-blue"
-    if estado == 0:
-        return "topic-btn-neutral"
-    if estado <= 3:
-        return "topic-btn-red"
-    if estado <= 5:
-        return "topic-btn-orange"
-    if estado <= 7:
-        return "topic-btn-yellow"
-    return "topic-btn-green"
-
-
-def calculate_stats(progress: dict) -> dict:
-    """Calcula estadísticas del progreso."""
-    if not progress:
-        return {
-            "total": 0,
-            "evaluados": 0,
-            "buenos": 0,
-            "planeados": 0,
-            "descartados": 0,
-            "promedio": 0,
-            "total_repasos": 0,
-        }
-    
-    evaluados = [p for p in progress.values() if p["estado"] > 0]
-    buenos = [p for p in progress.values() if p["estado"] >= 8 and not p["descartado"]]
-    planeados = [p for p in progress.values() if p["planeado"] and not p["descartado"]]
-    descartados = [p for p in progress.values() if p["descartado"]]
-    total_repasos = sum(p["repasos"] for p in progress.values())
-    
-    promedio = 0
-    if evaluados:
-        promedio = sum(p["estado"] for p in evaluados) / len(evaluados)
-    
-    return {
-        "total": len(progress),
-        "evaluados": len(evaluados),
-        "buenos": len(buenos),
-        "planeados": len(planeados),
-        "descartados": len(descartados),
-        "promedio": promedio,
-        "total_repasos": total_repasos,
-    }
-
-
 # =============================================================================
-# FUNCIONES DE CÁLCULO MATEMÁTICO
+# CACHÉ COMPARTIDA DE TEMARIOS
 # =============================================================================
-def calculate_probability(
-    total_topics: int,
-    studied_topics: int,
-    balls_drawn: int
-) -> float:
+@st.cache_resource
+def get_temario_cache() -> TemarioCache:
+    """Obtiene la caché de temarios compartida del proceso."""
+    return TemarioCache()
+
+
+@st.cache_resource
+def get_default_topics(count: int = DEFAULT_TOTAL_TOPICS) -> pd.DataFrame:
+    """Temario por defecto, generado una sola vez por proceso y compartido."""
+    return generate_default_topics(count)
+
+
+def set_session_topics(topics_df: pd.DataFrame) -> pd.DataFrame:
     """
-    Calcula la probabilidad de que salga AL MENOS un tema estudiado en el sorteo.
-    
-    Utiliza la distribución hipergeométrica:
-    
-    P(X >= 1) = 1 - P(X = 0)
-    
-    Donde P(X = 0) representa la probabilidad de NO sacar ningún tema estudiado:
-    P(X = 0) = C(N-k, n) / C(N, n)
-    
-    Siendo:
-        N = total_topics (número total de temas en el temario)
-        k = studied_topics (temas que el candidato ha estudiado)
-        n = balls_drawn (bolas/temas extraídos en el sorteo)
-        C(a, b) = combinaciones de 'a' elementos tomados de 'b' en 'b'
-    
-    Args:
-        total_topics: N - Número total de temas en el temario
-        studied_topics: k - Número de temas estudiados por el candidato
-        balls_drawn: n - Número de bolas/temas que se extraen en el sorteo
-        
-    Returns:
-        Probabilidad como float entre 0 y 1
-        
-    Raises:
-        ValueError: Si los parámetros son inválidos
+    Registra el temario de la sesión en la caché compartida.
+
+    La sesión guarda solo el hash; se devuelve la instancia compartida.
     """
-    # Validación de parámetros
-    if total_topics <= 0:
-        raise ValueError("El número total de temas debe ser mayor que 0")
-    if studied_topics < 0:
-        raise ValueError("El número de temas estudiados no puede ser negativo")
-    if balls_drawn <= 0:
-        raise ValueError("El número de bolas del sorteo debe ser mayor que 0")
-    if studied_topics > total_topics:
-        raise ValueError("Los temas estudiados no pueden superar el total de temas")
-    if balls_drawn > total_topics:
-        raise ValueError("Las bolas del sorteo no pueden superar el total de temas")
-    
-    # Caso especial: si no se ha estudiado nada, probabilidad es 0
-    if studied_topics == 0:
-        return 0.0
-    
-    # Caso especial: si se han estudiado todos o las bolas >= temas no estudiados
-    if studied_topics >= total_topics or balls_drawn > (total_topics - studied_topics):
-        return 1.0
-    
-    # Cálculo usando distribución hipergeométrica
-    # P(ninguno estudiado) = C(N-k, n) / C(N, n)
-    # Usamos comb() de math para calcular combinaciones de forma eficiente
-    not_studied = total_topics - studied_topics
-    
-    prob_none_studied = comb(not_studied, balls_drawn) / comb(total_topics, balls_drawn)
-    
-    # P(al menos uno) = 1 - P(ninguno)
-    return 1.0 - prob_none_studied
+    temario_cache = get_temario_cache()
+    st.session_state.text_topics_hash = temario_cache.put(topics_df)
+    return temario_cache.get(st.session_state.text_topics_hash)
+
+
+def get_session_topics() -> pd.DataFrame | None:
+    """Obtiene el temario de la sesión desde la caché compartida."""
+    topics_hash = st.session_state.get("text_topics_hash")
+    topics_df = get_temario_cache().get(topics_hash)
+    if topics_hash is not None:
+        count_cache_request("temario", topics_df is not None)
+    return topics_df
+
+
+def get_temario_index(topics_df: pd.DataFrame, temario_hash: str) -> TemarioIndex:
+    """Obtiene el índice compartido del temario o lo construye si no está cacheado."""
+    index = get_temario_cache().get_index(temario_hash)
+    if index is None:
+        index = TemarioIndex(topics_df, temario_hash)
+    return index
 
 
 # =============================================================================
-# FUNCIONES DE GENERACIÓN DE DATOS
+# ESTADO DE SESIÓN
 # =============================================================================
-def generate_default_topics(count: int = DEFAULT_TOTAL_TOPICS) -> pd.DataFrame:
+def set_drawn_topics(positions: list[int] | None, temario_hash: str | None = None) -> None:
     """
-    Genera un listado automático de temas por defecto.
-    
-    Args:
-        count: Número de temas a generar
-        
-    Returns:
-        DataFrame con columnas 'Número' y 'Nombre del Tema'
+    Guarda el sorteo de la sesión como posiciones en el temario compartido.
+
+    Con None se descarta el sorteo. La selección de tema se reinicia.
     """
-    topics = [
-        {"Número": i, "Nombre del Tema": f"Tema {i} - Contenido del tema número {i}"}
-        for i in range(1, count + 1)
-    ]
-    return pd.DataFrame(topics)
+    st.session_state.drawn_positions = tuple(positions) if positions is not None else None
+    st.session_state.drawn_temario_hash = temario_hash
+    st.session_state.selected_topic_idx = None
 
 
-def parse_excel_topics(uploaded_file) -> pd.DataFrame | None:
+def get_drawn_topics(topics_df: pd.DataFrame, temario_hash: str) -> pd.DataFrame | None:
     """
-    Parsea un archivo Excel subido y extrae los temas.
-    
-    Args:
-        uploaded_file: Archivo Excel subido por el usuario
-        
-    Returns:
-        DataFrame con los temas o None si hay error
+    Reconstruye los temas sorteados a partir de sus posiciones.
+
+    Un sorteo hecho sobre otro temario deja de ser válido y se descarta.
     """
-    try:
-        df = pd.read_excel(uploaded_file, engine="openpyxl")
-        
-        # Buscar columnas requeridas (case-insensitive)
-        columns_lower = {col.lower(): col for col in df.columns}
-        
-        numero_col = None
-        nombre_col = None
-        
-        for key, original in columns_lower.items():
-            if "número" in key or "numero" in key:
-                numero_col = original
-            if "nombre" in key or "tema" in key:
-                nombre_col = original
-        
-        if numero_col and nombre_col:
-            result = df[[numero_col, nombre_col]].copy()
-            result.columns = ["Número", "Nombre del Tema"]
-            return result
-        
-        # Si no encuentra las columnas, intenta usar las dos primeras
-        if len(df.columns) >= 2:
-            result = df.iloc[:, :2].copy()
-            result.columns = ["Número", "Nombre del Tema"]
-            return result
-            
+    positions = st.session_state.get("drawn_positions")
+    if positions is None:
         return None
-        
-    except Exception as e:
-        st.error(f"Error al leer el archivo Excel: {e}")
+    if st.session_state.get("drawn_temario_hash") != temario_hash:
+        set_drawn_topics(None)
         return None
+    return topics_df.iloc[list(positions)].reset_index(drop=True)
+
+
+def touch_session_value(key: str) -> None:
+    """Marca una clave como usada en esta ejecución (ver SESSION_STALE_RERUNS)."""
+    st.session_state.setdefault("session_touched", {})[key] = st.session_state.get("rerun_count", 0)
 
 
-def parse_text_topics(text: str) -> pd.DataFrame | None:
+def text_digest(text: str) -> str:
+    """Huella de un texto, para saber si es el que se guardó."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compact_session_state() -> None:
     """
-    Parsea un bloque de texto donde cada línea es un tema.
-    
-    Args:
-        text: Texto con temas separados por líneas
-        
-    Returns:
-        DataFrame con los temas o None si no hay temas válidos
+    Libera valores grandes que la sesión ya no necesita.
+
+    Se llama al principio de cada ejecución, antes de crear los widgets:
+    - Las claves de SESSION_STALE_RERUNS sin usar en ese número de
+      ejecuciones se borran (se reconstruyen si se vuelven a necesitar).
+    - El texto del temario, si es largo, ya está guardado tal cual en la
+      cuenta y el cuadro de texto lleva SESSION_TEXT_IDLE_RERUNS ejecuciones
+      sin mostrarse: el temario se vuelve a leer de la cuenta si hace falta.
     """
-    if not text or not text.strip():
-        return None
-    
-    lines = [line.strip() for line in text.strip().split("\n") if line.strip()]
-    
-    if not lines:
-        return None
-    
-    topics = [
-        {"Número": i, "Nombre del Tema": line}
-        for i, line in enumerate(lines, start=1)
-    ]
-    
-    return pd.DataFrame(topics)
+    state = st.session_state
+    rerun_count = state.get("rerun_count", 0) + 1
+    state.rerun_count = rerun_count
+
+    touched = state.setdefault("session_touched", {})
+    for key, max_idle in SESSION_STALE_RERUNS.items():
+        if key not in state:
+            touched.pop(key, None)
+        elif rerun_count - touched.setdefault(key, rerun_count) > max_idle:
+            del state[key]
+            touched.pop(key)
+
+    text = state.get("text_topics_input", "")
+    text_idle = rerun_count - touched.get("text_topics_input", rerun_count)
+    if (
+        len(text) > SESSION_TEXT_COMPACT_CHARS
+        and text_idle > SESSION_TEXT_IDLE_RERUNS
+        and state.get("logged_user")
+        and state.get("user_temario_loaded")
+        and state.get("text_topics_saved_digest") == text_digest(text)
+    ):
+        state.text_topics_input = ""
+        state.pop("text_topics_saved_digest")
 
 
 # =============================================================================
-# FUNCIONES DE SIMULACIÓN
+# TRABAJOS EN SEGUNDO PLANO
 # =============================================================================
-def simulate_draw(topics_df: pd.DataFrame, balls_drawn: int) -> pd.DataFrame:
+@st.cache_resource
+def get_job_runner() -> JobRunner:
+    """Obtiene el ejecutor de trabajos compartido del proceso."""
+    return JobRunner()
+
+
+def start_job(key: str, name: str, func: Callable, *args, **kwargs) -> bool:
     """
-    Simula un sorteo de temas aleatorio.
-    
-    Args:
-        topics_df: DataFrame con todos los temas
-        balls_drawn: Número de temas a extraer
-        
-    Returns:
-        DataFrame con los temas seleccionados
+    Lanza un trabajo y guarda su identificador en la sesión bajo `key`.
+
+    Si ya había un trabajo con esa clave, se cancela y se descarta.
+    Devuelve False (avisando al usuario) si el ejecutor está saturado.
     """
-    if balls_drawn > len(topics_df):
-        balls_drawn = len(topics_df)
-    
-    selected_indices = random.sample(range(len(topics_df)), balls_drawn)
-    return topics_df.iloc[selected_indices].reset_index(drop=True)
+    jobs = st.session_state.setdefault("jobs", {})
+    runner = get_job_runner()
+    runner.forget(jobs.pop(key, None))
+    try:
+        jobs[key] = runner.submit(name, func, *args, **kwargs)
+    except ValueError as e:
+        st.warning(str(e))
+        return False
+    return True
+
+
+def get_job(key: str) -> Job | None:
+    """Trabajo de la sesión con esa clave (None si no hay o ya caducó)."""
+    jobs = st.session_state.get("jobs", {})
+    job = get_job_runner().get(jobs.get(key))
+    if job is None:
+        jobs.pop(key, None)
+    return job
+
+
+def clear_job(key: str) -> None:
+    """Cancela (si sigue en curso) y olvida el trabajo de la sesión con esa clave."""
+    get_job_runner().forget(st.session_state.get("jobs", {}).pop(key, None))
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def display_job_progress(key: str, label: str) -> None:
+    """
+    Muestra el progreso de un trabajo en curso con un botón para cancelarlo.
+
+    Solo se vuelve a ejecutar este fragmento cada JOB_POLL_SECONDS; al
+    terminar el trabajo se ejecuta la página completa para mostrar el resultado.
+    """
+    job = get_job(key)
+    if job is None or job.finished:
+        st.rerun()
+
+    text = job.message or ("En cola..." if job.status == JOB_PENDING else "Calculando...")
+    col_progress, col_cancel = st.columns([4, 1])
+    with col_progress:
+        st.progress(job.progress, text=f"{label}: {text}")
+    with col_cancel:
+        if st.button("✖️ Cancelar", key=f"cancel_job_{key}", use_container_width=True):
+            get_job_runner().cancel(job.job_id)
+
+
+@persistent_cache(version=1)
+def read_excel_topics(data: bytes) -> pd.DataFrame | None:
+    """Lee un temario de Excel (cacheado en disco por contenido del archivo)."""
+    return parse_excel_topics(io.BytesIO(data))
+
+
+def import_excel_job(ctx: JobContext, data: bytes) -> pd.DataFrame | None:
+    """Trabajo: lee un temario de Excel."""
+    ctx.progress(0.0, "Leyendo el archivo Excel...")
+    topics_df = read_excel_topics(data)
+    ctx.check_cancelled()
+    return topics_df
+
+
+def monte_carlo_job(
+    ctx: JobContext,
+    total_topics: int,
+    studied: int | TopicBitset,
+    balls_drawn: int,
+    runs: int
+) -> dict:
+    """Trabajo: simulación masiva de sorteos para comprobar la probabilidad."""
+    def on_progress(done: int) -> None:
+        ctx.progress(done / runs, f"{done:,} de {runs:,} sorteos".replace(",", "."))
+
+    rate = monte_carlo_success_rate(
+        total_topics, studied, balls_drawn, runs, on_progress=on_progress
+    )
+    return {
+        "total_topics": total_topics,
+        "studied_topics": studied if isinstance(studied, int) else len(studied),
+        "balls_drawn": balls_drawn,
+        "runs": runs,
+        "rate": rate,
+    }
+
+
+def study_plan_job(
+    ctx: JobContext,
+    estado: np.ndarray,
+    descartado: np.ndarray,
+    hours: np.ndarray,
+    topic_nums: list[int],
+    budget_hours: float,
+    balls_drawn: int,
+    mode: str,
+    minimum: int
+) -> StudyPlan:
+    """Trabajo: optimiza el plan de estudio con las horas disponibles."""
+    return optimize_study_plan(
+        estado, descartado, budget_hours, balls_drawn, mode, minimum,
+        hours=hours,
+        topic_nums=topic_nums,
+        on_progress=lambda fraction: ctx.progress(fraction, "Buscando el mejor plan..."),
+    )
 
 
 # =============================================================================
@@ -1191,8 +1322,6 @@ def init_timer_state() -> None:
         st.session_state.timer_paused = False
     if "timer_remaining" not in st.session_state:
         st.session_state.timer_remaining = None
-    if "selected_topic" not in st.session_state:
-        st.session_state.selected_topic = None
 
 
 def start_timer(duration_minutes: int) -> None:
@@ -1522,11 +1651,10 @@ def display_topic_editor(
                 "descartado": new_descartado,
                 "planeado": new_planeado,
             }
+            new_data["updated_at"] = review_anchor(current_data, new_data)
             if save_topic_progress(user_code, topic_num, new_data):
                 # Actualizar progreso en session_state
-                if "user_progress" not in st.session_state:
-                    st.session_state.user_progress = {}
-                st.session_state.user_progress[topic_num] = new_data
+                update_topic_progress(topic_num, new_data)
                 st.toast("✅ Guardado correctamente", icon="✅")
                 # Cerrar editor y recargar para ver cambios
                 st.session_state.editing_topic = None
@@ -1538,7 +1666,257 @@ def display_topic_editor(
             st.rerun()
 
 
-def render_progress_tab(topics_df: pd.DataFrame) -> None:
+# =============================================================================
+# FUNCIONES DE UI - CACHÉ DE RENDERIZADO DEL MAPA
+# =============================================================================
+def set_user_progress(progress: MutableMapping) -> None:
+    """Reemplaza el progreso completo del usuario e invalida la caché del mapa."""
+    if st.session_state.get("user_progress") == progress:
+        return
+    st.session_state.user_progress = progress
+    st.session_state.progress_stats = ProgressStats.from_progress(progress)
+    st.session_state.review_queue = ReviewQueue.from_progress(progress)
+    bump_progress_version()
+
+
+def get_progress_stats() -> ProgressStats:
+    """Obtiene el agregado de estadísticas del progreso de la sesión."""
+    if "progress_stats" not in st.session_state:
+        st.session_state.progress_stats = ProgressStats.from_progress(
+            st.session_state.get("user_progress", ProgressStore())
+        )
+    return st.session_state.progress_stats
+
+
+def get_review_queue() -> ReviewQueue:
+    """Obtiene la cola de repasos de la sesión (se construye una vez por progreso)."""
+    if "review_queue" not in st.session_state:
+        st.session_state.review_queue = ReviewQueue.from_progress(
+            st.session_state.get("user_progress", ProgressStore())
+        )
+    return st.session_state.review_queue
+
+
+def update_topic_progress(topic_num: int, data: dict) -> None:
+    """
+    Actualiza el progreso de un tema en la sesión.
+
+    Las estadísticas se ajustan en O(1), la cola de repasos en O(log N)
+    y solo se invalida la celda del mapa correspondiente a ese tema.
+    """
+    if "user_progress" not in st.session_state:
+        set_user_progress(ProgressStore())
+    progress = st.session_state.user_progress
+    get_progress_stats().replace(progress.get(topic_num), data)
+    get_review_queue().update(topic_num, data)
+    progress[topic_num] = data
+    bump_progress_version(topic_num)
+
+
+def bump_progress_version(topic_num: int | None = None) -> None:
+    """
+    Incrementa el contador de versión del progreso.
+
+    Si se indica `topic_num`, solo se invalidan las celdas de ese tema;
+    en caso contrario se descartan todas las celdas cacheadas.
+    """
+    st.session_state.progress_version = st.session_state.get("progress_version", 0) + 1
+
+    cache = st.session_state.get("grid_render_cache")
+    if cache is None:
+        return
+    if topic_num is None:
+        cache["cells"].clear()
+        cache["options"].clear()
+    else:
+        cache["cells"].pop(topic_num, None)
+        cache["options"].pop(topic_num, None)
+
+
+def build_topic_cell_html(topic_num: int, bucket: str, is_editing: bool = False) -> str:
+    """Construye el HTML de una celda del mapa de temas a partir de su grupo de estado."""
+    color = STATE_COLORS[bucket]
+
+    text_decoration = "line-through" if bucket == "descartado" else "none"
+    text_color = "#171717" if bucket in ("sin_evaluar", "amarillo") else "#ffffff"
+    border = "3px solid #171717" if is_editing else "1px solid rgba(0,0,0,0.1)"
+    font_weight = "700" if is_editing else "500"
+
+    item_style = f"background-color:{color};color:{text_color};text-decoration:{text_decoration};border:{border};border-radius:8px;padding:8px 4px;text-align:center;font-weight:{font_weight};font-size:0.9rem;"
+    return f'<div style="{item_style}" title="Tema {topic_num}">{topic_num}</div>'
+
+
+def build_topic_option(topic_num: int, bucket: str) -> str:
+    """Construye la etiqueta con indicador de estado para el selector de temas."""
+    _, emoji = BUCKET_STYLES[bucket]
+    return f"{emoji} Tema {topic_num}"
+
+
+def get_grid_render_cache(temario_index: TemarioIndex) -> dict:
+    """
+    Obtiene la caché de renderizado del mapa para el temario actual.
+
+    Un temario distinto (según su hash) invalida todas las celdas.
+    """
+    if "grid_render_cache" not in st.session_state:
+        st.session_state.grid_render_cache = {
+            "key": None,
+            "temario_hash": None,
+            "codes_key": None,
+            "bucket_codes": None,
+            "html": "",
+            "topic_options": [],
+            "cells": {},
+            "options": {},
+        }
+    cache = st.session_state.grid_render_cache
+    touch_session_value("grid_render_cache")
+
+    temario_hash = temario_index.temario_hash
+    if cache["temario_hash"] != temario_hash:
+        cache["cells"].clear()
+        cache["options"].clear()
+        cache["temario_hash"] = temario_hash
+    return cache
+
+
+@traced("grid")
+def get_cached_bucket_codes(temario_index: TemarioIndex, progress: dict) -> np.ndarray:
+    """Clasifica todos los temas una sola vez por versión del progreso."""
+    cache = get_grid_render_cache(temario_index)
+    codes_key = (st.session_state.get("progress_version", 0), cache["temario_hash"])
+    count_cache_request("bucket_codes", cache["codes_key"] == codes_key)
+    if cache["codes_key"] != codes_key:
+        cache["bucket_codes"] = classify_progress(progress, temario_index.num_topics)
+        cache["codes_key"] = codes_key
+    return cache["bucket_codes"]
+
+
+@traced("grid")
+def get_cached_topic_grid(
+    temario_index: TemarioIndex,
+    progress: dict,
+    editing_topic: int | None,
+    cols_per_row: int,
+    topic_nums: list[int] | None = None
+) -> tuple[str, list[str]]:
+    """
+    Devuelve el HTML del mapa de temas y las opciones del selector.
+
+    El resultado se memoriza en session_state con la clave
+    (versión del progreso, tema en edición, columnas, hash del temario,
+    temas visibles). Si la clave no cambia se sirve desde memoria; si
+    cambia, solo se reconstruyen las celdas invalidadas por
+    `bump_progress_version`.
+
+    Args:
+        temario_index: Índice del temario
+        progress: Progreso del usuario indexado por número de tema
+        editing_topic: Tema que se está editando o None
+        cols_per_row: Columnas del grid
+        topic_nums: Temas a mostrar (página actual); None para todos
+
+    Returns:
+        Tupla (html del grid, lista de opciones del selector)
+    """
+    cache = get_grid_render_cache(temario_index)
+    bucket_codes = get_cached_bucket_codes(temario_index, progress)
+
+    if topic_nums is None:
+        topic_nums = list(range(1, temario_index.num_topics + 1))
+
+    key = (
+        st.session_state.get("progress_version", 0),
+        editing_topic,
+        cols_per_row,
+        cache["temario_hash"],
+        tuple(topic_nums),
+    )
+    count_cache_request("topic_grid", cache["key"] == key)
+    if cache["key"] == key:
+        return cache["html"], cache["topic_options"]
+
+    cells = cache["cells"]
+    options = cache["options"]
+
+    grid_items = []
+    topic_options = []
+    for topic_num in topic_nums:
+        bucket = TOPIC_BUCKETS[bucket_codes[topic_num - 1]]
+        if topic_num not in cells or topic_num not in options:
+            cells[topic_num] = build_topic_cell_html(topic_num, bucket)
+            options[topic_num] = build_topic_option(topic_num, bucket)
+
+        # La celda en edición lleva borde resaltado y no se cachea
+        if topic_num == editing_topic:
+            grid_items.append(build_topic_cell_html(topic_num, bucket, is_editing=True))
+        else:
+            grid_items.append(cells[topic_num])
+        topic_options.append(options[topic_num])
+
+    grid_style = f"display:grid;grid-template-columns:repeat({cols_per_row},1fr);gap:6px;margin-bottom:1rem;"
+    cache["html"] = f'<div style="{grid_style}">{"".join(grid_items)}</div>'
+    cache["topic_options"] = topic_options
+    cache["key"] = key
+
+    return cache["html"], cache["topic_options"]
+
+
+def filter_topic_numbers(
+    topics_df: pd.DataFrame,
+    bucket_codes: np.ndarray,
+    buckets: list[str] | None = None,
+    query: str = ""
+) -> np.ndarray:
+    """
+    Filtra los temas por grupo de estado y por texto.
+
+    Args:
+        topics_df: DataFrame con todos los temas
+        bucket_codes: Código de grupo de cada tema (ver classify_topics)
+        buckets: Grupos de estado a incluir; vacío o None para todos
+        query: Texto a buscar en el número o el nombre del tema
+
+    Returns:
+        Array con los números de tema que cumplen el filtro
+    """
+    mask = np.ones(len(topics_df), dtype=bool)
+
+    if buckets:
+        wanted = [BUCKET_CODES[bucket] for bucket in buckets]
+        mask &= np.isin(bucket_codes, wanted)
+
+    query = query.strip()
+    if query:
+        topic_numbers = np.arange(1, len(topics_df) + 1).astype(str)
+        names = topics_df["Nombre del Tema"].astype(str)
+        mask &= (topic_numbers == query) | names.str.contains(
+            query, case=False, regex=False
+        ).to_numpy()
+
+    return np.flatnonzero(mask) + 1
+
+
+def reset_topic_map_page() -> None:
+    """Vuelve a la primera página del mapa al cambiar los filtros."""
+    st.session_state.topic_map_page = 1
+
+
+def paginate(items: np.ndarray, page: int, page_size: int) -> tuple[np.ndarray, int, int]:
+    """
+    Obtiene una página de elementos.
+
+    Returns:
+        Tupla (elementos de la página, página ajustada, total de páginas)
+    """
+    total_pages = max(1, -(-len(items) // page_size))
+    page = min(max(page, 1), total_pages)
+    start = (page - 1) * page_size
+    return items[start:start + page_size], page, total_pages
+
+
+@traced("view")
+def render_progress_tab(topics_df: pd.DataFrame, temario_index: TemarioIndex, balls_drawn: int) -> None:
     """Renderiza la pestaña de progreso de temas."""
     
     # Verificar login
@@ -1554,7 +1932,7 @@ def render_progress_tab(topics_df: pd.DataFrame) -> None:
     with col_logout:
         if st.button("🚪 Cerrar sesión", use_container_width=True):
             st.session_state.logged_user = None
-            st.session_state.user_progress = {}
+            set_user_progress(ProgressStore())
             st.session_state.user_temario_loaded = False
             st.rerun()
     
@@ -1562,17 +1940,23 @@ def render_progress_tab(topics_df: pd.DataFrame) -> None:
     
     # Cargar progreso del usuario
     if "user_progress" not in st.session_state or not st.session_state.user_progress:
-        st.session_state.user_progress = get_user_progress(user_code)
+        set_user_progress(get_user_progress(user_code))
     
     progress = st.session_state.user_progress
     
     # Estadísticas
-    stats = calculate_stats(progress)
+    stats = get_progress_stats().as_dict()
     display_stats_panel(stats)
     
     # Leyenda de colores
     display_color_legend()
     
+    # Temas que antes toca repasar
+    display_review_list(temario_index)
+    
+    # Plan de estudio con las horas disponibles
+    display_study_plan_panel(temario_index, progress, balls_drawn)
+    
     st.divider()
     
     # Mapa de temas
@@ -1591,80 +1975,98 @@ def render_progress_tab(topics_df: pd.DataFrame) -> None:
     
     # Grid de temas como HTML visual + selector
     with col_map:
-        num_topics = len(topics_df)
         cols_per_row = 10 if not st.session_state.editing_topic else 8
         
-        # Crear mapa visual HTML - construir como lista y unir
-        grid_items = []
-        for topic_idx in range(num_topics):
-            topic_num = topic_idx + 1
-            topic_data = progress.get(topic_num, {"estado": 0, "descartado": False, "planeado": False})
-            color = get_topic_color(
-                topic_data.get("estado", 0),
-                topic_data.get("descartado", False),
-                topic_data.get("planeado", False)
+        # Filtros por grupo de estado y búsqueda
+        col_filter, col_search = st.columns([2, 1])
+        with col_filter:
+            bucket_filter = st.multiselect(
+                "Filtrar por estado",
+                options=list(TOPIC_BUCKETS),
+                format_func=lambda bucket: BUCKET_LABELS[bucket],
+                placeholder="Todos los estados",
+                key="topic_map_buckets",
+                on_change=reset_topic_map_page
+            )
+        with col_search:
+            search_query = st.text_input(
+                "Buscar tema",
+                placeholder="Número o nombre",
+                key="topic_map_search",
+                on_change=reset_topic_map_page
             )
-            is_descartado = topic_data.get("descartado", False)
-            is_editing = st.session_state.editing_topic == topic_num
-            
-            text_decoration = "line-through" if is_descartado else "none"
-            text_color = "#ffffff" if color not in ["#e5e7eb", "#eab308"] else "#171717"
-            border = "3px solid #171717" if is_editing else "1px solid rgba(0,0,0,0.1)"
-            font_weight = "700" if is_editing else "500"
-            
-            item_style = f"background-color:{color};color:{text_color};text-decoration:{text_decoration};border:{border};border-radius:8px;padding:8px 4px;text-align:center;font-weight:{font_weight};font-size:0.9rem;"
-            grid_items.append(f'<div style="{item_style}" title="Tema {topic_num}">{topic_num}</div>')
         
-        grid_style = f"display:grid;grid-template-columns:repeat({cols_per_row},1fr);gap:6px;margin-bottom:1rem;"
-        html_grid = f'<div style="{grid_style}">{"".join(grid_items)}</div>'
-        st.markdown(html_grid, unsafe_allow_html=True)
+        bucket_codes = get_cached_bucket_codes(temario_index, progress)
+        matching = filter_topic_numbers(topics_df, bucket_codes, bucket_filter, search_query)
         
-        # Selector de tema para editar
-        st.markdown("**Selecciona un tema para editar:**")
-        col_select, col_btn = st.columns([3, 1])
+        # Paginación: solo se envían al navegador las celdas de la página actual
+        if "topic_map_page" not in st.session_state:
+            st.session_state.topic_map_page = 1
+        page_topics, page, total_pages = paginate(
+            matching, st.session_state.topic_map_page, TOPIC_MAP_PAGE_SIZE
+        )
+        st.session_state.topic_map_page = page
+        
+        if total_pages > 1:
+            col_prev, col_page, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                if st.button("◀ Anterior", use_container_width=True, disabled=page <= 1):
+                    st.session_state.topic_map_page = page - 1
+                    st.rerun()
+            with col_page:
+                st.markdown(
+                    f"<p style='text-align:center;margin:0.5rem 0;'>Página {page} de {total_pages} "
+                    f"· {len(matching)} temas</p>",
+                    unsafe_allow_html=True
+                )
+            with col_next:
+                if st.button("Siguiente ▶", use_container_width=True, disabled=page >= total_pages):
+                    st.session_state.topic_map_page = page + 1
+                    st.rerun()
         
-        with col_select:
-            # Crear opciones con indicador de estado
+        if len(page_topics) == 0:
+            st.info("No hay temas que coincidan con el filtro.")
             topic_options = []
-            for i in range(1, num_topics + 1):
-                td = progress.get(i, {"estado": 0, "descartado": False, "planeado": False})
-                estado = td.get("estado", 0)
-                emoji = "⚪"
-                if td.get("descartado", False):
-                    emoji = "⚫"
-                elif td.get("planeado", False):
-                    emoji = "🔵"
-                elif estado >= 8:
-                    emoji = "🟢"
-                elif estado >= 6:
-                    emoji = "🟡"
-                elif estado >= 4:
-                    emoji = "🟠"
-                elif estado >= 1:
-                    emoji = "🔴"
-                topic_options.append(f"{emoji} Tema {i}")
-            
-            selected = st.selectbox(
-                "Tema",
-                options=topic_options,
-                index=(st.session_state.editing_topic - 1) if st.session_state.editing_topic else 0,
-                label_visibility="collapsed",
-                key="topic_selector"
+        else:
+            # Mapa visual HTML y opciones del selector (memorizados entre reruns)
+            html_grid, topic_options = get_cached_topic_grid(
+                temario_index,
+                progress,
+                st.session_state.editing_topic,
+                cols_per_row,
+                page_topics.tolist()
             )
-            
-            # Extraer número del tema seleccionado
-            selected_num = int(selected.split(" ")[2])
+            st.markdown(html_grid, unsafe_allow_html=True)
         
-        with col_btn:
-            if st.button("✏️ Editar", use_container_width=True, type="primary"):
-                st.session_state.editing_topic = selected_num
-                st.rerun()
+        if topic_options:
+            # Selector de tema para editar (solo con las opciones de la página)
+            st.markdown("**Selecciona un tema para editar:**")
+            col_select, col_btn = st.columns([3, 1])
+            
+            page_nums = page_topics.tolist()
+            editing = st.session_state.editing_topic
+            
+            with col_select:
+                selected = st.selectbox(
+                    "Tema",
+                    options=topic_options,
+                    index=page_nums.index(editing) if editing in page_nums else 0,
+                    label_visibility="collapsed",
+                    key="topic_selector"
+                )
+                
+                # Extraer número del tema seleccionado
+                selected_num = int(selected.split(" ")[2])
+            
+            with col_btn:
+                if st.button("✏️ Editar", use_container_width=True, type="primary"):
+                    st.session_state.editing_topic = selected_num
+                    st.rerun()
     
     # Panel de edición del tema seleccionado (en columna derecha)
     if st.session_state.editing_topic and col_editor:
         topic_num = st.session_state.editing_topic
-        topic_row = topics_df[topics_df["Número"] == topic_num]
-        topic_name = topic_row.iloc[0]["Nombre del Tema"] if len(topic_row) > 0 else f"Tema {topic_num}"
+        topic_name = temario_index.name(topic_num, f"Tema {topic_num}")
         
         current_data = progress.get(topic_num, {
             "nombre_tema": topic_name,
@@ -1681,14 +2083,136 @@ def render_progress_tab(topics_df: pd.DataFrame) -> None:
     # Botón para recargar datos
     st.divider()
     if st.button("🔄 Recargar datos desde servidor", use_container_width=True):
-        st.session_state.user_progress = get_user_progress(user_code)
+        set_user_progress(get_user_progress(user_code))
         st.success("Datos recargados")
         st.rerun()
 
 
-# =============================================================================
-# FUNCIONES DE UI - COMPONENTES
-# =============================================================================
+def format_review_due(days: float) -> str:
+    """Texto de la fecha de repaso: vencido hace, hoy o dentro de."""
+    if days <= -1:
+        return f"vencido hace {int(-days)} {'día' if int(-days) == 1 else 'días'}"
+    if days < 1:
+        return "toca hoy"
+    return f"dentro de {int(days)} {'día' if int(days) == 1 else 'días'}"
+
+
+def display_review_list(temario_index: TemarioIndex) -> None:
+    """Muestra los temas que antes toca repasar, con un botón para editarlos."""
+    items = get_review_queue().peek(REVIEW_LIST_SIZE, include=temario_index)
+    if not items:
+        return
+    
+    progress = st.session_state.user_progress
+    st.markdown("### 🔁 Repasar ahora")
+    for item in items:
+        data = progress.get(item.topic_num, {})
+        due = format_review_due(item.days_until()) if item.due else "sin fecha de repaso"
+        col_topic, col_edit = st.columns([5, 1])
+        with col_topic:
+            st.markdown(
+                f"**Tema {item.topic_num}** · {temario_index.name(item.topic_num, '')}  \n"
+                f"<small>{due} · estado {data.get('estado', 0)} · "
+                f"{data.get('repasos', 0)} repasos</small>",
+                unsafe_allow_html=True
+            )
+        with col_edit:
+            if st.button("✏️", key=f"review_edit_{item.topic_num}", use_container_width=True,
+                         help="Editar el tema (anota el repaso)"):
+                st.session_state.editing_topic = item.topic_num
+                st.rerun()
+
+
+def display_study_plan_panel(
+    temario_index: TemarioIndex,
+    progress: ProgressStore,
+    balls_drawn: int
+) -> None:
+    """Propone qué temas estudiar con las horas disponibles (en segundo plano)."""
+    with st.expander("🧭 Plan de estudio"):
+        st.caption(
+            "Elige los temas que más suben tu probabilidad de un buen sorteo con las horas que "
+            "tienes. Estudiar un tema lo lleva al estado máximo; las horas de cada tema son "
+            "proporcionales a lo que le falta. Los temas descartados no se proponen."
+        )
+        col_budget, col_hours = st.columns(2)
+        with col_budget:
+            budget_hours = st.number_input(
+                "Horas disponibles", min_value=0, value=PLAN_DEFAULT_BUDGET_HOURS, step=5,
+                key="plan_budget_hours"
+            )
+        with col_hours:
+            topic_hours = st.number_input(
+                "Horas para preparar un tema desde cero", min_value=0.5,
+                value=PLAN_DEFAULT_TOPIC_HOURS, step=0.5, key="plan_topic_hours"
+            )
+        
+        mode = PLAN_MODES[st.radio(
+            "Objetivo", options=list(PLAN_MODES.keys()), horizontal=True, key="plan_mode"
+        )]
+        minimum = 1
+        if mode == PLAN_MODE_AT_LEAST:
+            minimum = st.number_input(
+                f"Temas dominados (estado ≥ {PLAN_DOMINATED_ESTADO}) entre las {balls_drawn} bolas",
+                min_value=1, max_value=balls_drawn, value=min(2, balls_drawn), key="plan_minimum"
+            )
+        
+        if st.button("🧭 Calcular plan", use_container_width=True, key="plan_start"):
+            # Una fila por tema del temario (el número de tema puede no ser correlativo)
+            topic_nums = sorted(temario_index.positions)
+            estado, _, descartado, _, _ = progress.columns_for(topic_nums)
+            st.session_state.plan_progress_version = st.session_state.get("progress_version", 0)
+            start_job(
+                "study_plan", "study_plan", study_plan_job,
+                estado, descartado, estimate_study_hours(estado, topic_hours), topic_nums,
+                float(budget_hours), balls_drawn, mode, int(minimum)
+            )
+        
+        job = get_job("study_plan")
+        if job is None:
+            return
+        if not job.finished:
+            display_job_progress("study_plan", "Plan de estudio")
+            return
+        if job.status == JOB_CANCELLED:
+            st.info("Cálculo del plan cancelado")
+            return
+        if job.status != JOB_DONE:
+            st.error(f"Error al calcular el plan: {job.error}")
+            return
+        
+        plan: StudyPlan = job.result
+        st.metric(
+            "Probabilidad con el plan",
+            f"{plan.probability_after * 100:.1f}%",
+            delta=f"{(plan.probability_after - plan.probability_before) * 100:+.1f} pp",
+        )
+        method = "plan óptimo" if plan.exact else "plan voraz (aproximado)"
+        st.caption(f"{len(plan.steps)} temas · {plan.hours:g} de {plan.budget_hours:g} horas · {method}")
+        if st.session_state.get("plan_progress_version") != st.session_state.get("progress_version", 0):
+            st.caption("⚠️ Tu progreso ha cambiado desde que se calculó el plan.")
+        if plan.steps:
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        "Tema": step.topic_num,
+                        "Nombre": temario_index.name(step.topic_num, ""),
+                        "Estado actual": step.estado,
+                        "Horas": step.hours,
+                        "Probabilidad": f"{step.probability * 100:.1f}%",
+                    }
+                    for step in plan.steps
+                ]),
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            st.info("Con esas horas no hay ningún tema que mejore tu probabilidad.")
+
+
+# =============================================================================
+# FUNCIONES DE UI - COMPONENTES
+# =============================================================================
 def display_probability_panel(probability: float) -> None:
     """
     Muestra el panel de probabilidad con feedback visual dinámico.
@@ -1734,21 +2258,64 @@ def display_probability_panel(probability: float) -> None:
     st.progress(probability)
 
 
+def select_studied_topics(mode: str, total_topics: int) -> TopicBitset:
+    """
+    Muestra los controles para indicar qué temas se han estudiado.
+
+    Args:
+        mode: Identificador de STUDIED_MODES (salvo "count")
+        total_topics: Número de temas del temario
+
+    Returns:
+        Conjunto de temas estudiados dentro del temario
+    """
+    if mode == "progress":
+        if not st.session_state.get("logged_user"):
+            st.info("Inicia sesión en «Mi Progreso» para usar tu progreso.")
+            return TopicBitset()
+        if "user_progress" not in st.session_state:
+            set_user_progress(get_user_progress(st.session_state.logged_user))
+        min_estado = st.slider(
+            "Estado mínimo para contar como estudiado",
+            min_value=1,
+            max_value=MAX_ESTADO,
+            value=DEFAULT_STUDIED_MIN_ESTADO,
+            help="Cuentan los temas con este estado o superior que no estén descartados",
+            key="studied_min_estado"
+        )
+        return TopicBitset.from_progress(
+            st.session_state.user_progress, min_estado, total_topics
+        )
+
+    if mode == "ranges":
+        ranges_text = st.text_input(
+            "Temas estudiados",
+            placeholder="1-40, 55, 60-62",
+            help="Números o rangos de temas separados por comas",
+            key="studied_ranges"
+        )
+        try:
+            return TopicBitset.from_ranges(ranges_text, max_topic=total_topics)
+        except ValueError as e:
+            st.warning(str(e))
+            return TopicBitset()
+
+    selected = st.multiselect(
+        "Temas estudiados",
+        options=range(1, total_topics + 1),
+        format_func=lambda topic_num: f"Tema {topic_num}",
+        placeholder="Elige los temas",
+        key="studied_selection"
+    )
+    return TopicBitset.from_topics(
+        topic_num for topic_num in selected if topic_num <= total_topics
+    )
+
+
 def get_status_indicator(estado: int, descartado: bool, planeado: bool) -> tuple:
     """Retorna el emoji y color del indicador de estado."""
-    if descartado:
-        return "⚫", "#9ca3af", "Descartado"
-    if planeado:
-        return "🔵", "#3b82f6", "Planeado"
-    if estado == 0:
-        return "⚪", "#e5e7eb", "Sin evaluar"
-    if estado <= 3:
-        return "🔴", "#ef4444", f"Estado: {estado}/10"
-    if estado <= 5:
-        return "🟠", "#f97316", f"Estado: {estado}/10"
-    if estado <= 7:
-        return "🟡", "#eab308", f"Estado: {estado}/10"
-    return "🟢", "#22c55e", f"Estado: {estado}/10"
+    status = get_topic_status(estado, descartado, planeado)
+    return status.emoji, status.color, status.label
 
 
 def display_topic_card(topic: pd.Series, is_studied: bool = False, is_selected: bool = False, progress_data: dict = None) -> None:
@@ -1796,39 +2363,598 @@ def display_topic_card(topic: pd.Series, is_studied: bool = False, is_selected:
     """, unsafe_allow_html=True)
 
 
+countdown_timer = components.declare_component(
+    "countdown_timer",
+    path=str(TIMER_COMPONENT_DIR)
+)
+
+
+def get_timer_id() -> str | None:
+    """Identificador de la ejecución actual del temporizador."""
+    if st.session_state.timer_end is None:
+        return None
+    return st.session_state.timer_end.isoformat()
+
+
+def handle_timer_event(event: dict | None) -> None:
+    """
+    Procesa un aviso del temporizador del navegador una sola vez.
+
+    El componente solo llama al servidor al entrar en los últimos
+    minutos o al agotarse el tiempo; pausar y detener son botones.
+    """
+    if not event:
+        return
+
+    event_key = (event.get("timer_id"), event.get("event"))
+    if st.session_state.get("timer_last_event") == event_key:
+        return
+    st.session_state.timer_last_event = event_key
+
+    if event_key[0] != get_timer_id():
+        return
+    REGISTRY.counter(
+        "oposim_timer_events_total", "Avisos recibidos del temporizador", event=str(event_key[1])
+    ).inc()
+    if event_key[1] == "warning":
+        st.toast("⚡ ¡Últimos minutos!", icon="⚡")
+    elif event_key[1] == "expired":
+        st.toast("⏰ ¡Tiempo agotado!", icon="⏰")
+
+
 def display_timer() -> None:
-    """Muestra el componente del temporizador."""
+    """
+    Muestra el componente del temporizador.
+
+    El tiempo restante se envía una vez y la cuenta atrás se hace en el
+    navegador, sin reruns por segundo.
+    """
     if not st.session_state.timer_running:
         return
-    
+
     remaining = get_remaining_time()
-    time_str = format_time(remaining)
-    
-    # Determinar clase de estilo según tiempo restante
-    total_seconds = remaining.total_seconds()
-    if total_seconds <= 0:
-        timer_class = "timer-danger"
-        status = "⏰ ¡TIEMPO AGOTADO!"
-    elif total_seconds <= 300:  # 5 minutos
-        timer_class = "timer-warning"
-        status = "⚡ ¡ÚLTIMOS MINUTOS!"
+    event = countdown_timer(
+        remaining_ms=int(remaining.total_seconds() * 1000),
+        paused=st.session_state.timer_paused,
+        warning_seconds=TIMER_WARNING_SECONDS,
+        timer_id=get_timer_id(),
+        key="exam_timer",
+        default=None,
+        height=230
+    )
+    handle_timer_event(event)
+
+
+# =============================================================================
+# FUNCIONES DE UI - VISTAS
+# =============================================================================
+def display_monte_carlo_panel(
+    total_topics: int,
+    studied_topics: int,
+    balls_drawn: int,
+    probability: float
+) -> None:
+    """Comprueba la probabilidad con una simulación masiva en segundo plano."""
+    with st.expander("🧪 Comprobar con una simulación masiva"):
+        col_runs, col_start = st.columns([3, 1])
+        with col_runs:
+            runs = st.select_slider(
+                "Sorteos a simular",
+                options=MONTE_CARLO_RUN_OPTIONS,
+                value=MONTE_CARLO_RUN_OPTIONS[1],
+                format_func=lambda value: f"{value:,}".replace(",", "."),
+                key="monte_carlo_runs"
+            )
+        with col_start:
+            st.markdown("<br>", unsafe_allow_html=True)
+            if st.button("▶️ Lanzar simulación", use_container_width=True, key="monte_carlo_start"):
+                # Con temas concretos se simula con ese conjunto; si no, con los k primeros
+                studied_set = st.session_state.studied_topics
+                studied = studied_set if len(studied_set) == studied_topics > 0 else studied_topics
+                start_job(
+                    "monte_carlo", "monte_carlo", monte_carlo_job,
+                    total_topics, studied, balls_drawn, runs
+                )
+        
+        job = get_job("monte_carlo")
+        if job is None:
+            return
+        if not job.finished:
+            display_job_progress("monte_carlo", "Simulación masiva")
+        elif job.status == JOB_DONE:
+            result = job.result
+            same_params = (result["total_topics"], result["studied_topics"], result["balls_drawn"]) == (
+                total_topics, studied_topics, balls_drawn
+            )
+            st.metric(
+                f"Éxito en {result['runs']:,} sorteos simulados".replace(",", "."),
+                f"{result['rate'] * 100:.2f}%",
+                delta=f"{(result['rate'] - probability) * 100:+.2f} pp frente al cálculo" if same_params else None,
+                delta_color="off",
+            )
+            if not same_params:
+                st.caption(
+                    f"Simulado con N = {result['total_topics']}, k = {result['studied_topics']}, "
+                    f"n = {result['balls_drawn']}; los parámetros han cambiado desde entonces."
+                )
+        elif job.status == JOB_CANCELLED:
+            st.info("Simulación cancelada")
+        else:
+            st.error(f"Error en la simulación: {job.error}")
+
+
+@traced("view")
+def render_simulator_tab(
+    topics_df: pd.DataFrame,
+    temario_hash: str,
+    balls_drawn: int,
+    studied_topics: int,
+    timer_minutes: int
+) -> None:
+    """Renderiza la pestaña del simulador: probabilidad, sorteo y temporizador."""
+    total_topics = len(topics_df)
+    
+    st.markdown("""
+    Calcula tus probabilidades de éxito y practica con simulaciones de sorteo de temas.
+    Configura los parámetros en la barra lateral y comienza a simular.
+    """)
+    
+    st.divider()
+    
+    # ==================================================================
+    # PANEL DE PROBABILIDAD
+    # ==================================================================
+    col1, col2 = st.columns([2, 1])
+    
+    with col1, span("probability_panel"):
+        try:
+            probability = lookup_probability(total_topics, studied_topics, balls_drawn)
+            display_probability_panel(probability)
+        except ValueError as e:
+            st.error(f"Error en el cálculo: {e}")
+            probability = 0
+    
+    with col2:
+        with st.container(border=True):
+            st.markdown("### 📐 Fórmula Utilizada")
+            st.latex(r"P(X \geq 1) = 1 - \frac{C(N-k, n)}{C(N, n)}")
+            st.markdown(f"""
+**Donde:**
+- **N** = {total_topics} _(temas totales)_
+- **k** = {studied_topics} _(temas estudiados)_
+- **n** = {balls_drawn} _(bolas del sorteo)_
+            """)
+    
+    display_monte_carlo_panel(total_topics, studied_topics, balls_drawn, probability)
+    
+    st.divider()
+    
+    # ==================================================================
+    # SIMULACIÓN DE EXAMEN
+    # ==================================================================
+    st.header("🎲 Simulación de Sorteo")
+    
+    # Botón de simulación
+    col_sim1, col_sim2, col_sim3 = st.columns([1, 1, 2])
+    
+    with col_sim1:
+        if st.button("🎯 Simular Sorteo", type="primary", use_container_width=True):
+            set_drawn_topics(draw_topic_positions(total_topics, balls_drawn), temario_hash)
+            stop_timer()  # Reiniciar timer al hacer nuevo sorteo
+    
+    with col_sim2:
+        if st.button("🗑️ Limpiar Resultados", use_container_width=True):
+            set_drawn_topics(None)
+            stop_timer()
+    
+    # Mostrar resultados del sorteo
+    drawn_df = get_drawn_topics(topics_df, temario_hash)
+    if drawn_df is not None:
+        st.markdown("### 📋 Temas Sorteados")
+        st.markdown("*Haz clic en un tema para seleccionarlo*")
+        
+        # Inicializar selected_topic_idx si no existe
+        if "selected_topic_idx" not in st.session_state:
+            st.session_state.selected_topic_idx = None
+        
+        # Obtener progreso del usuario si está logueado
+        user_progress = {}
+        if "logged_user" in st.session_state and st.session_state.logged_user:
+            if "user_progress" not in st.session_state:
+                set_user_progress(get_user_progress(st.session_state.logged_user))
+            user_progress = st.session_state.user_progress
+        
+        # Crear columnas para las tarjetas
+        cols = st.columns(min(3, len(drawn_df)))
+        
+        with span("topic_cards"):
+            for idx, (_, topic) in enumerate(drawn_df.iterrows()):
+                with cols[idx % len(cols)]:
+                    # Verificar si el tema está en la lista de estudiados
+                    is_studied = topic["Número"] in st.session_state.studied_topics
+                    is_selected = st.session_state.selected_topic_idx == idx
+                    
+                    # Obtener datos de progreso para este tema
+                    topic_progress = user_progress.get(topic["Número"], None)
+                    
+                    # Mostrar la tarjeta visual con indicador de estado
+                    display_topic_card(topic, is_studied, is_selected, topic_progress)
+                    
+                    # Botón para seleccionar el tema
+                    button_label = "✓ Seleccionado" if is_selected else "Elegir este tema"
+                    if st.button(
+                        button_label,
+                        key=f"select_topic_{idx}",
+                        use_container_width=True,
+                        disabled=is_selected
+                    ):
+                        st.session_state.selected_topic_idx = idx
+                        stop_timer()  # Reiniciar timer al cambiar tema
+                        st.rerun()
+        
+        st.divider()
+        
+        # Mostrar tema seleccionado y controles del temporizador
+        if st.session_state.selected_topic_idx is not None:
+            selected_topic = drawn_df.iloc[st.session_state.selected_topic_idx]
+            
+            st.markdown(f"""
+            ### 📝 Tema para Exponer
+            **Tema {selected_topic['Número']}:** {selected_topic['Nombre del Tema']}
+            """)
+            
+            # Controles del temporizador
+            st.subheader("⏱️ Temporizador de Examen")
+            
+            timer_col1, timer_col2, timer_col3, timer_col4 = st.columns(4)
+            
+            with timer_col1:
+                if not st.session_state.timer_running:
+                    if st.button("▶️ Iniciar", use_container_width=True):
+                        start_timer(timer_minutes)
+                        st.rerun()
+            
+            with timer_col2:
+                if st.session_state.timer_running and not st.session_state.timer_paused:
+                    if st.button("⏸️ Pausar", use_container_width=True):
+                        pause_timer()
+                        st.rerun()
+            
+            with timer_col3:
+                if st.session_state.timer_paused:
+                    if st.button("▶️ Reanudar", use_container_width=True):
+                        resume_timer()
+                        st.rerun()
+            
+            with timer_col4:
+                if st.session_state.timer_running:
+                    if st.button("⏹️ Detener", use_container_width=True):
+                        stop_timer()
+                        st.rerun()
+            
+            # Mostrar el temporizador (la cuenta atrás corre en el navegador)
+            display_timer()
+    
     else:
-        timer_class = ""
-        status = "TIEMPO RESTANTE"
+        st.info("👆 Haz clic en 'Simular Sorteo' para comenzar la simulación")
+
+
+# =============================================================================
+# EXPLORADOR
+# =============================================================================
+def axis_values(start: int, stop: int) -> np.ndarray:
+    """Valores de un eje del explorador, muestreados si el rango es muy amplio."""
+    step = max(1, -(-(stop - start + 1) // EXPLORER_MAX_AXIS_POINTS))
+    return np.arange(start, stop + 1, step)
+
+
+@persistent_cache(version=1)
+def get_probability_grid(
+    axes: str,
+    fixed: int,
+    x_range: tuple[int, int],
+    y_range: tuple[int, int]
+) -> pd.DataFrame:
+    """
+    Calcula la rejilla de probabilidades del explorador en una sola pasada.
     
-    st.markdown(f"""
-    <div class="timer-container">
-        <p class="timer-label">{status}</p>
-        <p class="timer-display {timer_class}">{time_str}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    Se cachea en disco por especificación de ejes: volver a un rango ya
+    visto no recalcula nada, tampoco tras reiniciar la aplicación.
+    
+    Args:
+        axes: "k_n" (x = k, y = n, N fijo) o "N_k" (x = N, y = k, n fijo)
+        fixed: Valor del parámetro fijo
+        x_range: Rango (mín, máx) del eje horizontal
+        y_range: Rango (mín, máx) del eje vertical
+        
+    Returns:
+        DataFrame largo con columnas x, y y P (sin las celdas inválidas)
+    """
+    x = axis_values(*x_range)
+    y = axis_values(*y_range)
+    if axes == "k_n":
+        grid = probability_grid(fixed, x[None, :], y[:, None])
+    else:
+        grid = probability_grid(x[None, :], y[:, None], fixed)
+    
+    xx, yy = np.meshgrid(x, y)
+    df = pd.DataFrame({"x": xx.ravel(), "y": yy.ravel(), "P": grid.ravel()})
+    return df.dropna().reset_index(drop=True)
+
+
+@traced("view")
+def render_explorer_tab(total_topics: int, balls_drawn: int, studied_topics: int) -> None:
+    """Renderiza el explorador de escenarios: mapa de calor de P sobre dos ejes."""
+    import altair as alt  # Solo se carga al abrir esta vista
+    
+    st.markdown("""
+    Compara escenarios de un vistazo: cada celda es la probabilidad de que salga
+    al menos un tema estudiado. El punto marcado es tu configuración actual.
+    """)
+    
+    axes_label = st.radio(
+        "Ejes",
+        options=list(EXPLORER_AXES),
+        horizontal=True,
+        key="explorer_axes"
+    )
+    axes = EXPLORER_AXES[axes_label]
+    
+    col1, col2 = st.columns(2)
+    if axes == "k_n":
+        fixed = total_topics
+        max_drawn = min(LUT_MAX_DRAWN, total_topics)
+        with col1:
+            x_range = st.slider(
+                "Temas estudiados (k)",
+                min_value=0,
+                max_value=total_topics,
+                value=(0, total_topics),
+                key=f"explorer_k_range_{total_topics}"
+            )
+        with col2:
+            y_range = st.slider(
+                "Bolas del sorteo (n)",
+                min_value=1,
+                max_value=max_drawn,
+                value=(1, max_drawn),
+                key=f"explorer_n_range_{total_topics}"
+            ) if max_drawn > 1 else (1, 1)
+        x_title, y_title = "Temas estudiados (k)", "Bolas (n)"
+        current = (studied_topics, balls_drawn)
+        st.caption(f"N = {total_topics} temas")
+    else:
+        fixed = balls_drawn
+        max_total = max(LUT_MAX_TOTAL, total_topics)
+        with col1:
+            x_range = st.slider(
+                "Temas del temario (N)",
+                min_value=balls_drawn,
+                max_value=max_total,
+                value=(balls_drawn, min(max_total, max(2 * total_topics, balls_drawn + 1))),
+                key=f"explorer_N_range_{balls_drawn}"
+            )
+        with col2:
+            y_range = st.slider(
+                "Temas estudiados (k)",
+                min_value=0,
+                max_value=max_total,
+                value=(0, total_topics),
+                key=f"explorer_k_range_{max_total}"
+            )
+        x_title, y_title = "Temas del temario (N)", "Temas estudiados (k)"
+        current = (total_topics, studied_topics)
+        st.caption(f"n = {balls_drawn} bolas")
+    
+    grid_df = get_probability_grid(axes, fixed, tuple(x_range), tuple(y_range))
+    if grid_df.empty:
+        st.info("No hay escenarios válidos en este rango.")
+        return
+    
+    heatmap = alt.Chart(grid_df).mark_rect().encode(
+        x=alt.X("x:O", title=x_title, axis=alt.Axis(labelOverlap=True)),
+        y=alt.Y("y:O", title=y_title, sort="descending", axis=alt.Axis(labelOverlap=True)),
+        color=alt.Color(
+            "P:Q",
+            title="P",
+            scale=alt.Scale(scheme="viridis", domain=[0, 1]),
+        ),
+        tooltip=[
+            alt.Tooltip("x:Q", title=x_title),
+            alt.Tooltip("y:Q", title=y_title),
+            alt.Tooltip("P:Q", title="Probabilidad", format=".2%"),
+        ],
+    )
+    
+    current_df = grid_df[(grid_df["x"] == current[0]) & (grid_df["y"] == current[1])]
+    marker = alt.Chart(current_df).mark_point(
+        shape="diamond", size=120, filled=True, color="#ffffff", stroke="#171717"
+    ).encode(x="x:O", y=alt.Y("y:O", sort="descending"))
+    
+    st.altair_chart(heatmap + marker, use_container_width=True)
+    st.caption(
+        f"{len(grid_df)} escenarios · "
+        f"{grid_df['x'].nunique()} × {grid_df['y'].nunique()} valores por eje"
+    )
+
+
+# =============================================================================
+# MÉTRICAS
+# =============================================================================
+def count_cache_request(cache: str, hit: bool) -> None:
+    """Cuenta un acierto o fallo de una caché (para la tasa de aciertos)."""
+    REGISTRY.counter(
+        "oposim_cache_requests_total",
+        "Consultas a las cachés de la aplicación",
+        cache=cache,
+        result="hit" if hit else "miss",
+    ).inc()
+
+
+@st.cache_resource
+def get_metrics_exporter() -> dict:
+    """
+    Configura la exportación de métricas del proceso (una sola vez).
+    
+    - OPOSIM_METRICS_PORT: sirve /metrics en ese puerto (hilo aparte)
+    - OPOSIM_METRICS_FILE: escribe las métricas en ese archivo
+    """
+    port = os.environ.get("OPOSIM_METRICS_PORT")
+    if port:
+        start_metrics_server(int(port), host=os.environ.get("OPOSIM_METRICS_HOST", "127.0.0.1"))
+    return {"path": os.environ.get("OPOSIM_METRICS_FILE"), "last_write": 0.0}
+
+
+def export_metrics() -> None:
+    """Actualiza el archivo de métricas si toca (como mucho cada pocos segundos)."""
+    exporter = get_metrics_exporter()
+    now = time.monotonic()
+    if exporter["path"] and now - exporter["last_write"] >= METRICS_FILE_INTERVAL_SECONDS:
+        exporter["last_write"] = now
+        try:
+            write_metrics_file(exporter["path"])
+        except OSError:
+            pass  # Las métricas nunca deben romper la aplicación
+
+
+# =============================================================================
+# FUNCIONES DE UI - DEPURACIÓN
+# =============================================================================
+def get_profiler() -> Profiler:
+    """
+    Obtiene el registro de tiempos de la sesión.
+    
+    Si la variable de entorno OPOSIM_PROFILE_LOG indica un archivo, cada
+    ejecución se añade también ahí en formato JSON Lines.
+    """
+    if "profiler" not in st.session_state:
+        REGISTRY.counter("oposim_sessions_total", "Sesiones iniciadas").inc()
+        st.session_state.profiler = Profiler(
+            capacity=PROFILER_RERUNS,
+            log_path=os.environ.get("OPOSIM_PROFILE_LOG"),
+        )
+    return st.session_state.profiler
+
+
+def display_debug_panel(profiler: Profiler) -> None:
+    """Muestra la cascada de tramos de las últimas ejecuciones."""
+    import altair as alt  # Solo se carga con ?debug=1
+    
+    reruns = list(profiler.reruns)
+    if not reruns:
+        return
+    
+    with st.expander("🐞 Tiempos de ejecución", expanded=True):
+        summary = pd.DataFrame([
+            {
+                "Ejecución": trace.rerun_id,
+                "Hora": datetime.fromtimestamp(trace.started_at).strftime("%H:%M:%S"),
+                "Total (ms)": round(trace.duration * 1000, 1),
+                "Tramos": len(trace.spans),
+            }
+            for trace in reversed(reruns)
+        ])
+        st.dataframe(summary, hide_index=True, use_container_width=True)
+        
+        count = st.slider(
+            "Ejecuciones en la cascada",
+            min_value=1,
+            max_value=len(reruns),
+            value=min(5, len(reruns)),
+            key="debug_reruns"
+        ) if len(reruns) > 1 else 1
+        
+        rows = []
+        for trace in reruns[-count:]:
+            for order, item in enumerate(trace.spans):
+                rows.append({
+                    "Ejecución": f"#{trace.rerun_id}",
+                    "Orden": order,
+                    # Sangría según el anidamiento para leer la cascada
+                    "Tramo": "\u00a0\u00a0" * item.depth + item.name,
+                    "Inicio (ms)": item.start * 1000,
+                    "Fin (ms)": (item.start + item.duration) * 1000,
+                    "Duración (ms)": item.duration * 1000,
+                })
+        
+        if rows:
+            waterfall = alt.Chart(pd.DataFrame(rows)).mark_bar().encode(
+                x=alt.X("Inicio (ms):Q", title="ms desde el inicio de la ejecución"),
+                x2="Fin (ms):Q",
+                y=alt.Y("Tramo:N", sort=alt.SortField("Orden"), title=None),
+                color=alt.Color("Tramo:N", legend=None),
+                tooltip=["Ejecución", "Tramo", alt.Tooltip("Duración (ms):Q", format=".2f")],
+            ).properties(height=alt.Step(16)).facet(
+                row=alt.Row("Ejecución:N", title=None, sort="descending")
+            ).resolve_scale(y="independent")
+            st.altair_chart(waterfall)
+        
+        st.download_button(
+            "⬇️ Exportar JSONL",
+            data=profiler.to_jsonl(),
+            file_name="oposim_tiempos.jsonl",
+            mime="application/x-ndjson",
+        )
+
+
+def display_memory_panel() -> None:
+    """Muestra la memoria que ocupa cada clave del estado de la sesión."""
+    # El temario está en la caché compartida: no se carga a la sesión
+    shared = [df for df in (get_session_topics(), get_default_topics()) if df is not None]
+    report = session_memory_report(st.session_state, shared)
+    total = sum(usage.size_bytes for usage in report)
+    
+    with st.expander(f"💾 Memoria de la sesión ({format_bytes(total)})"):
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Clave": usage.key,
+                    "Tipo": usage.type_name,
+                    "Tamaño": format_bytes(usage.size_bytes),
+                    "Bytes": usage.size_bytes,
+                }
+                for usage in report
+            ]),
+            hide_index=True,
+            use_container_width=True,
+        )
+        
+        result_cache = get_result_cache()
+        if result_cache is not None:
+            stats = result_cache.stats()
+            st.caption(
+                f"Caché de resultados en disco: {stats.entries} entradas, "
+                f"{format_bytes(stats.size_bytes)} de {format_bytes(stats.max_bytes)} ({stats.path})"
+            )
 
 
 # =============================================================================
 # FUNCIÓN PRINCIPAL
 # =============================================================================
 def main() -> None:
-    """Función principal de la aplicación OpoSim."""
+    """Función principal: ejecuta la aplicación midiendo sus tramos."""
+    profiler = get_profiler()
+    REGISTRY.counter("oposim_reruns_total", "Ejecuciones del script").inc()
+    try:
+        with profiler.rerun() as trace:
+            with span("compact_session"):
+                compact_session_state()
+            run_app()
+    finally:
+        # También cuando la ejecución termina con st.rerun()/st.stop()
+        REGISTRY.histogram(
+            "oposim_rerun_seconds", "Duración de cada ejecución del script"
+        ).observe(trace.duration)
+        export_metrics()
+    
+    # Paneles ocultos de tiempos y memoria (?debug=1)
+    if st.query_params.get("debug") == "1":
+        display_debug_panel(profiler)
+        display_memory_panel()
+
+
+def run_app() -> None:
+    """Construye la página completa de la aplicación OpoSim."""
     
     # Configuración de la página
     st.set_page_config(
@@ -1844,20 +2970,30 @@ def main() -> None:
     # Inicializar estados
     init_timer_state()
     
-    if "drawn_topics" not in st.session_state:
-        st.session_state.drawn_topics = None
-    if "studied_list" not in st.session_state:
-        st.session_state.studied_list = []
+    if "drawn_positions" not in st.session_state:
+        set_drawn_topics(None)
+    if "studied_topics" not in st.session_state:
+        st.session_state.studied_topics = TopicBitset()
     
     # ==========================================================================
     # SIDEBAR - Configuración y Datos
     # ==========================================================================
-    with st.sidebar:
+    with st.sidebar, span("sidebar"):
         st.header("⚙️ Configuración")
         
         # Cargar Temario
         st.subheader("📁 Cargar Temario")
         
+        # Si el temario de la sesión se expulsó de la caché compartida,
+        # volver a cargarlo (desde la cuenta o desde el texto introducido)
+        if st.session_state.get("text_topics_hash") and get_session_topics() is None:
+            st.session_state.text_topics_hash = None
+            st.session_state.pop("user_temario_loaded", None)
+            if st.session_state.get("text_topics_input", "").strip():
+                parsed = parse_text_topics(st.session_state.text_topics_input)
+                if parsed is not None:
+                    set_session_topics(parsed)
+        
         # Verificar si hay usuario logueado para cargar temario guardado
         user_has_saved_temario = False
         if "logged_user" in st.session_state and st.session_state.logged_user:
@@ -1867,7 +3003,7 @@ def main() -> None:
                 if saved_temario:
                     parsed = parse_text_topics(saved_temario)
                     if parsed is not None and len(parsed) > 0:
-                        st.session_state.text_topics_loaded = parsed
+                        set_session_topics(parsed)
                         st.session_state.user_temario_loaded = True
                         user_has_saved_temario = True
                 else:
@@ -1883,6 +3019,8 @@ def main() -> None:
         )
         
         topics_df = None
+        temario_hash = None
+        temario_cache = get_temario_cache()
         
         if input_method == "📊 Excel":
             uploaded_file = st.file_uploader(
@@ -1891,34 +3029,65 @@ def main() -> None:
                 help="El archivo debe contener columnas 'Número' y 'Nombre del Tema'"
             )
             
-            if uploaded_file is not None:
-                topics_df = parse_excel_topics(uploaded_file)
-                if topics_df is None:
-                    st.warning("No se pudo parsear el archivo. Usando temas por defecto.")
-                else:
+            if uploaded_file is None:
+                st.session_state.excel_file_id = None
+                clear_job("import_excel")
+            else:
+                # El archivo se lee una sola vez, en segundo plano; la sesión
+                # guarda el hash del temario en la caché compartida
+                temario_hash = st.session_state.get("excel_topics_hash")
+                topics_df = temario_cache.get(temario_hash)
+                if st.session_state.get("excel_file_id") != uploaded_file.file_id or (
+                    temario_hash is not None and topics_df is None  # Expulsado de la caché
+                ):
+                    st.session_state.excel_file_id = uploaded_file.file_id
+                    st.session_state.excel_topics_hash = temario_hash = topics_df = None
+                    st.session_state.excel_import_error = None
+                    start_job("import_excel", "import_excel", import_excel_job, uploaded_file.getvalue())
+                
+                job = get_job("import_excel")
+                if job is not None and not job.finished:
+                    display_job_progress("import_excel", "Importando temario")
+                elif job is not None:
+                    clear_job("import_excel")
+                    if job.status == JOB_DONE and job.result is not None:
+                        # Compartir el DataFrame con otras sesiones con el mismo temario
+                        temario_hash = temario_cache.put(job.result)
+                        topics_df = temario_cache.get(temario_hash)
+                        st.session_state.excel_topics_hash = temario_hash
+                        # Guardar en Supabase si hay usuario logueado
+                        if "logged_user" in st.session_state and st.session_state.logged_user:
+                            # Convertir DataFrame a texto para guardar
+                            temario_text = topics_to_text(topics_df)
+                            if save_user_temario(st.session_state.logged_user, temario_text):
+                                st.session_state.user_temario_loaded = True
+                                st.toast("📁 Temario guardado en tu cuenta", icon="✅")
+                    elif job.status == JOB_CANCELLED:
+                        st.session_state.excel_import_error = "Importación cancelada"
+                    else:
+                        st.session_state.excel_import_error = job.error
+                
+                if topics_df is not None:
                     st.success(f"✅ {len(topics_df)} temas cargados correctamente")
-                    # Guardar en Supabase si hay usuario logueado
-                    if "logged_user" in st.session_state and st.session_state.logged_user:
-                        # Convertir DataFrame a texto para guardar
-                        temario_text = "\n".join([
-                            f"Tema {row['Número']}: {row['Nombre del Tema']}" 
-                            for _, row in topics_df.iterrows()
-                        ])
-                        if save_user_temario(st.session_state.logged_user, temario_text):
-                            st.session_state.user_temario_loaded = True
-                            st.toast("📁 Temario guardado en tu cuenta", icon="✅")
+                elif job is None or job.finished:
+                    if st.session_state.get("excel_import_error"):
+                        st.error(st.session_state.excel_import_error)
+                    st.warning("No se pudo parsear el archivo. Usando temas por defecto.")
         
         else:  # Texto
             # Inicializar el estado del texto si no existe
             if "text_topics_input" not in st.session_state:
                 st.session_state.text_topics_input = ""
-            if "text_topics_loaded" not in st.session_state:
-                st.session_state.text_topics_loaded = None
+            if "text_topics_hash" not in st.session_state:
+                st.session_state.text_topics_hash = None
             
             # Mostrar mensaje si hay temario guardado
-            if user_has_saved_temario and st.session_state.text_topics_loaded is not None:
-                st.success(f"📁 Temario guardado: {len(st.session_state.text_topics_loaded)} temas")
+            session_topics = get_session_topics()
+            if user_has_saved_temario and session_topics is not None:
+                st.success(f"📁 Temario guardado: {len(session_topics)} temas")
             
+            # Mientras el cuadro se muestra, su texto no se libera
+            touch_session_value("text_topics_input")
             text_input = st.text_area(
                 "Pega tus temas (uno por línea)",
                 height=200,
@@ -1931,12 +3100,13 @@ def main() -> None:
                 if text_input and text_input.strip():
                     parsed_topics = parse_text_topics(text_input)
                     if parsed_topics is not None:
-                        st.session_state.text_topics_loaded = parsed_topics
+                        set_session_topics(parsed_topics)
                         st.success(f"✅ {len(parsed_topics)} temas cargados correctamente")
                         # Guardar en Supabase si hay usuario logueado
                         if "logged_user" in st.session_state and st.session_state.logged_user:
                             if save_user_temario(st.session_state.logged_user, text_input):
                                 st.session_state.user_temario_loaded = True
+                                st.session_state.text_topics_saved_digest = text_digest(text_input)
                                 st.toast("📁 Temario guardado en tu cuenta", icon="✅")
                     else:
                         st.warning("No se encontraron temas válidos en el texto.")
@@ -1944,14 +3114,18 @@ def main() -> None:
                     st.warning("Por favor, introduce al menos un tema.")
             
             # Usar los temas cargados si existen
-            if st.session_state.text_topics_loaded is not None:
-                topics_df = st.session_state.text_topics_loaded
+            topics_df = get_session_topics()
+            temario_hash = st.session_state.text_topics_hash
         
         # Si no hay temas cargados, usar por defecto
         if topics_df is None:
-            topics_df = generate_default_topics()
+            temario_hash = temario_cache.put(get_default_topics())
+            topics_df = temario_cache.get(temario_hash)
             st.info(f"ℹ️ Usando {len(topics_df)} temas por defecto")
         
+        # Índices de búsqueda del temario (compartidos entre sesiones)
+        temario_index = get_temario_index(topics_df, temario_hash)
+        
         total_topics = len(topics_df)
         
         st.divider()
@@ -1967,14 +3141,30 @@ def main() -> None:
             help="Cantidad de temas que se extraen en el sorteo"
         )
         
-        studied_topics = st.slider(
-            "Temas estudiados (k)",
-            min_value=0,
-            max_value=total_topics,
-            value=min(DEFAULT_STUDIED_TOPICS, total_topics),
-            help="Número de temas que has estudiado. Desliza para ajustar rápidamente."
+        studied_mode = st.radio(
+            "Temas estudiados",
+            options=list(STUDIED_MODES),
+            horizontal=True,
+            help="Indica cuántos temas has estudiado o exactamente cuáles",
+            key="studied_mode"
         )
         
+        if STUDIED_MODES[studied_mode] == "count":
+            studied_topics = st.slider(
+                "Temas estudiados (k)",
+                min_value=0,
+                max_value=total_topics,
+                value=min(DEFAULT_STUDIED_TOPICS, total_topics),
+                help="Número de temas que has estudiado. Desliza para ajustar rápidamente."
+            )
+            st.session_state.studied_topics = TopicBitset()
+        else:
+            # k sale del conjunto exacto de temas estudiados
+            studied_set = select_studied_topics(STUDIED_MODES[studied_mode], total_topics)
+            st.session_state.studied_topics = studied_set
+            studied_topics = len(studied_set)
+            st.caption(f"Temas estudiados (k): **{studied_topics}**")
+        
         st.divider()
         
         # Configuración del temporizador
@@ -2009,174 +3199,23 @@ def main() -> None:
     </div>
     """, unsafe_allow_html=True)
     
-    # Pestañas principales
-    tab_simulator, tab_progress = st.tabs(["🎲 Simulador", "📊 Mi Progreso"])
-    
-    # ==========================================================================
-    # TAB: SIMULADOR
-    # ==========================================================================
-    with tab_simulator:
-        st.markdown("""
-        Calcula tus probabilidades de éxito y practica con simulaciones de sorteo de temas.
-        Configura los parámetros en la barra lateral y comienza a simular.
-        """)
-        
-        st.divider()
-        
-        # ==================================================================
-        # PANEL DE PROBABILIDAD
-        # ==================================================================
-        col1, col2 = st.columns([2, 1])
-        
-        with col1:
-            try:
-                probability = calculate_probability(total_topics, studied_topics, balls_drawn)
-                display_probability_panel(probability)
-            except ValueError as e:
-                st.error(f"Error en el cálculo: {e}")
-                probability = 0
-        
-        with col2:
-            with st.container(border=True):
-                st.markdown("### 📐 Fórmula Utilizada")
-                st.latex(r"P(X \geq 1) = 1 - \frac{C(N-k, n)}{C(N, n)}")
-                st.markdown(f"""
-**Donde:**
-- **N** = {total_topics} _(temas totales)_
-- **k** = {studied_topics} _(temas estudiados)_
-- **n** = {balls_drawn} _(bolas del sorteo)_
-                """)
-        
-        st.divider()
-        
-        # ==================================================================
-        # SIMULACIÓN DE EXAMEN
-        # ==================================================================
-        st.header("🎲 Simulación de Sorteo")
-        
-        # Botón de simulación
-        col_sim1, col_sim2, col_sim3 = st.columns([1, 1, 2])
-        
-        with col_sim1:
-            if st.button("🎯 Simular Sorteo", type="primary", use_container_width=True):
-                st.session_state.drawn_topics = simulate_draw(topics_df, balls_drawn)
-                st.session_state.selected_topic = None
-                st.session_state.selected_topic_idx = None
-                stop_timer()  # Reiniciar timer al hacer nuevo sorteo
-        
-        with col_sim2:
-            if st.button("🗑️ Limpiar Resultados", use_container_width=True):
-                st.session_state.drawn_topics = None
-                st.session_state.selected_topic = None
-                st.session_state.selected_topic_idx = None
-                stop_timer()
-        
-        # Mostrar resultados del sorteo
-        if st.session_state.drawn_topics is not None:
-            st.markdown("### 📋 Temas Sorteados")
-            st.markdown("*Haz clic en un tema para seleccionarlo*")
-            
-            drawn_df = st.session_state.drawn_topics
-            
-            # Inicializar selected_topic_idx si no existe
-            if "selected_topic_idx" not in st.session_state:
-                st.session_state.selected_topic_idx = None
-            
-            # Obtener progreso del usuario si está logueado
-            user_progress = {}
-            if "logged_user" in st.session_state and st.session_state.logged_user:
-                if "user_progress" not in st.session_state:
-                    st.session_state.user_progress = get_user_progress(st.session_state.logged_user)
-                user_progress = st.session_state.user_progress
-            
-            # Crear columnas para las tarjetas
-            cols = st.columns(min(3, len(drawn_df)))
-            
-            for idx, (_, topic) in enumerate(drawn_df.iterrows()):
-                with cols[idx % len(cols)]:
-                    # Verificar si el tema está en la lista de estudiados
-                    is_studied = topic["Número"] in st.session_state.studied_list
-                    is_selected = st.session_state.selected_topic_idx == idx
-                    
-                    # Obtener datos de progreso para este tema
-                    topic_progress = user_progress.get(topic["Número"], None)
-                    
-                    # Mostrar la tarjeta visual con indicador de estado
-                    display_topic_card(topic, is_studied, is_selected, topic_progress)
-                    
-                    # Botón para seleccionar el tema
-                    button_label = "✓ Seleccionado" if is_selected else "Elegir este tema"
-                    if st.button(
-                        button_label,
-                        key=f"select_topic_{idx}",
-                        use_container_width=True,
-                        disabled=is_selected
-                    ):
-                        st.session_state.selected_topic_idx = idx
-                        st.session_state.selected_topic = topic
-                        stop_timer()  # Reiniciar timer al cambiar tema
-                        st.rerun()
-            
-            st.divider()
-            
-            # Mostrar tema seleccionado y controles del temporizador
-            if st.session_state.selected_topic_idx is not None:
-                selected_topic = drawn_df.iloc[st.session_state.selected_topic_idx]
-                st.session_state.selected_topic = selected_topic
-                
-                st.markdown(f"""
-                ### 📝 Tema para Exponer
-                **Tema {selected_topic['Número']}:** {selected_topic['Nombre del Tema']}
-                """)
-                
-                # Controles del temporizador
-                st.subheader("⏱️ Temporizador de Examen")
-                
-                timer_col1, timer_col2, timer_col3, timer_col4 = st.columns(4)
-                
-                with timer_col1:
-                    if not st.session_state.timer_running:
-                        if st.button("▶️ Iniciar", use_container_width=True):
-                            start_timer(timer_minutes)
-                            st.rerun()
-                
-                with timer_col2:
-                    if st.session_state.timer_running and not st.session_state.timer_paused:
-                        if st.button("⏸️ Pausar", use_container_width=True):
-                            pause_timer()
-                            st.rerun()
-                
-                with timer_col3:
-                    if st.session_state.timer_paused:
-                        if st.button("▶️ Reanudar", use_container_width=True):
-                            resume_timer()
-                            st.rerun()
-                
-                with timer_col4:
-                    if st.session_state.timer_running:
-                        if st.button("⏹️ Detener", use_container_width=True):
-                            stop_timer()
-                            st.rerun()
-                
-                # Mostrar el temporizador con auto-refresh usando fragment
-                @st.fragment(run_every=1)
-                def timer_fragment():
-                    """Fragment que se actualiza cada segundo para el temporizador."""
-                    display_timer()
-                
-                if st.session_state.timer_running and not st.session_state.timer_paused:
-                    timer_fragment()
-                else:
-                    display_timer()
-        
-        else:
-            st.info("👆 Haz clic en 'Simular Sorteo' para comenzar la simulación")
+    # Navegación principal: solo se ejecuta la vista activa
+    with st.container(key="main_nav"):
+        active_view = st.radio(
+            "Vista",
+            options=list(MAIN_VIEWS),
+            horizontal=True,
+            label_visibility="collapsed",
+            key="active_view"
+        )
     
-    # ==========================================================================
-    # TAB: MI PROGRESO
-    # ==========================================================================
-    with tab_progress:
-        render_progress_tab(topics_df)
+    view = MAIN_VIEWS[active_view]
+    if view == "simulator":
+        render_simulator_tab(topics_df, temario_hash, balls_drawn, studied_topics, timer_minutes)
+    elif view == "explorer":
+        render_explorer_tab(len(topics_df), balls_drawn, studied_topics)
+    else:
+        render_progress_tab(topics_df, temario_index, balls_drawn)
     
     # ==========================================================================
     # FOOTER
@@ -0,0 +1,65 @@
+"""
+Núcleo de OpoSim sin dependencias de Streamlit.
+
+Reúne el motor de probabilidades y sorteos, la lectura y conversión de
+temarios y el modelo de progreso de estudio. Lo usan tanto la aplicación
+web (`src/app.py`) como la línea de comandos (`oposim`).
+"""
+
+from oposim.engine import (
+    calculate_probability,
+    draw_topic_positions,
+    minimum_studied_topics,
+    probability_curve,
+    simulate_draw,
+)
+from oposim.progress import (
+    ProgressStats,
+    ProgressStore,
+    TopicBitset,
+    TopicStatus,
+    calculate_stats,
+    classify_progress,
+    get_topic_status,
+)
+from oposim.topics import (
+    DEFAULT_TOTAL_TOPICS,
+    TemarioCache,
+    TemarioIndex,
+    Topic,
+    generate_default_topics,
+    hash_topics,
+    parse_excel_topics,
+    parse_text_topics,
+    read_topics_file,
+    topics_to_text,
+    write_topics,
+)
+
+__version__ = "1.0.0"
+
+__all__ = [
+    "DEFAULT_TOTAL_TOPICS",
+    "ProgressStats",
+    "ProgressStore",
+    "TemarioCache",
+    "TemarioIndex",
+    "Topic",
+    "TopicBitset",
+    "TopicStatus",
+    "calculate_probability",
+    "calculate_stats",
+    "classify_progress",
+    "draw_topic_positions",
+    "generate_default_topics",
+    "get_topic_status",
+    "hash_topics",
+    "minimum_studied_topics",
+    "parse_excel_topics",
+    "parse_text_topics",
+    "probability_curve",
+    "read_topics_file",
+    "simulate_draw",
+    "topics_to_text",
+    "write_topics",
+]
@@ -0,0 +1,7 @@
+"""Permite ejecutar la CLI con `python -m oposim`."""
+
+import sys
+
+from oposim.cli import main
+
+sys.exit(main())
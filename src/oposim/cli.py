@@ -0,0 +1,231 @@
+"""
+Línea de comandos de OpoSim.
+
+Subcomandos:
+    probability  Tabla de probabilidades P(al menos un tema estudiado)
+    simulate     Sorteos en bloque, una fila CSV por sorteo
+    convert      Conversión de temarios entre texto, CSV y Excel
+    serve        Servicio HTTP/JSON (ver oposim.service)
+    build-lut    Genera la tabla precalculada de probabilidades (ver oposim.lut)
+
+Los resultados se escriben como CSV a medida que se calculan, en stdout o
+en el archivo indicado con --output, de modo que pueden encadenarse con
+otras herramientas sin cargar todo en memoria.
+"""
+
+import argparse
+import csv
+import random
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import IO
+
+from oposim import __version__
+from oposim.engine import calculate_probability, draw_topic_positions
+from oposim.lut import DEFAULT_LUT_PATH, LUT_MAX_DRAWN, LUT_MAX_TOTAL, build_probability_table
+from oposim.progress import TopicBitset
+from oposim.topics import read_topics_file, write_topics
+
+
+# =============================================================================
+# UTILIDADES
+# =============================================================================
+@contextmanager
+def open_output(path: str | None) -> Iterator[IO[str]]:
+    """Abre el destino de salida: un archivo o stdout si es None o '-'."""
+    if path is None or path == "-":
+        yield sys.stdout
+        return
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        yield handle
+
+
+# =============================================================================
+# SUBCOMANDOS
+# =============================================================================
+def run_probability(args: argparse.Namespace) -> int:
+    """Escribe la tabla total,drawn,studied,probability."""
+    studied_values = args.studied
+
+    with open_output(args.output) as out:
+        writer = csv.writer(out)
+        writer.writerow(["total", "drawn", "studied", "probability"])
+        for total in args.total:
+            for drawn in args.drawn:
+                ks = studied_values if studied_values else range(total + 1)
+                for studied in ks:
+                    probability = calculate_probability(total, studied, drawn)
+                    writer.writerow([total, drawn, studied, f"{probability:.10g}"])
+    return 0
+
+
+def run_simulate(args: argparse.Namespace) -> int:
+    """Escribe una fila run,topics,studied_hits por sorteo y un resumen en stderr."""
+    if args.temario:
+        topics_df = read_topics_file(args.temario)
+        if topics_df is None:
+            raise ValueError(f"No se encontraron temas en {args.temario}")
+        total = len(topics_df)
+        numbers = [int(n) for n in topics_df["Número"]]
+    else:
+        total = args.total
+        numbers = list(range(1, total + 1))
+
+    if args.drawn <= 0 or args.drawn > total:
+        raise ValueError("Las bolas del sorteo deben estar entre 1 y el total de temas")
+    if args.runs <= 0:
+        raise ValueError("El número de sorteos debe ser mayor que 0")
+
+    # Los rangos usan la numeración del temario, que puede no empezar en 1
+    max_topic = max(numbers, default=0)
+    studied = TopicBitset.from_ranges(args.studied, max_topic) if args.studied else TopicBitset()
+    rng = random.Random(args.seed)
+    successes = 0
+
+    with open_output(args.output) as out:
+        writer = csv.writer(out)
+        writer.writerow(["run", "topics", "studied_hits"])
+        for run in range(1, args.runs + 1):
+            drawn = [numbers[pos] for pos in draw_topic_positions(total, args.drawn, rng)]
+            hits = sum(1 for topic_num in drawn if topic_num in studied)
+            successes += hits > 0
+            writer.writerow([run, ";".join(map(str, drawn)), hits])
+
+    # Una fila del temario por tema, con la misma numeración que los sorteos
+    studied_count = sum(1 for topic_num in numbers if topic_num in studied)
+    expected = calculate_probability(total, studied_count, args.drawn)
+    print(
+        f"Sorteos: {args.runs} | Temas: {total} | Estudiados: {studied_count} | "
+        f"P empírica: {successes / args.runs:.4f} | P exacta: {expected:.4f}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def run_convert(args: argparse.Namespace) -> int:
+    """Convierte un temario al formato indicado por la extensión de salida."""
+    topics_df = read_topics_file(args.input)
+    if topics_df is None:
+        raise ValueError(f"No se encontraron temas en {args.input}")
+
+    if args.output == "-":
+        write_topics(topics_df, sys.stdout)
+    else:
+        write_topics(topics_df, args.output)
+    return 0
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    """Sirve oposim.service con uvicorn (uno o varios procesos)."""
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise ValueError(
+            "El servicio necesita uvicorn: pip install 'oposim[service]'"
+        ) from e
+
+    if args.workers < 1:
+        raise ValueError("El número de workers debe ser mayor que 0")
+    # Con varios workers uvicorn necesita la ruta de importación de la app
+    uvicorn.run(
+        "oposim.service:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+    )
+    return 0
+
+
+def run_build_lut(args: argparse.Namespace) -> int:
+    """Genera el archivo de la tabla de probabilidades."""
+    path = build_probability_table(args.output, args.max_total, args.max_drawn)
+    size_mb = path.stat().st_size / (1024 * 1024)
+    print(f"Tabla generada en {path} ({size_mb:.1f} MB)", file=sys.stderr)
+    return 0
+
+
+# =============================================================================
+# PUNTO DE ENTRADA
+# =============================================================================
+def build_parser() -> argparse.ArgumentParser:
+    """Construye el parser de argumentos de la CLI."""
+    parser = argparse.ArgumentParser(
+        prog="oposim",
+        description="Simulador de sorteos de temas para oposiciones",
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    probability = subparsers.add_parser(
+        "probability", help="Tabla de probabilidades de sacar al menos un tema estudiado"
+    )
+    probability.add_argument(
+        "--total", type=int, nargs="+", required=True, help="Total de temas (N)"
+    )
+    probability.add_argument(
+        "--drawn", type=int, nargs="+", required=True, help="Bolas del sorteo (n)"
+    )
+    probability.add_argument(
+        "--studied", type=int, nargs="+",
+        help="Temas estudiados (k); por defecto, de 0 a N",
+    )
+    probability.add_argument("--output", "-o", help="Archivo CSV de salida (por defecto, stdout)")
+    probability.set_defaults(func=run_probability)
+
+    simulate = subparsers.add_parser("simulate", help="Simula sorteos en bloque")
+    source = simulate.add_mutually_exclusive_group(required=True)
+    source.add_argument("--total", type=int, help="Total de temas (temario por defecto)")
+    source.add_argument("--temario", help="Archivo de temario (.txt, .csv o .xlsx)")
+    simulate.add_argument("--drawn", type=int, required=True, help="Bolas del sorteo (n)")
+    simulate.add_argument("--runs", type=int, default=1000, help="Número de sorteos")
+    simulate.add_argument(
+        "--studied", help="Temas estudiados como rangos, p. ej. '1-20, 35, 40-45'"
+    )
+    simulate.add_argument("--seed", type=int, help="Semilla para reproducir los sorteos")
+    simulate.add_argument("--output", "-o", help="Archivo CSV de salida (por defecto, stdout)")
+    simulate.set_defaults(func=run_simulate)
+
+    convert = subparsers.add_parser("convert", help="Convierte un temario de formato")
+    convert.add_argument("input", help="Temario de entrada (.txt, .csv o .xlsx)")
+    convert.add_argument("output", help="Temario de salida (.txt, .csv, .xlsx o '-' para stdout)")
+    convert.set_defaults(func=run_convert)
+
+    serve = subparsers.add_parser("serve", help="Arranca el servicio HTTP/JSON")
+    serve.add_argument("--host", default="127.0.0.1", help="Dirección de escucha")
+    serve.add_argument("--port", type=int, default=8000, help="Puerto de escucha")
+    serve.add_argument("--workers", type=int, default=1, help="Procesos del servidor")
+    serve.add_argument("--log-level", default="info", help="Nivel de log de uvicorn")
+    serve.set_defaults(func=run_serve)
+
+    build_lut = subparsers.add_parser(
+        "build-lut", help="Genera la tabla precalculada de probabilidades"
+    )
+    build_lut.add_argument(
+        "--output", "-o", default=DEFAULT_LUT_PATH, help="Archivo de la tabla"
+    )
+    build_lut.add_argument(
+        "--max-total", type=int, default=LUT_MAX_TOTAL, help="N máximo de la tabla"
+    )
+    build_lut.add_argument(
+        "--max-drawn", type=int, default=LUT_MAX_DRAWN, help="n máximo de la tabla"
+    )
+    build_lut.set_defaults(func=run_build_lut)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Ejecuta la CLI y devuelve el código de salida."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except ValueError as e:
+        print(f"oposim: error: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # La salida se cortó (p. ej. `oposim ... | head`)
+        sys.stderr.close()
+        return 0
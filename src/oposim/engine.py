@@ -0,0 +1,289 @@
+"""
+Motor de cálculo de OpoSim: probabilidades y simulación de sorteos.
+
+No depende de Streamlit, de modo que puede usarse desde la CLI, desde
+procesos por lotes o desde la aplicación web.
+"""
+
+import random
+from collections.abc import Callable, Container
+from math import comb
+
+import numpy as np
+import pandas as pd
+
+
+# =============================================================================
+# FUNCIONES DE CÁLCULO MATEMÁTICO
+# =============================================================================
+def calculate_probability(
+    total_topics: int,
+    studied_topics: int,
+    balls_drawn: int
+) -> float:
+    """
+    Calcula la probabilidad de que salga AL MENOS un tema estudiado en el sorteo.
+    
+    Utiliza la distribución hipergeométrica:
+    
+    P(X >= 1) = 1 - P(X = 0)
+    
+    Donde P(X = 0) representa la probabilidad de NO sacar ningún tema estudiado:
+    P(X = 0) = C(N-k, n) / C(N, n)
+    
+    Siendo:
+        N = total_topics (número total de temas en el temario)
+        k = studied_topics (temas que el candidato ha estudiado)
+        n = balls_drawn (bolas/temas extraídos en el sorteo)
+        C(a, b) = combinaciones de 'a' elementos tomados de 'b' en 'b'
+    
+    Args:
+        total_topics: N - Número total de temas en el temario
+        studied_topics: k - Número de temas estudiados por el candidato
+        balls_drawn: n - Número de bolas/temas que se extraen en el sorteo
+        
+    Returns:
+        Probabilidad como float entre 0 y 1
+        
+    Raises:
+        ValueError: Si los parámetros son inválidos
+    """
+    # Validación de parámetros
+    if total_topics <= 0:
+        raise ValueError("El número total de temas debe ser mayor que 0")
+    if studied_topics < 0:
+        raise ValueError("El número de temas estudiados no puede ser negativo")
+    if balls_drawn <= 0:
+        raise ValueError("El número de bolas del sorteo debe ser mayor que 0")
+    if studied_topics > total_topics:
+        raise ValueError("Los temas estudiados no pueden superar el total de temas")
+    if balls_drawn > total_topics:
+        raise ValueError("Las bolas del sorteo no pueden superar el total de temas")
+    
+    # Caso especial: si no se ha estudiado nada, probabilidad es 0
+    if studied_topics == 0:
+        return 0.0
+    
+    # Caso especial: si se han estudiado todos o las bolas >= temas no estudiados
+    if studied_topics >= total_topics or balls_drawn > (total_topics - studied_topics):
+        return 1.0
+    
+    # Cálculo usando distribución hipergeométrica
+    # P(ninguno estudiado) = C(N-k, n) / C(N, n)
+    # Usamos comb() de math para calcular combinaciones de forma eficiente
+    not_studied = total_topics - studied_topics
+    
+    prob_none_studied = comb(not_studied, balls_drawn) / comb(total_topics, balls_drawn)
+    
+    # P(al menos uno) = 1 - P(ninguno)
+    return 1.0 - prob_none_studied
+
+
+def probability_curve(total_topics: int, balls_drawn: int) -> list[float]:
+    """
+    Calcula la probabilidad de éxito para cada k de 0 a N.
+    
+    Usa la relación entre términos consecutivos en lugar de recalcular las
+    combinaciones para cada k:
+    
+    P(X = 0 | k+1) = P(X = 0 | k) * (N - k - n) / (N - k)
+    
+    Args:
+        total_topics: N - Número total de temas en el temario
+        balls_drawn: n - Número de bolas/temas que se extraen en el sorteo
+        
+    Returns:
+        Lista de N+1 probabilidades; la posición k corresponde a k temas estudiados
+        
+    Raises:
+        ValueError: Si los parámetros son inválidos
+    """
+    # Reutiliza la validación de calculate_probability
+    calculate_probability(total_topics, 0, balls_drawn)
+    
+    curve = []
+    prob_none_studied = 1.0
+    for studied in range(total_topics + 1):
+        if studied > total_topics - balls_drawn:
+            prob_none_studied = 0.0
+        curve.append(1.0 - prob_none_studied)
+        not_studied = total_topics - studied
+        if not_studied > 0:
+            prob_none_studied *= (not_studied - balls_drawn) / not_studied
+    return curve
+
+
+def probability_grid(total_topics, studied_topics, balls_drawn) -> np.ndarray:
+    """
+    Calcula P(X >= 1) para rejillas completas de parámetros en una sola pasada.
+    
+    Los argumentos son enteros o arrays que se combinan con las reglas de
+    broadcasting de NumPy; por ejemplo, `probability_grid(100, k[None, :],
+    n[:, None])` devuelve la matriz n × k para N = 100. Usa el producto
+    
+    C(N-k, n) / C(N, n) = prod_{i<n} (N - k - i) / (N - i)
+    
+    evaluado a la vez para todas las celdas.
+    
+    Args:
+        total_topics: N - Número total de temas en el temario
+        studied_topics: k - Número de temas estudiados por el candidato
+        balls_drawn: n - Número de bolas/temas que se extraen en el sorteo
+        
+    Returns:
+        Array de probabilidades con la forma del broadcast; NaN en las celdas
+        con parámetros inválidos (donde `calculate_probability` fallaría)
+    """
+    total, studied, drawn = np.broadcast_arrays(
+        np.asarray(total_topics, dtype=np.int64),
+        np.asarray(studied_topics, dtype=np.int64),
+        np.asarray(balls_drawn, dtype=np.int64),
+    )
+    valid = (total > 0) & (studied >= 0) & (drawn > 0) & (studied <= total) & (drawn <= total)
+    max_drawn = int(drawn[valid].max()) if valid.any() else 0
+    
+    # Un factor por bola en el último eje; las bolas i >= n valen 1
+    i = np.arange(max_drawn)
+    not_studied = (total - studied)[..., None] - i
+    remaining = total[..., None] - i
+    ratios = np.where(
+        i < drawn[..., None],
+        np.clip(not_studied, 0, None) / np.maximum(remaining, 1),
+        1.0,
+    )
+    prob_none_studied = ratios.prod(axis=-1)
+    
+    return np.where(valid, 1.0 - prob_none_studied, np.nan)
+
+
+def minimum_studied_topics(
+    total_topics: int,
+    balls_drawn: int,
+    target_probability: float
+) -> int:
+    """
+    Calcula el mínimo de temas a estudiar para alcanzar una probabilidad.
+    
+    La probabilidad crece con k, así que basta una búsqueda binaria.
+    
+    Args:
+        total_topics: N - Número total de temas en el temario
+        balls_drawn: n - Número de bolas/temas que se extraen en el sorteo
+        target_probability: Probabilidad objetivo, entre 0 y 1
+        
+    Returns:
+        Menor k con P(X >= 1) >= target_probability
+        
+    Raises:
+        ValueError: Si los parámetros son inválidos
+    """
+    if not 0.0 <= target_probability <= 1.0:
+        raise ValueError("La probabilidad objetivo debe estar entre 0 y 1")
+    
+    low, high = 0, total_topics
+    while low < high:
+        middle = (low + high) // 2
+        if calculate_probability(total_topics, middle, balls_drawn) >= target_probability:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+# =============================================================================
+# FUNCIONES DE SIMULACIÓN
+# =============================================================================
+def draw_topic_positions(
+    total_topics: int,
+    balls_drawn: int,
+    rng: random.Random | None = None
+) -> list[int]:
+    """
+    Extrae al azar las posiciones (0-based) de los temas de un sorteo.
+    
+    Args:
+        total_topics: Número total de temas
+        balls_drawn: Número de temas a extraer (se limita a total_topics)
+        rng: Generador aleatorio; por defecto, el global de `random`
+        
+    Returns:
+        Lista de posiciones distintas, en el orden de extracción
+    """
+    balls_drawn = min(balls_drawn, total_topics)
+    return (rng or random).sample(range(total_topics), balls_drawn)
+
+
+def simulate_draw(
+    topics_df: pd.DataFrame,
+    balls_drawn: int,
+    rng: random.Random | None = None
+) -> pd.DataFrame:
+    """
+    Simula un sorteo de temas aleatorio.
+    
+    Args:
+        topics_df: DataFrame con todos los temas
+        balls_drawn: Número de temas a extraer
+        rng: Generador aleatorio; por defecto, el global de `random`
+        
+    Returns:
+        DataFrame con los temas seleccionados
+    """
+    selected_indices = draw_topic_positions(len(topics_df), balls_drawn, rng)
+    return topics_df.iloc[selected_indices].reset_index(drop=True)
+
+
+def monte_carlo_success_rate(
+    total_topics: int,
+    studied: int | Container[int],
+    balls_drawn: int,
+    runs: int,
+    rng: random.Random | None = None,
+    on_progress: Callable[[int], None] | None = None,
+    chunk_size: int = 10_000
+) -> float:
+    """
+    Estima por simulación la probabilidad de sacar al menos un tema estudiado.
+    
+    Args:
+        total_topics: N - Número total de temas en el temario
+        studied: Número de temas estudiados (los k primeros) o conjunto con
+            los números de tema (desde 1) estudiados
+        balls_drawn: n - Número de bolas/temas que se extraen en el sorteo
+        runs: Número de sorteos a simular
+        rng: Generador aleatorio; por defecto, el global de `random`
+        on_progress: Función a la que se pasa, tras cada bloque de
+            `chunk_size` sorteos, el número de sorteos hechos
+        chunk_size: Sorteos por bloque
+        
+    Returns:
+        Fracción de sorteos con al menos un tema estudiado
+        
+    Raises:
+        ValueError: Si los parámetros son inválidos
+    """
+    # Reutiliza la validación de calculate_probability
+    calculate_probability(total_topics, 0, balls_drawn)
+    if runs <= 0:
+        raise ValueError("El número de sorteos debe ser mayor que 0")
+    
+    rng = rng or random
+    population = range(total_topics)
+    successes = 0
+    done = 0
+    while done < runs:
+        batch = min(chunk_size, runs - done)
+        if isinstance(studied, int):
+            # Estudiados los k primeros: basta con la posición más baja
+            successes += sum(
+                min(rng.sample(population, balls_drawn)) < studied for _ in range(batch)
+            )
+        else:
+            successes += sum(
+                any(position + 1 in studied for position in rng.sample(population, balls_drawn))
+                for _ in range(batch)
+            )
+        done += batch
+        if on_progress is not None:
+            on_progress(done)
+    return successes / runs
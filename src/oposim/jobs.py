@@ -0,0 +1,202 @@
+"""
+Trabajos en segundo plano para cálculos largos.
+
+Los cálculos pesados (simulaciones masivas, optimizaciones, importaciones
+grandes) se ejecutan en un pool acotado de hilos en lugar de bloquear la
+ejecución del script. Cada trabajo tiene un identificador que la sesión
+guarda para consultar su progreso y su resultado.
+
+La función del trabajo recibe un `JobContext` como primer argumento para
+informar del progreso y comprobar si se ha pedido cancelarlo:
+
+    def tarea(ctx: JobContext, runs: int) -> int:
+        for i in range(runs):
+            ctx.progress(i / runs, "Calculando...")  # Lanza JobCancelled si se canceló
+            ...
+
+    runner = JobRunner(max_workers=2)
+    job_id = runner.submit("tarea", tarea, 1000)
+    runner.get(job_id).status  # "pending", "running", "done", "failed" o "cancelled"
+
+La cancelación es cooperativa: surte efecto en la siguiente llamada a
+`progress` o `check_cancelled`. Los trabajos terminados se conservan
+`retention_seconds` y después se olvidan.
+
+No depende de Streamlit.
+"""
+
+import itertools
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from oposim.metrics import REGISTRY
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+JOB_MAX_WORKERS = 2  # Hilos de cálculo por proceso
+JOB_MAX_QUEUED = 16  # Trabajos pendientes o en curso como máximo
+JOB_RETENTION_SECONDS = 15 * 60  # Tiempo que se guarda un resultado ya terminado
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro del trabajo cuando se ha pedido cancelarlo."""
+
+
+# =============================================================================
+# MODELOS DE DATOS
+# =============================================================================
+@dataclass
+class Job:
+    """Estado de un trabajo (lo actualiza el hilo que lo ejecuta)."""
+    job_id: str
+    name: str
+    status: str = JOB_PENDING
+    progress: float = 0.0  # Entre 0 y 1
+    message: str = ""
+    result: Any = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JOB_FINISHED_STATES
+
+
+class JobContext:
+    """Canal entre el trabajo y el ejecutor: progreso y cancelación."""
+
+    def __init__(self, job: Job):
+        self._job = job
+
+    @property
+    def cancelled(self) -> bool:
+        return self._job.cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        """Lanza JobCancelled si se ha pedido cancelar el trabajo."""
+        if self.cancelled:
+            raise JobCancelled
+
+    def progress(self, fraction: float, message: str | None = None) -> None:
+        """Actualiza el progreso (0 a 1) y comprueba la cancelación."""
+        self._job.progress = min(max(fraction, 0.0), 1.0)
+        if message is not None:
+            self._job.message = message
+        self.check_cancelled()
+
+
+# =============================================================================
+# EJECUTOR
+# =============================================================================
+class JobRunner:
+    """Pool acotado de hilos con registro de trabajos por identificador."""
+
+    def __init__(
+        self,
+        max_workers: int = JOB_MAX_WORKERS,
+        max_queued: int = JOB_MAX_QUEUED,
+        retention_seconds: float = JOB_RETENTION_SECONDS
+    ):
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="oposim-job")
+        self._jobs: dict[str, Job] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, func: Callable[..., Any], *args, **kwargs) -> str:
+        """
+        Encola un trabajo y devuelve su identificador.
+
+        Args:
+            name: Nombre del tipo de trabajo (para métricas y mensajes)
+            func: Función a ejecutar; recibe un JobContext como primer argumento
+            *args, **kwargs: Resto de argumentos de la función
+
+        Raises:
+            ValueError: Si ya hay demasiados trabajos pendientes o en curso
+        """
+        with self._lock:
+            self._purge_expired()
+            active = sum(1 for job in self._jobs.values() if not job.finished)
+            if active >= self.max_queued:
+                raise ValueError("Hay demasiados cálculos en curso; inténtalo en unos segundos")
+            job = Job(job_id=f"{name}-{next(self._ids)}", name=name)
+            self._jobs[job.job_id] = job
+        REGISTRY.counter("oposim_jobs_total", "Trabajos en segundo plano", job=name, status="submitted").inc()
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job.job_id
+
+    def _run(self, job: Job, func: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        """Ejecuta el trabajo en un hilo del pool y registra cómo termina."""
+        if job.cancel_event.is_set():
+            self._finish(job, JOB_CANCELLED)
+            return
+        job.status = JOB_RUNNING
+        started = time.perf_counter()
+        try:
+            job.result = func(JobContext(job), *args, **kwargs)
+        except JobCancelled:
+            self._finish(job, JOB_CANCELLED)
+        except Exception as e:  # noqa: BLE001 - el error se muestra a quien lo pidió
+            job.error = str(e) or type(e).__name__
+            self._finish(job, JOB_FAILED)
+        else:
+            job.progress = 1.0
+            self._finish(job, JOB_DONE)
+        finally:
+            REGISTRY.histogram(
+                "oposim_job_seconds", "Duración de los trabajos en segundo plano", job=job.name
+            ).observe(time.perf_counter() - started)
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.finished_at = time.time()
+        job.status = status
+        REGISTRY.counter("oposim_jobs_total", "Trabajos en segundo plano", job=job.name, status=status).inc()
+
+    def get(self, job_id: str | None) -> Job | None:
+        """Trabajo por identificador, o None si no existe o ya caducó."""
+        if job_id is None:
+            return None
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str | None) -> None:
+        """Pide cancelar un trabajo (sin efecto si ya terminó o no existe)."""
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_event.set()
+
+    def forget(self, job_id: str | None) -> None:
+        """Cancela el trabajo si sigue en curso y descarta su resultado."""
+        self.cancel(job_id)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.finished:
+                del self._jobs[job_id]
+
+    def _purge_expired(self) -> None:
+        """Olvida los trabajos terminados hace más de retention_seconds (con el lock)."""
+        limit = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < limit
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,221 @@
+"""
+Tabla precalculada de probabilidades, leída con mmap.
+
+El sorteo admite como mucho 20 bolas y los temarios reales no pasan de unos
+500 temas, así que todo el dominio (N, n, k) de `calculate_probability`
+cabe en una tabla float64 de unos 20 MB. Se genera una vez con
+
+    oposim build-lut
+
+y se abre con mmap: las consultas, las curvas completas y las
+búsquedas inversas leen directamente del archivo, sin copiarlo, y el
+sistema operativo comparte sus páginas entre todos los procesos. Fuera del
+rango de la tabla (o si no se ha generado) se usa el cálculo directo.
+
+Formato del archivo: cabecera de 16 bytes (firma, N máximo y n máximo como
+uint32 little-endian) seguida de los valores float64 little-endian. Para
+cada N y cada n hay una fila con las N+1 probabilidades de k = 0..N; las
+filas con n > N guardan NaN.
+"""
+
+import mmap
+import os
+import struct
+from collections.abc import Callable, Sequence
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from oposim.engine import calculate_probability, minimum_studied_topics, probability_curve
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+LUT_MAX_TOTAL = 500
+LUT_MAX_DRAWN = 20
+LUT_MAGIC = b"OPOLUT1\0"
+LUT_HEADER = struct.Struct("<8sII")
+LUT_DTYPE = np.dtype("<f8")
+PROBABILITY_STRUCT = struct.Struct("<d")
+
+# Ubicación por defecto (se puede cambiar con OPOSIM_LUT_PATH)
+DEFAULT_LUT_PATH = Path(__file__).parent / "data" / "probability_lut.f64"
+
+
+def row_offset(total_topics: int, balls_drawn: int, max_drawn: int) -> int:
+    """Posición (en valores) de la fila (N, n) dentro de la tabla."""
+    # Cada N anterior ocupa max_drawn filas de M+1 valores: sum(M+1, M=1..N-1)
+    previous = (total_topics - 1) * total_topics // 2 + (total_topics - 1)
+    return max_drawn * previous + (balls_drawn - 1) * (total_topics + 1)
+
+
+def table_size(max_total: int, max_drawn: int) -> int:
+    """Número total de valores de una tabla con esos límites."""
+    return row_offset(max_total + 1, 1, max_drawn)
+
+
+# =============================================================================
+# GENERACIÓN
+# =============================================================================
+def build_probability_table(
+    path: str | Path = DEFAULT_LUT_PATH,
+    max_total: int = LUT_MAX_TOTAL,
+    max_drawn: int = LUT_MAX_DRAWN
+) -> Path:
+    """
+    Genera el archivo de la tabla con `calculate_probability`.
+
+    Los valores son exactamente los del cálculo directo, de modo que usar la
+    tabla no cambia ningún resultado. Se escribe en un archivo temporal y se
+    renombra al final, así los procesos que la tengan abierta no ven una
+    tabla a medias.
+
+    Returns:
+        Ruta del archivo generado
+    """
+    if max_total < 1 or max_drawn < 1:
+        raise ValueError("Los límites de la tabla deben ser mayores que 0")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with open(tmp_path, "wb") as handle:
+        handle.write(LUT_HEADER.pack(LUT_MAGIC, max_total, max_drawn))
+        for total in range(1, max_total + 1):
+            for drawn in range(1, max_drawn + 1):
+                if drawn > total:
+                    row = np.full(total + 1, np.nan, dtype=LUT_DTYPE)
+                else:
+                    row = np.array(
+                        [calculate_probability(total, k, drawn) for k in range(total + 1)],
+                        dtype=LUT_DTYPE,
+                    )
+                handle.write(row.tobytes())
+
+    os.replace(tmp_path, path)
+    return path
+
+
+# =============================================================================
+# LECTURA
+# =============================================================================
+class ProbabilityTable:
+    """Tabla de probabilidades abierta en modo solo lectura con mmap."""
+
+    def __init__(self, path: str | Path):
+        path = Path(path)
+        with open(path, "rb") as handle:
+            header = handle.read(LUT_HEADER.size)
+        if len(header) < LUT_HEADER.size:
+            raise ValueError(f"Tabla de probabilidades no válida: {path}")
+        magic, max_total, max_drawn = LUT_HEADER.unpack(header)
+        if magic != LUT_MAGIC:
+            raise ValueError(f"Tabla de probabilidades no válida: {path}")
+
+        expected = LUT_HEADER.size + table_size(max_total, max_drawn) * LUT_DTYPE.itemsize
+        if path.stat().st_size != expected:
+            raise ValueError(f"Tabla de probabilidades incompleta: {path}")
+
+        self.path = path
+        self.max_total = max_total
+        self.max_drawn = max_drawn
+        with open(path, "rb") as handle:
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        # ndarray normal sobre el mmap: indexar es más rápido que con np.memmap
+        self.values = np.frombuffer(self.buffer, dtype=LUT_DTYPE, offset=LUT_HEADER.size)
+
+    def covers(self, total_topics: int, balls_drawn: int) -> bool:
+        """Indica si la tabla tiene la fila (N, n) con parámetros válidos."""
+        return (
+            1 <= total_topics <= self.max_total
+            and 1 <= balls_drawn <= min(total_topics, self.max_drawn)
+        )
+
+    def curve(self, total_topics: int, balls_drawn: int) -> np.ndarray:
+        """Vista de solo lectura (sin copia) de las probabilidades para k = 0..N."""
+        start = row_offset(total_topics, balls_drawn, self.max_drawn)
+        return self.values[start:start + total_topics + 1]
+
+    def probability(self, total_topics: int, studied_topics: int, balls_drawn: int) -> float:
+        """Probabilidad para (N, k, n); requiere `covers` y 0 <= k <= N."""
+        index = row_offset(total_topics, balls_drawn, self.max_drawn) + studied_topics
+        return PROBABILITY_STRUCT.unpack_from(
+            self.buffer, LUT_HEADER.size + index * LUT_DTYPE.itemsize
+        )[0]
+
+    def minimum_studied(
+        self,
+        total_topics: int,
+        balls_drawn: int,
+        target_probability: float
+    ) -> int:
+        """Menor k con probabilidad >= objetivo (la fila es creciente)."""
+        curve = self.curve(total_topics, balls_drawn)
+        return int(np.searchsorted(curve, target_probability, side="left"))
+
+
+@lru_cache(maxsize=1)
+def get_probability_table() -> ProbabilityTable | None:
+    """
+    Abre la tabla por defecto una vez por proceso.
+
+    Returns:
+        La tabla, o None si no se ha generado o no es válida
+    """
+    path = Path(os.environ.get("OPOSIM_LUT_PATH", DEFAULT_LUT_PATH))
+    try:
+        return ProbabilityTable(path)
+    except (OSError, ValueError):
+        return None
+
+
+# =============================================================================
+# CONSULTAS CON RESPALDO AL CÁLCULO DIRECTO
+# =============================================================================
+def lookup_probability(
+    total_topics: int,
+    studied_topics: int,
+    balls_drawn: int,
+    fallback: Callable[[int, int, int], float] = calculate_probability
+) -> float:
+    """Como `calculate_probability`, leyendo de la tabla cuando es posible."""
+    table = get_probability_table()
+    if (
+        table is not None
+        and table.covers(total_topics, balls_drawn)
+        and 0 <= studied_topics <= total_topics
+    ):
+        return table.probability(total_topics, studied_topics, balls_drawn)
+    return fallback(total_topics, studied_topics, balls_drawn)
+
+
+def lookup_curve(
+    total_topics: int,
+    balls_drawn: int,
+    fallback: Callable[[int, int], Sequence[float]] = probability_curve
+) -> Sequence[float]:
+    """Como `probability_curve`, leyendo de la tabla cuando es posible."""
+    table = get_probability_table()
+    if table is not None and table.covers(total_topics, balls_drawn):
+        return table.curve(total_topics, balls_drawn)
+    return fallback(total_topics, balls_drawn)
+
+
+def lookup_minimum_studied(
+    total_topics: int,
+    balls_drawn: int,
+    target_probability: float,
+    fallback: Callable[[int, int, float], int] = minimum_studied_topics
+) -> int:
+    """Como `minimum_studied_topics`, leyendo de la tabla cuando es posible."""
+    table = get_probability_table()
+    if (
+        table is not None
+        and table.covers(total_topics, balls_drawn)
+        and 0.0 <= target_probability <= 1.0
+    ):
+        return table.minimum_studied(total_topics, balls_drawn, target_probability)
+    return fallback(total_topics, balls_drawn, target_probability)
@@ -0,0 +1,121 @@
+"""
+Contabilidad de memoria del estado de sesión.
+
+`deep_sizeof` estima los bytes que ocupa un objeto siguiendo sus
+referencias (contenedores, atributos, arrays de NumPy y objetos de
+pandas), contando cada objeto una sola vez. `session_memory_report`
+lo aplica a cada clave del estado de una sesión; los objetos compartidos
+entre sesiones (p. ej. los temarios de `TemarioCache`) se indican aparte
+y no se cargan a la sesión.
+
+No depende de Streamlit: recibe cualquier mapping (``st.session_state``
+incluido).
+"""
+
+import sys
+from collections import deque
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# =============================================================================
+# TAMAÑO PROFUNDO
+# =============================================================================
+def deep_sizeof(obj: object, seen: set[int] | None = None) -> int:
+    """
+    Bytes aproximados de un objeto y de todo lo que referencia.
+
+    Args:
+        obj: Objeto a medir
+        seen: Ids de objetos ya contados (se actualiza); los objetos que
+            estén aquí cuentan 0
+
+    Returns:
+        Tamaño en bytes
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    # pandas ya sabe medir sus datos (incluidas las cadenas con deep=True)
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, np.ndarray):
+        # Una vista no incluye su buffer: se cuenta el array base
+        if obj.base is not None:
+            size += deep_sizeof(obj.base, seen)
+        elif obj.dtype == object:
+            size += sum(deep_sizeof(item, seen) for item in obj.ravel())
+        return size
+    if isinstance(obj, (str, bytes, bytearray, int, float, complex, bool, type(None))):
+        return size
+
+    if isinstance(obj, Mapping):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += deep_sizeof(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+# =============================================================================
+# INFORME POR CLAVE
+# =============================================================================
+@dataclass
+class KeyUsage:
+    """Memoria atribuida a una clave del estado de sesión."""
+    key: str
+    type_name: str
+    size_bytes: int
+
+
+def session_memory_report(state: Mapping, shared: Iterable[object] = ()) -> list[KeyUsage]:
+    """
+    Tamaño profundo de cada clave del estado, de mayor a menor.
+
+    Cada objeto se cuenta en la primera clave (por tamaño) que lo
+    referencia, de modo que la suma de las claves es el total de la sesión.
+
+    Args:
+        state: Estado de la sesión (o cualquier mapping)
+        shared: Objetos compartidos entre sesiones que no se cargan a esta
+
+    Returns:
+        Lista de KeyUsage ordenada por tamaño descendente
+    """
+    shared_ids = {id(obj) for obj in shared}
+    items = [(str(key), value) for key, value in state.items()]
+
+    # Primero se mide cada clave por separado para ordenar, luego se
+    # reparte sin duplicados en ese orden
+    standalone = {key: deep_sizeof(value, set(shared_ids)) for key, value in items}
+    seen = set(shared_ids)
+    report = [
+        KeyUsage(key, type(value).__name__, deep_sizeof(value, seen))
+        for key, value in sorted(items, key=lambda item: standalone[item[0]], reverse=True)
+    ]
+    report.sort(key=lambda usage: usage.size_bytes, reverse=True)
+    return report
+
+
+def format_bytes(size: int) -> str:
+    """Tamaño legible (B, KB, MB)."""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
@@ -0,0 +1,326 @@
+"""
+Registro de métricas del proceso, exportable en formato de texto de Prometheus.
+
+Pensado para dejarlo siempre activo:
+
+- `Counter`: contadores por hilo. Cada hilo incrementa solo su propia
+  celda, sin locks; al leer se suman todas las celdas.
+- `Histogram`: histograma log-lineal al estilo HDR. Guarda microsegundos
+  en cubos de 16 subdivisiones por potencia de dos (error relativo <= 6%),
+  también por hilo, y calcula percentiles al exportar.
+
+Las métricas se obtienen del registro por nombre y etiquetas, creándose la
+primera vez:
+
+    REGISTRY.counter("oposim_reruns_total", "Ejecuciones del script").inc()
+    REGISTRY.histogram("oposim_storage_seconds", "...", operation="verify_user").observe(0.012)
+
+Exportación: `REGISTRY.render()` (texto), `write_metrics_file(path)` o
+`start_metrics_server(port)` (endpoint HTTP /metrics en un hilo aparte).
+"""
+
+import functools
+import os
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+HISTOGRAM_SUB_BITS = 4  # 2^4 = 16 subdivisiones por potencia de dos
+HISTOGRAM_MAX_MICROS = 1 << 36  # ~19 horas; valores mayores van al último cubo
+SUMMARY_QUANTILES = (0.5, 0.95, 0.99)
+
+
+# =============================================================================
+# MÉTRICAS
+# =============================================================================
+class ThreadShards:
+    """
+    Celdas por hilo: escrituras sin contención y lectura sumando todas.
+
+    Streamlit ejecuta cada rerun en un hilo nuevo, así que al registrar un
+    hilo se acumulan en una celda común las de los hilos ya terminados
+    (que ya no pueden escribir) para no crecer sin límite.
+    """
+
+    def __init__(self, factory: Callable[[], list]):
+        self._factory = factory
+        self._local = threading.local()
+        self._shards: list[tuple[threading.Thread, list]] = []
+        self._retired = factory()
+        self._lock = threading.Lock()  # Solo al registrar un hilo nuevo o al leer
+
+    def get(self) -> list:
+        """Celda del hilo actual (creada la primera vez)."""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._factory()
+            self._local.shard = shard
+            with self._lock:
+                self._retire_dead_threads()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead_threads(self) -> None:
+        """Suma las celdas de hilos terminados en la celda común."""
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+                continue
+            for index, value in enumerate(shard):
+                if value:
+                    self._retired[index] += value
+        self._shards = alive
+
+    def all(self) -> list[list]:
+        """Celdas de todos los hilos, incluida la de los ya terminados."""
+        with self._lock:
+            return [self._retired] + [shard for _, shard in self._shards]
+
+
+class Counter:
+    """Contador monótono."""
+
+    kind = "counter"
+
+    def __init__(self):
+        self._shards = ThreadShards(lambda: [0])
+
+    def inc(self, amount: int = 1) -> None:
+        self._shards.get()[0] += amount
+
+    @property
+    def value(self) -> int:
+        return sum(shard[0] for shard in self._shards.all())
+
+
+def bucket_index(micros: int) -> int:
+    """Cubo log-lineal de un valor en microsegundos."""
+    sub_count = 1 << HISTOGRAM_SUB_BITS
+    if micros < 2 * sub_count:
+        return max(micros, 0)
+    micros = min(micros, HISTOGRAM_MAX_MICROS - 1)
+    exponent = micros.bit_length() - HISTOGRAM_SUB_BITS - 1
+    return exponent * sub_count + (micros >> exponent)
+
+
+def bucket_bounds(index: int) -> tuple[int, int]:
+    """Límites [inferior, superior) en microsegundos de un cubo."""
+    sub_count = 1 << HISTOGRAM_SUB_BITS
+    if index < 2 * sub_count:
+        return index, index + 1
+    exponent = index // sub_count - 1
+    mantissa = index - exponent * sub_count
+    return mantissa << exponent, (mantissa + 1) << exponent
+
+
+NUM_BUCKETS = bucket_index(HISTOGRAM_MAX_MICROS - 1) + 1
+
+
+class Histogram:
+    """Histograma de duraciones (en segundos) con percentiles aproximados."""
+
+    kind = "summary"
+
+    def __init__(self):
+        # Celda: [cuenta, suma en segundos, cubos...]
+        self._shards = ThreadShards(lambda: [0, 0.0] + [0] * NUM_BUCKETS)
+
+    def observe(self, seconds: float) -> None:
+        shard = self._shards.get()
+        shard[0] += 1
+        shard[1] += seconds
+        shard[2 + bucket_index(int(seconds * 1_000_000))] += 1
+
+    def time(self) -> "HistogramTimer":
+        """Context manager que observa la duración del bloque."""
+        return HistogramTimer(self)
+
+    def snapshot(self) -> tuple[int, float, list[int]]:
+        """Cuenta, suma y cubos agregados de todos los hilos."""
+        count, total = 0, 0.0
+        buckets = [0] * NUM_BUCKETS
+        for shard in self._shards.all():
+            count += shard[0]
+            total += shard[1]
+            for index, value in enumerate(shard[2:]):
+                if value:
+                    buckets[index] += value
+        return count, total, buckets
+
+    def quantiles(self, quantiles: tuple[float, ...] = SUMMARY_QUANTILES) -> dict[float, float]:
+        """Percentiles en segundos (punto medio del cubo correspondiente)."""
+        count, _, buckets = self.snapshot()
+        result = {}
+        if count == 0:
+            return {q: float("nan") for q in quantiles}
+        for q in quantiles:
+            rank = max(1, int(q * count + 0.5))
+            seen = 0
+            for index, value in enumerate(buckets):
+                seen += value
+                if seen >= rank:
+                    low, high = bucket_bounds(index)
+                    result[q] = (low + high) / 2 / 1_000_000
+                    break
+        return result
+
+
+class HistogramTimer:
+    """Mide un bloque y lo añade al histograma al salir."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self) -> "HistogramTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+# =============================================================================
+# REGISTRO
+# =============================================================================
+class MetricsRegistry:
+    """Métricas del proceso indexadas por nombre y etiquetas."""
+
+    def __init__(self):
+        self._metrics: dict[tuple, Counter | Histogram] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls: type, name: str, help_text: str, labels: dict):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls()
+                    self._metrics[key] = metric
+                    self._help.setdefault(name, help_text)
+        if not isinstance(metric, cls):
+            raise ValueError(f"La métrica {name} ya existe con otro tipo")
+        return metric
+
+    def counter(self, name: str, help_text: str = "", **labels: str) -> Counter:
+        """Obtiene (o crea) un contador."""
+        return self._get(Counter, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str = "", **labels: str) -> Histogram:
+        """Obtiene (o crea) un histograma de duraciones en segundos."""
+        return self._get(Histogram, name, help_text, labels)
+
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus."""
+        with self._lock:
+            items = sorted(self._metrics.items(), key=lambda item: item[0])
+
+        lines = []
+        current_name = None
+        for (name, labels), metric in items:
+            if name != current_name:
+                current_name = name
+                if self._help.get(name):
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+
+            if isinstance(metric, Counter):
+                lines.append(f"{name}{format_labels(labels)} {metric.value}")
+                continue
+
+            count, total, _ = metric.snapshot()
+            for q, value in metric.quantiles().items():
+                quantile_labels = labels + (("quantile", f"{q:g}"),)
+                lines.append(f"{name}{format_labels(quantile_labels)} {format_value(value)}")
+            lines.append(f"{name}_sum{format_labels(labels)} {format_value(total)}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def format_value(value: float) -> str:
+    """Número en formato Prometheus (NaN en lugar de nan)."""
+    return "NaN" if value != value else f"{value:.6g}"
+
+
+def format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    """Etiquetas en formato Prometheus: {a="1",b="2"}."""
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+# Registro compartido por todo el proceso
+REGISTRY = MetricsRegistry()
+
+
+def timed(name: str, help_text: str = "", label: str = "operation") -> Callable:
+    """
+    Decorador que observa la duración de cada llamada en un histograma.
+
+    El histograma lleva la etiqueta `label` con el nombre de la función.
+    """
+    def decorator(func: Callable) -> Callable:
+        histogram = REGISTRY.histogram(name, help_text, **{label: func.__name__})
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time():
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# =============================================================================
+# EXPORTACIÓN
+# =============================================================================
+def write_metrics_file(path: str | Path, registry: MetricsRegistry = REGISTRY) -> None:
+    """Escribe las métricas en un archivo (p. ej. para el textfile collector)."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    tmp_path.write_text(registry.render(), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def start_metrics_server(
+    port: int,
+    host: str = "127.0.0.1",
+    registry: MetricsRegistry = REGISTRY
+) -> ThreadingHTTPServer:
+    """Sirve GET /metrics en un hilo en segundo plano y devuelve el servidor."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass  # Sin log por petición
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="oposim-metrics", daemon=True)
+    thread.start()
+    return server
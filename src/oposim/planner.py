@@ -0,0 +1,418 @@
+"""
+Plan de estudio: qué temas preparar con las horas disponibles.
+
+Parte del progreso de cada tema (estado 0-10 y descartado) y de las horas
+que cuesta llevar cada tema al estado máximo, y elige los temas que más
+aumentan la probabilidad de un buen sorteo sin pasarse del presupuesto de
+horas. Hay dos objetivos:
+
+- "best": el opositor elige el mejor tema de los n que salen y lo defiende
+  con probabilidad estado / 10. P = E[dominio del mejor tema sorteado].
+  Con los temas ordenados de mayor a menor dominio p(1) >= p(2) >= ...,
+
+      P = sum_j p(j) * C(N - j, n - 1) / C(N, n)
+
+  (el peso de la posición j es la probabilidad de que el mejor tema
+  sorteado sea el j-ésimo).
+- "at_least": probabilidad de que al menos m de los n temas sorteados
+  estén dominados (estado >= PLAN_DOMINATED_ESTADO), hipergeométrica.
+
+Estudiar un tema lo lleva al estado máximo. Los temas descartados siguen
+en el bombo, pero no se proponen.
+
+Métodos:
+
+- Voraz perezoso (CELF): un heap ordenado por ganancia marginal por hora.
+  Las ganancias solo se recalculan para el tema que queda en la cima, ya
+  que en "best" solo pueden bajar al añadir temas (la función es
+  submodular). Se compara además con el mejor tema suelto.
+- Programación dinámica exacta para instancias pequeñas de "best": recorre
+  los temas de menor a mayor dominio con estado (temas elegidos por
+  debajo, horas gastadas), porque cada tema elegido sube a la cabeza y
+  desplaza una posición a los que no se eligen.
+
+En "at_least" la probabilidad solo depende de cuántos temas estén
+dominados, así que elegir primero los más baratos (lo que hace el voraz)
+ya es óptimo.
+
+Las horas se redondean hacia arriba a múltiplos de PLAN_HOUR_STEP.
+
+No depende de Streamlit.
+"""
+
+import heapq
+import math
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from oposim.engine import calculate_probability
+from oposim.progress import MAX_ESTADO
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+PLAN_MODE_BEST = "best"
+PLAN_MODE_AT_LEAST = "at_least"
+PLAN_MODES = (PLAN_MODE_BEST, PLAN_MODE_AT_LEAST)
+
+PLAN_DOMINATED_ESTADO = 8  # Estado a partir del cual un tema cuenta como dominado
+PLAN_DEFAULT_TOPIC_HOURS = 10.0  # Horas para preparar un tema desde estado 0
+PLAN_HOUR_STEP = 0.5  # Resolución de las horas (la programación dinámica es exacta a esta escala)
+PLAN_DP_MAX_STATES = 2_000_000  # Tamaño máximo de la tabla de la programación dinámica
+
+
+# =============================================================================
+# MODELOS DE DATOS
+# =============================================================================
+@dataclass
+class PlanStep:
+    """Un tema del plan, con la probabilidad acumulada tras estudiarlo."""
+    topic_num: int
+    estado: int
+    hours: float
+    probability: float
+
+
+@dataclass
+class StudyPlan:
+    """Resultado de la optimización."""
+    mode: str
+    budget_hours: float
+    probability_before: float
+    probability_after: float
+    exact: bool  # True si el plan es óptimo (para las horas redondeadas)
+    steps: list[PlanStep] = field(default_factory=list)
+
+    @property
+    def hours(self) -> float:
+        """Horas que requiere el plan."""
+        return sum(step.hours for step in self.steps)
+
+    @property
+    def topic_nums(self) -> list[int]:
+        return [step.topic_num for step in self.steps]
+
+
+# =============================================================================
+# OBJETIVOS
+# =============================================================================
+def best_topic_weights(total_topics: int, balls_drawn: int) -> np.ndarray:
+    """
+    Probabilidad de que el mejor tema sorteado sea el de cada posición.
+
+    w(j) = C(N-1-j, n-1) / C(N, n) para j = 0..N-1, con la recurrencia
+    w(0) = n / N y w(j+1) = w(j) * (N - j - n) / (N - 1 - j).
+    """
+    weights = np.zeros(total_topics)
+    weight = balls_drawn / total_topics
+    for position in range(total_topics - balls_drawn + 1):
+        weights[position] = weight
+        remaining = total_topics - 1 - position
+        if remaining > 0:
+            weight *= (remaining - balls_drawn + 1) / remaining
+    return weights
+
+
+def at_least_probabilities(total_topics: int, balls_drawn: int, minimum: int) -> np.ndarray:
+    """
+    P(al menos `minimum` temas dominados entre los sorteados) para cada K = 0..N.
+
+    Se calcula con enteros exactos y una sola división por K.
+    """
+    total = math.comb(total_topics, balls_drawn)
+    tail = np.zeros(total_topics + 1)
+    for dominated in range(total_topics + 1):
+        favorable = sum(
+            math.comb(dominated, hits) * math.comb(total_topics - dominated, balls_drawn - hits)
+            for hits in range(minimum, min(balls_drawn, dominated) + 1)
+        )
+        tail[dominated] = favorable / total
+    return tail
+
+
+class BestTopicObjective:
+    """P = E[dominio del mejor tema sorteado], con estudio incremental."""
+
+    def __init__(self, mastery: np.ndarray, balls_drawn: int):
+        self.weights = best_topic_weights(len(mastery), balls_drawn)
+        # Posiciones de los temas ordenados por dominio (de mayor a menor)
+        self.order = np.argsort(-mastery, kind="stable")
+        self.values = mastery[self.order].astype(float)
+        self.rank = np.empty(len(mastery), dtype=np.int64)
+        self.rank[self.order] = np.arange(len(mastery))
+        self.balls_drawn = balls_drawn
+
+    def value(self) -> float:
+        return float(self.weights @ self.values)
+
+    def saturated(self) -> bool:
+        """P = 1: dominados todos los puestos que pueden ser el mejor sorteado."""
+        return bool(self.values[len(self.values) - self.balls_drawn] >= 1.0)
+
+    def gain(self, index: int) -> float:
+        """Aumento de P si el tema de la posición `index` pasa a dominio 1."""
+        rank = self.rank[index]
+        # El tema sube a la cabeza y los que tenía delante bajan un puesto
+        shifted = np.concatenate(([1.0], self.values[:rank]))
+        return float(self.weights[:rank + 1] @ (shifted - self.values[:rank + 1]))
+
+    def select(self, index: int) -> None:
+        rank = self.rank[index]
+        self.values = np.concatenate(([1.0], self.values[:rank], self.values[rank + 1:]))
+        self.order = np.concatenate(([index], self.order[:rank], self.order[rank + 1:]))
+        self.rank[self.order[:rank + 1]] = np.arange(rank + 1)
+
+
+class AtLeastObjective:
+    """P(al menos m temas dominados entre los sorteados)."""
+
+    def __init__(self, dominated: int, tail: np.ndarray):
+        self.dominated = dominated
+        self.tail = tail
+
+    def value(self) -> float:
+        return float(self.tail[self.dominated])
+
+    def saturated(self) -> bool:
+        return self.dominated >= len(self.tail) - 1 or self.tail[self.dominated] >= 1.0
+
+    def gain(self, index: int) -> float:
+        # Todos los temas cuentan igual: solo importa cuántos hay dominados
+        return float(self.tail[min(self.dominated + 1, len(self.tail) - 1)] - self.tail[self.dominated])
+
+    def select(self, index: int) -> None:
+        self.dominated += 1
+
+
+# =============================================================================
+# MÉTODOS DE OPTIMIZACIÓN
+# =============================================================================
+def lazy_greedy(
+    objective: BestTopicObjective | AtLeastObjective,
+    costs: dict[int, int],
+    budget: int,
+    on_progress: Callable[[float], None] | None = None
+) -> list[int]:
+    """
+    Selección voraz por ganancia marginal por unidad de coste (CELF).
+
+    Cada entrada del heap guarda la ganancia calculada en un paso anterior;
+    solo se recalcula la de la cima. Ante empate gana el tema más barato.
+
+    Args:
+        objective: Objetivo a maximizar (se modifica con los temas elegidos)
+        costs: Coste en unidades de PLAN_HOUR_STEP de cada tema candidato
+        budget: Presupuesto en las mismas unidades
+        on_progress: Recibe la fracción del presupuesto gastada tras cada tema
+
+    Returns:
+        Posiciones de los temas elegidos, en orden de elección
+    """
+    step = 0
+    heap = [(-objective.gain(index) / cost, cost, index, step) for index, cost in costs.items()]
+    heapq.heapify(heap)
+    # El mejor tema suelto: protege del caso de un tema caro que vale más que todo lo demás
+    best_single = max(
+        ((objective.gain(index), index) for index, cost in costs.items() if cost <= budget),
+        default=(0.0, None),
+    )
+
+    selected: list[int] = []
+    gained = 0.0
+    remaining = budget
+    while heap and not objective.saturated():
+        neg_ratio, cost, index, evaluated_at = heapq.heappop(heap)
+        if cost > remaining:
+            continue  # El presupuesto solo baja: este tema ya no cabe
+        if evaluated_at != step:
+            heapq.heappush(heap, (-objective.gain(index) / cost, cost, index, step))
+            continue
+        objective.select(index)
+        selected.append(index)
+        gained += -neg_ratio * cost
+        remaining -= cost
+        step += 1
+        if on_progress is not None:
+            on_progress(1 - remaining / budget)
+
+    single_gain, single_index = best_single
+    if single_index is not None and single_gain > gained:
+        return [single_index]
+    return selected
+
+
+def best_topic_dp(
+    mastery: np.ndarray,
+    costs: dict[int, int],
+    budget: int,
+    balls_drawn: int,
+    on_progress: Callable[[float], None] | None = None
+) -> list[int]:
+    """
+    Plan óptimo para el objetivo "best" por programación dinámica.
+
+    Con los temas ordenados de mayor a menor dominio, un tema no elegido de
+    la posición r acaba en la posición r + (temas elegidos por debajo de r),
+    y los elegidos ocupan la cabeza. Se recorren las posiciones de abajo
+    arriba con estado (temas elegidos hasta ahora, unidades gastadas).
+
+    Returns:
+        Posiciones de los temas elegidos
+    """
+    total_topics = len(mastery)
+    weights = best_topic_weights(total_topics, balls_drawn)
+    head_weights = np.concatenate(([0.0], np.cumsum(weights)))  # Peso de las k primeras posiciones
+    order = np.argsort(-mastery, kind="stable")
+    values = mastery[order].astype(float)
+    mastered = int(np.count_nonzero(values >= 1.0))
+
+    max_count = len(costs)
+    counts = np.arange(max_count + 1)
+    table = np.full((max_count + 1, budget + 1), -np.inf)
+    table[0, 0] = 0.0
+    choices: dict[int, np.ndarray] = {}
+
+    for rank in range(total_topics - 1, mastered - 1, -1):
+        index = int(order[rank])
+        # Contribución del tema si no se elige (posición final rank + elegidos)
+        positions = np.minimum(rank + counts, total_topics - 1)
+        kept = table + (values[rank] * weights[positions])[:, None]
+        cost = costs.get(index)
+        if cost is not None and cost <= budget:
+            chosen = np.full_like(table, -np.inf)
+            chosen[1:, cost:] = table[:-1, :budget + 1 - cost]
+            choices[rank] = chosen > kept
+            table = np.where(choices[rank], chosen, kept)
+        else:
+            table = kept
+        if on_progress is not None:
+            on_progress((total_topics - rank) / (total_topics - mastered))
+
+    totals = table + head_weights[np.minimum(mastered + counts, total_topics)][:, None]
+    count, used = np.unravel_index(np.argmax(totals), totals.shape)
+
+    selected = []
+    for rank in range(mastered, total_topics):
+        if rank in choices and choices[rank][count, used]:
+            index = int(order[rank])
+            selected.append(index)
+            count -= 1
+            used -= costs[index]
+    return selected
+
+
+# =============================================================================
+# OPTIMIZADOR
+# =============================================================================
+def estimate_study_hours(estado: np.ndarray, topic_hours: float = PLAN_DEFAULT_TOPIC_HOURS) -> np.ndarray:
+    """Horas para llevar cada tema al estado máximo, proporcionales a lo que le falta."""
+    estado = np.clip(np.asarray(estado, dtype=float), 0, MAX_ESTADO)
+    return topic_hours * (MAX_ESTADO - estado) / MAX_ESTADO
+
+
+def optimize_study_plan(
+    estado: np.ndarray,
+    descartado: np.ndarray,
+    budget_hours: float,
+    balls_drawn: int,
+    mode: str = PLAN_MODE_BEST,
+    minimum: int = 1,
+    hours: np.ndarray | None = None,
+    topic_nums: Sequence[int] | None = None,
+    exact: bool | None = None,
+    on_progress: Callable[[float], None] | None = None
+) -> StudyPlan:
+    """
+    Elige los temas a estudiar que maximizan la probabilidad de un buen sorteo.
+
+    Args:
+        estado: Estado 0-10 de cada tema (posición i = tema i+1)
+        descartado: Temas descartados (no se proponen)
+        budget_hours: Horas disponibles
+        balls_drawn: n - Número de bolas/temas que se extraen en el sorteo
+        mode: "best" (mejor tema sorteado) o "at_least" (al menos m dominados)
+        minimum: m para el modo "at_least"
+        hours: Horas para llevar cada tema al estado máximo; por defecto,
+            `estimate_study_hours(estado)`
+        topic_nums: Número de tema de cada posición; por defecto, i+1
+        exact: Forzar (True) o evitar (False) la programación dinámica; por
+            defecto se usa si la tabla cabe en PLAN_DP_MAX_STATES
+        on_progress: Recibe la fracción del trabajo hecha (para informar y cancelar)
+
+    Returns:
+        StudyPlan con los temas en el orden en que conviene estudiarlos
+
+    Raises:
+        ValueError: Si los parámetros son inválidos
+    """
+    estado = np.clip(np.asarray(estado, dtype=np.int64), 0, MAX_ESTADO)
+    descartado = np.asarray(descartado, dtype=bool)
+    total_topics = len(estado)
+    # Reutiliza la validación de calculate_probability
+    calculate_probability(total_topics, 0, balls_drawn)
+    if len(descartado) != total_topics or (topic_nums is not None and len(topic_nums) != total_topics):
+        raise ValueError("Los estados, los descartados y los números deben tener un valor por tema")
+    if mode not in PLAN_MODES:
+        raise ValueError(f"Objetivo de optimización desconocido: {mode}")
+    if mode == PLAN_MODE_AT_LEAST and not 1 <= minimum <= balls_drawn:
+        raise ValueError("El mínimo de temas dominados debe estar entre 1 y las bolas del sorteo")
+    if budget_hours < 0:
+        raise ValueError("Las horas disponibles no pueden ser negativas")
+
+    hours = estimate_study_hours(estado) if hours is None else np.asarray(hours, dtype=float)
+    if len(hours) != total_topics or (hours < 0).any():
+        raise ValueError("Las horas deben ser un valor no negativo por tema")
+    units = np.maximum(np.ceil(hours / PLAN_HOUR_STEP - 1e-9), 1).astype(np.int64)
+    budget = int(math.floor(budget_hours / PLAN_HOUR_STEP + 1e-9))
+
+    if mode == PLAN_MODE_BEST:
+        mastery = estado / MAX_ESTADO
+        candidates = ~descartado & (estado < MAX_ESTADO)
+
+        def make_objective() -> BestTopicObjective:
+            return BestTopicObjective(mastery, balls_drawn)
+    else:
+        tail = at_least_probabilities(total_topics, balls_drawn, minimum)
+        dominated = estado >= PLAN_DOMINATED_ESTADO
+        candidates = ~descartado & ~dominated
+
+        def make_objective() -> AtLeastObjective:
+            return AtLeastObjective(int(np.count_nonzero(dominated)), tail)
+
+    costs = {int(index): int(units[index]) for index in np.flatnonzero(candidates & (units <= budget))}
+
+    # Programación dinámica solo para "best" y si la tabla es pequeña
+    states = (len(costs) + 1) * (budget + 1) * max(len(costs), 1)
+    use_dp = mode == PLAN_MODE_BEST and bool(costs) and (
+        exact if exact is not None else states <= PLAN_DP_MAX_STATES
+    )
+    if use_dp:
+        chosen = best_topic_dp(mastery, costs, budget, balls_drawn, on_progress)
+        # Orden de estudio: el mismo voraz, restringido a los temas elegidos
+        chosen = lazy_greedy(make_objective(), {index: costs[index] for index in chosen}, budget)
+    else:
+        chosen = lazy_greedy(make_objective(), costs, budget, on_progress)
+
+    objective = make_objective()
+    probability_before = objective.value()
+    steps = []
+    for index in chosen:
+        objective.select(index)
+        steps.append(PlanStep(
+            topic_num=int(topic_nums[index]) if topic_nums is not None else index + 1,
+            estado=int(estado[index]),
+            hours=float(units[index] * PLAN_HOUR_STEP),
+            probability=objective.value(),
+        ))
+
+    return StudyPlan(
+        mode=mode,
+        budget_hours=budget_hours,
+        probability_before=probability_before,
+        probability_after=objective.value(),
+        exact=use_dp or mode == PLAN_MODE_AT_LEAST,
+        steps=steps,
+    )
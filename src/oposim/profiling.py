@@ -0,0 +1,153 @@
+"""
+Medición ligera de tiempos por ejecución (rerun) de la aplicación.
+
+Cada ejecución del script se registra como una traza con sus tramos
+(`span`), anidados según el orden de llamada. Las trazas terminadas se
+guardan en un buffer circular (las últimas N) y, opcionalmente, se añaden
+a un archivo JSON Lines para analizarlas fuera de la aplicación.
+
+Uso:
+    profiler = Profiler(capacity=20)
+    with profiler.rerun():
+        with span("sidebar"):
+            ...
+
+    @traced("storage")
+    def get_user_progress(...): ...
+
+Fuera de `Profiler.rerun` los tramos no registran nada, así que el código
+instrumentado puede usarse igual desde la CLI o el servicio.
+"""
+
+import functools
+import json
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+
+# =============================================================================
+# MODELOS DE DATOS
+# =============================================================================
+@dataclass(slots=True)
+class Span:
+    """Tramo medido dentro de una ejecución (tiempos en segundos)."""
+    name: str
+    depth: int
+    start: float  # Desde el inicio de la ejecución
+    duration: float = 0.0
+
+
+@dataclass
+class RerunTrace:
+    """Traza de una ejecución completa del script."""
+    rerun_id: int
+    started_at: float  # time.time() al empezar
+    duration: float = 0.0
+    spans: list[Span] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        """Representación serializable en JSON."""
+        return asdict(self)
+
+
+@dataclass
+class ActiveTrace:
+    """Estado de la traza en curso: traza, origen de tiempos y profundidad."""
+    trace: RerunTrace
+    origin: float
+    depth: int = 0
+
+
+# Traza en curso en este hilo/contexto (cada sesión ejecuta su script en su hilo)
+_active_trace: ContextVar[ActiveTrace | None] = ContextVar("oposim_active_trace", default=None)
+
+
+# =============================================================================
+# REGISTRO DE TRAZAS
+# =============================================================================
+class Profiler:
+    """Buffer circular con las trazas de las últimas ejecuciones."""
+
+    def __init__(self, capacity: int = 20, log_path: str | Path | None = None):
+        self.reruns: deque[RerunTrace] = deque(maxlen=capacity)
+        self.log_path = Path(log_path) if log_path else None
+        self._next_id = 1
+
+    @contextmanager
+    def rerun(self) -> Iterator[RerunTrace]:
+        """Registra una ejecución; los `span` de dentro se añaden a su traza."""
+        trace = RerunTrace(rerun_id=self._next_id, started_at=time.time())
+        self._next_id += 1
+        origin = time.perf_counter()
+        token = _active_trace.set(ActiveTrace(trace, origin))
+        try:
+            yield trace
+        finally:
+            # También al salir por st.rerun()/st.stop(), que usan excepciones
+            trace.duration = time.perf_counter() - origin
+            _active_trace.reset(token)
+            self.reruns.append(trace)
+            if self.log_path is not None:
+                self._append_log(trace)
+
+    def _append_log(self, trace: RerunTrace) -> None:
+        """Añade la traza al archivo JSON Lines (los fallos no afectan a la app)."""
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(trace.as_dict(), ensure_ascii=False) + "\n")
+        except OSError:
+            self.log_path = None
+
+    def to_jsonl(self) -> str:
+        """Trazas del buffer en formato JSON Lines (una ejecución por línea)."""
+        return "".join(
+            json.dumps(trace.as_dict(), ensure_ascii=False) + "\n" for trace in self.reruns
+        )
+
+
+# =============================================================================
+# INSTRUMENTACIÓN
+# =============================================================================
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Mide el bloque como un tramo de la ejecución en curso (si la hay)."""
+    active = _active_trace.get()
+    if active is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    # Se añade al empezar para que los tramos queden en orden de inicio
+    current = Span(name, active.depth, start - active.origin)
+    active.trace.spans.append(current)
+    active.depth += 1
+    try:
+        yield
+    finally:
+        active.depth -= 1
+        current.duration = time.perf_counter() - start
+
+
+def traced(category: str | None = None) -> Callable:
+    """
+    Decorador que mide cada llamada como un tramo.
+
+    El tramo se llama como la función, precedida de la categoría si se
+    indica (p. ej. "storage.get_user_progress").
+    """
+    def decorator(func: Callable) -> Callable:
+        name = f"{category}.{func.__name__}" if category else func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,704 @@
+"""
+Progreso de estudio de OpoSim: almacén columnar, clasificación de estados,
+conjuntos de temas estudiados y estadísticas.
+
+No depende de Streamlit.
+"""
+
+from collections.abc import Iterable, Iterator, MutableMapping, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+from oposim.topics import DEFAULT_TOTAL_TOPICS
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+# Colores para estados de temas
+STATE_COLORS = {
+    "sin_evaluar": "#e5e7eb",  # Gris claro
+    "rojo": "#ef4444",          # Estado 1-3
+    "naranja": "#f97316",       # Estado 4-5
+    "amarillo": "#eab308",      # Estado 6-7
+    "verde": "#22c55e",         # Estado 8-10
+    "azul": "#3b82f6",          # Planeado
+    "descartado": "#9ca3af",    # Gris
+}
+
+# Estado máximo de dominio de un tema (escala 0-10)
+MAX_ESTADO = 10
+
+# Repasos máximos que se guardan por tema (los valores mayores se recortan)
+MAX_REPASOS = np.iinfo(np.int32).max
+
+# Grupos de estado, en el orden de sus códigos numéricos
+TOPIC_BUCKETS = (
+    "sin_evaluar",  # 0
+    "rojo",         # 1
+    "naranja",      # 2
+    "amarillo",     # 3
+    "verde",        # 4
+    "azul",         # 5 - Planeado
+    "descartado",   # 6
+)
+BUCKET_CODES = {bucket: code for code, bucket in enumerate(TOPIC_BUCKETS)}
+
+# Código de grupo para cada estado 0-10 (0 | 1-3 | 4-5 | 6-7 | 8-10)
+ESTADO_BUCKET_CODES = np.array([0, 1, 1, 1, 2, 2, 3, 3, 4, 4, 4], dtype=np.int8)
+
+# Clase CSS y emoji de cada grupo de estado
+BUCKET_STYLES = {
+    "sin_evaluar": ("topic-btn-neutral", "⚪"),
+    "rojo": ("topic-btn-red", "🔴"),
+    "naranja": ("topic-btn-orange", "🟠"),
+    "amarillo": ("topic-btn-yellow", "🟡"),
+    "verde": ("topic-btn-green", "🟢"),
+    "azul": ("topic-btn-blue", "🔵"),
+    "descartado": ("topic-btn-gray", "⚫"),
+}
+
+# Etiquetas de los grupos de estado (leyenda y filtros)
+BUCKET_LABELS = {
+    "sin_evaluar": "Sin evaluar",
+    "rojo": "Estado 1-3",
+    "naranja": "Estado 4-5",
+    "amarillo": "Estado 6-7",
+    "verde": "Estado 8-10",
+    "azul": "📅 Planeado",
+    "descartado": "❌ Descartado",
+}
+
+
+# =============================================================================
+# MODELOS DE DATOS
+# =============================================================================
+class TopicStatus(NamedTuple):
+    """Representación visual del estado de un tema."""
+    bucket: str
+    color: str
+    css_class: str
+    emoji: str
+    label: str
+
+
+# =============================================================================
+# ALMACÉN COLUMNAR DE PROGRESO
+# =============================================================================
+def get_bit(bits: np.ndarray, index: int) -> bool:
+    """Lee un bit de un array de bits empaquetado (orden little-endian)."""
+    return bool((bits[index >> 3] >> (index & 7)) & 1)
+
+
+def set_bit(bits: np.ndarray, index: int, value: bool) -> None:
+    """Escribe un bit de un array de bits empaquetado (orden little-endian)."""
+    mask = np.uint8(1 << (index & 7))
+    if value:
+        bits[index >> 3] |= mask
+    else:
+        bits[index >> 3] &= ~mask
+
+
+def unpack_bits(bits: np.ndarray, count: int) -> np.ndarray:
+    """Desempaqueta los primeros `count` bits como array booleano."""
+    return np.unpackbits(bits, count=count, bitorder="little").astype(bool)
+
+
+def parse_timestamp(value: object) -> float:
+    """Segundos desde epoch de una fecha (ISO, datetime o número); 0 si no hay o no es válida."""
+    if not value:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value))
+        return value.timestamp()
+    except (ValueError, OverflowError, OSError):
+        return 0.0
+
+
+class ProgressStore(MutableMapping):
+    """
+    Progreso de los temas en formato columnar, indexado por número de tema.
+
+    Guarda estado, repasos y la fecha del último guardado (segundos desde
+    epoch, 0 si no se conoce) en arrays de NumPy, descartado/planeado (y qué
+    temas tienen registro) en arrays de bits, y los nombres en un pool de
+    cadenas sin duplicados. Se comporta como un `dict[int, dict]` para que
+    el código existente siga funcionando (`get`, `items`, `progress[n] = ...`),
+    pero las consultas sobre todo el temario se hacen con `columns`.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_TOTAL_TOPICS):
+        capacity = max(capacity, 1) + 1  # Posición i = tema i (hay temarios que empiezan en 0)
+        self._estado = np.zeros(capacity, dtype=np.int8)
+        self._repasos = np.zeros(capacity, dtype=np.int32)
+        self._updated = np.zeros(capacity, dtype=np.float64)
+        self._name_ids = np.zeros(capacity, dtype=np.int32)
+        self._present = np.zeros((capacity + 7) // 8, dtype=np.uint8)
+        self._descartado = np.zeros((capacity + 7) // 8, dtype=np.uint8)
+        self._planeado = np.zeros((capacity + 7) // 8, dtype=np.uint8)
+        self._name_pool = [""]
+        self._name_index = {"": 0}
+        self._count = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[tuple[int, dict]]) -> "ProgressStore":
+        """Construye el almacén a partir de pares (número de tema, datos)."""
+        records = list(records)
+        capacity = max((topic_num for topic_num, _ in records), default=0)
+        store = cls(max(capacity, DEFAULT_TOTAL_TOPICS))
+        for topic_num, data in records:
+            store[topic_num] = data
+        return store
+
+    @property
+    def capacity(self) -> int:
+        """Número de tema más alto que cabe sin redimensionar."""
+        return len(self._estado) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria aproximada ocupada por los arrays y el pool de nombres."""
+        arrays = (
+            self._estado, self._repasos, self._updated, self._name_ids,
+            self._present, self._descartado, self._planeado,
+        )
+        return sum(a.nbytes for a in arrays) + sum(len(n) for n in self._name_pool)
+
+    def _grow(self, topic_num: int) -> None:
+        """Amplía los arrays para que quepa `topic_num`."""
+        capacity = max(topic_num + 1, 2 * len(self._estado))
+        byte_capacity = (capacity + 7) // 8
+
+        def resized(array: np.ndarray, size: int) -> np.ndarray:
+            new_array = np.zeros(size, dtype=array.dtype)
+            new_array[:len(array)] = array
+            return new_array
+
+        self._estado = resized(self._estado, capacity)
+        self._repasos = resized(self._repasos, capacity)
+        self._updated = resized(self._updated, capacity)
+        self._name_ids = resized(self._name_ids, capacity)
+        self._present = resized(self._present, byte_capacity)
+        self._descartado = resized(self._descartado, byte_capacity)
+        self._planeado = resized(self._planeado, byte_capacity)
+
+    def _intern(self, name: str) -> int:
+        """Obtiene el identificador de un nombre en el pool, añadiéndolo si falta."""
+        name_id = self._name_index.get(name)
+        if name_id is None:
+            name_id = len(self._name_pool)
+            self._name_pool.append(name)
+            self._name_index[name] = name_id
+        return name_id
+
+    def __contains__(self, topic_num: object) -> bool:
+        if not isinstance(topic_num, (int, np.integer)):
+            return False
+        return 0 <= topic_num <= self.capacity and get_bit(self._present, int(topic_num))
+
+    def __getitem__(self, topic_num: int) -> dict:
+        if topic_num not in self:
+            raise KeyError(topic_num)
+        updated = float(self._updated[topic_num])
+        return {
+            "nombre_tema": self._name_pool[self._name_ids[topic_num]],
+            "estado": int(self._estado[topic_num]),
+            "repasos": int(self._repasos[topic_num]),
+            "descartado": get_bit(self._descartado, topic_num),
+            "planeado": get_bit(self._planeado, topic_num),
+            "updated_at": datetime.fromtimestamp(updated).isoformat() if updated else None,
+        }
+
+    def __setitem__(self, topic_num: int, data: dict) -> None:
+        if topic_num < 0:
+            raise KeyError(topic_num)
+        if topic_num > self.capacity:
+            self._grow(topic_num)
+        if not get_bit(self._present, topic_num):
+            set_bit(self._present, topic_num, True)
+            self._count += 1
+
+        self._estado[topic_num] = min(max(int(data.get("estado") or 0), 0), MAX_ESTADO)
+        self._repasos[topic_num] = min(max(int(data.get("repasos") or 0), 0), MAX_REPASOS)
+        self._updated[topic_num] = parse_timestamp(data.get("updated_at"))
+        self._name_ids[topic_num] = self._intern(data.get("nombre_tema") or "")
+        set_bit(self._descartado, topic_num, bool(data.get("descartado")))
+        set_bit(self._planeado, topic_num, bool(data.get("planeado")))
+
+    def __delitem__(self, topic_num: int) -> None:
+        if topic_num not in self:
+            raise KeyError(topic_num)
+        set_bit(self._present, topic_num, False)
+        set_bit(self._descartado, topic_num, False)
+        set_bit(self._planeado, topic_num, False)
+        self._estado[topic_num] = 0
+        self._repasos[topic_num] = 0
+        self._updated[topic_num] = 0.0
+        self._name_ids[topic_num] = 0
+        self._count -= 1
+
+    def __iter__(self) -> Iterator[int]:
+        present = unpack_bits(self._present, len(self._estado))
+        return iter(np.flatnonzero(present).tolist())
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __repr__(self) -> str:
+        return f"ProgressStore({self._count} temas, {self.nbytes} bytes)"
+
+    def columns(self, num_topics: int | None = None) -> tuple[np.ndarray, ...]:
+        """
+        Devuelve las columnas para los temas 1..num_topics.
+
+        Los temas sin registro tienen estado 0 y no están descartados ni
+        planeados.
+
+        Args:
+            num_topics: Número de temas; por defecto, la capacidad del almacén
+
+        Returns:
+            Tupla (estado, repasos, descartado, planeado, presente); la
+            posición i corresponde al tema i+1
+        """
+        if num_topics is None:
+            num_topics = self.capacity
+        stop = min(num_topics, self.capacity) + 1
+        total_bits = len(self._estado)
+
+        def column(array: np.ndarray) -> np.ndarray:
+            result = np.zeros(num_topics, dtype=array.dtype)
+            result[:stop - 1] = array[1:stop]
+            return result
+
+        return (
+            column(self._estado),
+            column(self._repasos),
+            column(unpack_bits(self._descartado, total_bits)),
+            column(unpack_bits(self._planeado, total_bits)),
+            column(unpack_bits(self._present, total_bits)),
+        )
+
+    def columns_for(self, topic_nums: Sequence[int]) -> tuple[np.ndarray, ...]:
+        """
+        Como `columns`, pero para una lista arbitraria de números de tema.
+
+        Sirve para temarios no correlativos (o que empiezan en 0): los
+        números sin registro salen con estado 0 y sin descartar ni planear.
+
+        Returns:
+            Tupla (estado, repasos, descartado, planeado, presente); la
+            posición i corresponde a topic_nums[i]
+        """
+        nums = np.asarray(topic_nums, dtype=np.int64)
+        valid = (nums >= 0) & (nums <= self.capacity)
+        index = np.where(valid, nums, 0)
+        total_bits = len(self._estado)
+
+        def column(array: np.ndarray) -> np.ndarray:
+            return np.where(valid, array[index], 0).astype(array.dtype)
+
+        return (
+            column(self._estado),
+            column(self._repasos),
+            column(unpack_bits(self._descartado, total_bits)),
+            column(unpack_bits(self._planeado, total_bits)),
+            column(unpack_bits(self._present, total_bits)),
+        )
+
+    def timestamps(self, num_topics: int | None = None) -> np.ndarray:
+        """Fecha del último guardado de los temas 1..num_topics (0 si no se conoce)."""
+        if num_topics is None:
+            num_topics = self.capacity
+        stop = min(num_topics, self.capacity) + 1
+        result = np.zeros(num_topics, dtype=np.float64)
+        result[:stop - 1] = self._updated[1:stop]
+        return result
+
+
+# =============================================================================
+# CONJUNTO DE TEMAS ESTUDIADOS
+# =============================================================================
+class TopicBitset:
+    """
+    Conjunto compacto de números de tema, con un bit por tema.
+
+    Se apoya en un entero de Python (el bit i indica el tema i), por lo que
+    las operaciones de conjuntos y el conteo trabajan palabra a palabra.
+    Es inmutable: las operaciones devuelven un conjunto nuevo.
+
+    La pertenencia se consulta en O(1) sobre una copia en bytes del entero,
+    que se crea la primera vez que hace falta (desplazar el entero crearía
+    otro de O(N) bits en cada consulta).
+    """
+
+    __slots__ = ("bits", "_bytes")
+
+    def __init__(self, bits: int = 0):
+        if bits < 0:
+            raise ValueError("Un conjunto de temas no puede ser negativo")
+        self.bits = bits
+        self._bytes: bytes | None = None
+
+    def __reduce__(self):
+        # Solo el entero: la copia en bytes no debe cambiar las claves de caché
+        return (TopicBitset, (self.bits,))
+
+    @classmethod
+    def from_topics(cls, topic_nums: Iterable[int]) -> "TopicBitset":
+        """Construye el conjunto a partir de números de tema."""
+        bits = 0
+        for topic_num in topic_nums:
+            if topic_num < 1:
+                raise ValueError(f"Número de tema no válido: {topic_num}")
+            bits |= 1 << int(topic_num)
+        return cls(bits)
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "TopicBitset":
+        """Construye el conjunto desde un array booleano (posición i = tema i+1)."""
+        packed = np.packbits(np.asarray(mask, dtype=bool), bitorder="little")
+        return cls(int.from_bytes(packed.tobytes(), "little") << 1)
+
+    @classmethod
+    def full(cls, num_topics: int) -> "TopicBitset":
+        """Conjunto con todos los temas 1..num_topics."""
+        return cls(((1 << num_topics) - 1) << 1)
+
+    @classmethod
+    def from_ranges(cls, text: str, max_topic: int | None = None) -> "TopicBitset":
+        """
+        Construye el conjunto a partir de rangos como "1-40, 55, 60-62".
+
+        Args:
+            text: Números y rangos separados por comas
+            max_topic: Si se indica, se ignoran los temas por encima
+
+        Raises:
+            ValueError: Si algún fragmento no es un número o rango válido
+        """
+        bits = 0
+        for part in text.replace(";", ",").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            start, _, end = part.partition("-")
+            try:
+                first = int(start)
+                last = int(end) if end.strip() else first
+            except ValueError:
+                raise ValueError(f"Rango no válido: '{part}'") from None
+            if first < 1 or last < first:
+                raise ValueError(f"Rango no válido: '{part}'")
+            if max_topic is not None:
+                last = min(last, max_topic)
+                if first > last:
+                    continue
+            bits |= ((1 << (last - first + 1)) - 1) << first
+        return cls(bits)
+
+    @classmethod
+    def from_progress(
+        cls,
+        progress: MutableMapping,
+        min_estado: int,
+        num_topics: int
+    ) -> "TopicBitset":
+        """
+        Temas con estado >= min_estado y no descartados según el progreso.
+
+        Args:
+            progress: Progreso del usuario (ProgressStore o dict)
+            min_estado: Estado mínimo para considerar un tema estudiado
+            num_topics: Número de temas del temario
+        """
+        if isinstance(progress, ProgressStore):
+            estados, _, descartados, _, _ = progress.columns(num_topics)
+            return cls.from_mask((estados >= min_estado) & ~descartados)
+        return cls.from_topics(
+            topic_num for topic_num, data in progress.items()
+            if 1 <= topic_num <= num_topics
+            and data.get("estado", 0) >= min_estado
+            and not data.get("descartado", False)
+        )
+
+    def __contains__(self, topic_num: object) -> bool:
+        try:
+            topic_num = int(topic_num)
+        except (TypeError, ValueError):
+            return False
+        if topic_num < 0 or topic_num >= self.bits.bit_length():
+            return False
+        if self._bytes is None:
+            self._bytes = self.bits.to_bytes((self.bits.bit_length() + 7) // 8, "little")
+        return bool(self._bytes[topic_num >> 3] >> (topic_num & 7) & 1)
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __iter__(self) -> Iterator[int]:
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, TopicBitset) and self.bits == other.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __or__(self, other: "TopicBitset") -> "TopicBitset":
+        return TopicBitset(self.bits | other.bits)
+
+    def __and__(self, other: "TopicBitset") -> "TopicBitset":
+        return TopicBitset(self.bits & other.bits)
+
+    def __sub__(self, other: "TopicBitset") -> "TopicBitset":
+        return TopicBitset(self.bits & ~other.bits)
+
+    def __repr__(self) -> str:
+        return f"TopicBitset({self.to_ranges()!r})"
+
+    def add(self, topic_num: int) -> "TopicBitset":
+        """Devuelve un conjunto nuevo que incluye `topic_num`."""
+        return TopicBitset(self.bits | (1 << topic_num))
+
+    def discard(self, topic_num: int) -> "TopicBitset":
+        """Devuelve un conjunto nuevo sin `topic_num`."""
+        return TopicBitset(self.bits & ~(1 << topic_num))
+
+    def to_ranges(self) -> str:
+        """Representa el conjunto como rangos compactos ("1-40, 55")."""
+        parts = []
+        run_start = previous = None
+        for topic_num in self:
+            if previous is not None and topic_num == previous + 1:
+                previous = topic_num
+                continue
+            if run_start is not None:
+                parts.append(str(run_start) if run_start == previous else f"{run_start}-{previous}")
+            run_start = previous = topic_num
+        if run_start is not None:
+            parts.append(str(run_start) if run_start == previous else f"{run_start}-{previous}")
+        return ", ".join(parts)
+
+
+# =============================================================================
+# CLASIFICACIÓN DE ESTADOS DE TEMAS
+# =============================================================================
+def build_status_table() -> tuple:
+    """
+    Precalcula la representación visual de todas las combinaciones de estado.
+
+    Returns:
+        Tabla indexada como [estado][descartado][planeado] -> TopicStatus
+    """
+    def make_status(bucket: str, label: str) -> TopicStatus:
+        css_class, emoji = BUCKET_STYLES[bucket]
+        return TopicStatus(bucket, STATE_COLORS[bucket], css_class, emoji, label)
+
+    planned = make_status("azul", "Planeado")
+    discarded = make_status("descartado", "Descartado")
+
+    table = []
+    for estado in range(MAX_ESTADO + 1):
+        bucket = TOPIC_BUCKETS[ESTADO_BUCKET_CODES[estado]]
+        label = "Sin evaluar" if estado == 0 else f"Estado: {estado}/{MAX_ESTADO}"
+        base = make_status(bucket, label)
+        table.append((
+            (base, planned),            # descartado=False
+            (discarded, discarded),     # descartado=True
+        ))
+    return tuple(table)
+
+
+STATUS_TABLE = build_status_table()
+
+
+def get_topic_status(estado: int, descartado: bool, planeado: bool) -> TopicStatus:
+    """Obtiene color, clase CSS, emoji y etiqueta de un tema desde la tabla."""
+    estado = min(max(int(estado), 0), MAX_ESTADO)
+    return STATUS_TABLE[estado][bool(descartado)][bool(planeado)]
+
+
+def classify_topics(
+    estados: np.ndarray,
+    descartados: np.ndarray,
+    planeados: np.ndarray
+) -> np.ndarray:
+    """
+    Clasifica un array completo de temas en grupos de estado en una sola llamada.
+
+    Args:
+        estados: Array de estados (0-10)
+        descartados: Array booleano de temas descartados
+        planeados: Array booleano de temas planeados
+
+    Returns:
+        Array int8 con el código de grupo de cada tema (ver TOPIC_BUCKETS)
+    """
+    estados = np.clip(np.asarray(estados, dtype=np.int64), 0, MAX_ESTADO)
+    codes = ESTADO_BUCKET_CODES[estados]
+    codes = np.where(np.asarray(planeados, dtype=bool), BUCKET_CODES["azul"], codes)
+    codes = np.where(np.asarray(descartados, dtype=bool), BUCKET_CODES["descartado"], codes)
+    return codes.astype(np.int8)
+
+
+def classify_progress(progress: MutableMapping, num_topics: int) -> np.ndarray:
+    """
+    Clasifica los temas 1..num_topics a partir del diccionario de progreso.
+
+    Returns:
+        Array int8 de longitud num_topics; la posición i corresponde al tema i+1
+    """
+    if isinstance(progress, ProgressStore):
+        estados, _, descartados, planeados, _ = progress.columns(num_topics)
+        return classify_topics(estados, descartados, planeados)
+
+    estados = np.zeros(num_topics, dtype=np.int64)
+    descartados = np.zeros(num_topics, dtype=bool)
+    planeados = np.zeros(num_topics, dtype=bool)
+    for topic_num, data in progress.items():
+        if 1 <= topic_num <= num_topics:
+            estados[topic_num - 1] = data.get("estado", 0)
+            descartados[topic_num - 1] = data.get("descartado", False)
+            planeados[topic_num - 1] = data.get("planeado", False)
+    return classify_topics(estados, descartados, planeados)
+
+
+def get_topic_color(estado: int, descartado: bool, planeado: bool) -> str:
+    """Determina el color de un tema basado en su estado."""
+    return get_topic_status(estado, descartado, planeado).color
+
+
+def get_topic_css_class(estado: int, descartado: bool, planeado: bool) -> str:
+    """Determina la clase CSS para el botón de un tema."""
+    return get_topic_status(estado, descartado, planeado).css_class
+
+
+# =============================================================================
+# ESTADÍSTICAS DEL PROGRESO
+# =============================================================================
+@dataclass
+class ProgressStats:
+    """
+    Agregado de estadísticas del progreso que se actualiza de forma incremental.
+
+    Se construye una vez a partir del progreso completo y, al guardar un
+    tema, se resta el registro anterior y se suma el nuevo en O(1).
+    """
+    total: int = 0
+    evaluados: int = 0
+    buenos: int = 0
+    planeados: int = 0
+    descartados: int = 0
+    suma_estados: int = 0
+    total_repasos: int = 0
+    # Número de temas por estado 0-10 (todos / sin descartados)
+    histograma: list[int] = field(default_factory=lambda: [0] * (MAX_ESTADO + 1))
+    histograma_activos: list[int] = field(default_factory=lambda: [0] * (MAX_ESTADO + 1))
+
+    @classmethod
+    def from_progress(cls, progress: MutableMapping) -> "ProgressStats":
+        """Construye el agregado recorriendo el progreso una sola vez."""
+        if isinstance(progress, ProgressStore):
+            return cls.from_store(progress)
+        stats = cls()
+        for record in progress.values():
+            stats.add(record)
+        return stats
+
+    @classmethod
+    def from_store(cls, store: ProgressStore) -> "ProgressStats":
+        """Construye el agregado con consultas vectorizadas sobre las columnas."""
+        # Todos los temas con registro, incluido el 0 si el temario empieza en 0
+        estados, repasos, descartados, planeados, presentes = store.columns_for(list(store))
+        estados = estados[presentes].astype(np.int64)
+        repasos = repasos[presentes].astype(np.int64)
+        descartados = descartados[presentes]
+        planeados = planeados[presentes]
+        activos = ~descartados
+        bins = MAX_ESTADO + 1
+
+        return cls(
+            total=int(presentes.sum()),
+            evaluados=int((estados > 0).sum()),
+            buenos=int(((estados >= 8) & activos).sum()),
+            planeados=int((planeados & activos).sum()),
+            descartados=int(descartados.sum()),
+            suma_estados=int(estados.sum()),
+            total_repasos=int(repasos.sum()),
+            histograma=np.bincount(estados, minlength=bins).tolist(),
+            histograma_activos=np.bincount(estados[activos], minlength=bins).tolist(),
+        )
+
+    def _apply(self, record: dict, sign: int) -> None:
+        """Suma (sign=1) o resta (sign=-1) la contribución de un registro."""
+        estado = min(max(int(record.get("estado", 0)), 0), MAX_ESTADO)
+        descartado = bool(record.get("descartado", False))
+        planeado = bool(record.get("planeado", False))
+
+        self.total += sign
+        self.total_repasos += sign * record.get("repasos", 0)
+        self.histograma[estado] += sign
+        if estado > 0:
+            self.evaluados += sign
+            self.suma_estados += sign * estado
+        if descartado:
+            self.descartados += sign
+        else:
+            self.histograma_activos[estado] += sign
+            if estado >= 8:
+                self.buenos += sign
+            if planeado:
+                self.planeados += sign
+
+    def add(self, record: dict) -> None:
+        """Añade un registro de progreso al agregado."""
+        self._apply(record, 1)
+
+    def remove(self, record: dict) -> None:
+        """Quita un registro de progreso del agregado."""
+        self._apply(record, -1)
+
+    def replace(self, old_record: dict | None, new_record: dict) -> None:
+        """Sustituye el registro de un tema (old_record=None si era nuevo)."""
+        if old_record is not None:
+            self.remove(old_record)
+        self.add(new_record)
+
+    @property
+    def promedio(self) -> float:
+        """Estado medio de los temas evaluados."""
+        if not self.evaluados:
+            return 0
+        return self.suma_estados / self.evaluados
+
+    def count_at_least(self, estado_minimo: int) -> int:
+        """Número de temas no descartados con estado >= estado_minimo."""
+        return sum(self.histograma_activos[max(estado_minimo, 0):])
+
+    def as_dict(self) -> dict:
+        """Devuelve las estadísticas con el formato de `calculate_stats`."""
+        return {
+            "total": self.total,
+            "evaluados": self.evaluados,
+            "buenos": self.buenos,
+            "planeados": self.planeados,
+            "descartados": self.descartados,
+            "promedio": self.promedio,
+            "total_repasos": self.total_repasos,
+        }
+
+
+def calculate_stats(progress: dict) -> dict:
+    """Calcula estadísticas del progreso."""
+    return ProgressStats.from_progress(progress).as_dict()
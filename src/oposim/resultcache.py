@@ -0,0 +1,273 @@
+"""
+Caché de resultados persistente en disco (SQLite).
+
+Las cachés en memoria (`st.cache_data`, `lru_cache`) se pierden cada vez
+que se reinicia el proceso, y en la nube el contenedor se reinicia a
+menudo. Esta caché guarda los resultados serializados con pickle en un
+archivo SQLite, de modo que sobreviven a los reinicios y se comparten
+entre los procesos que usan el mismo archivo:
+
+    @persistent_cache(version=1)
+    def rejilla(total: int, drawn: int) -> pd.DataFrame:
+        ...
+
+Como `st.cache_data`, cada llamada devuelve una copia nueva (se
+deserializa) y los parámetros cuyo nombre empieza por "_" no forman parte
+de la clave. La clave incluye la versión del formato de la caché, el
+nombre de la función y su `version`: al cambiar lo que calcula una
+función basta con subir su versión para no leer resultados antiguos.
+
+Tamaño acotado: al superar `max_bytes` se borran las entradas usadas hace
+más tiempo (LRU). Ubicación con OPOSIM_CACHE_PATH (vacío o "off" la
+desactiva) y tamaño con OPOSIM_CACHE_MAX_MB. Si el archivo no se puede
+abrir o escribir, las funciones se ejecutan sin caché: nunca rompe la
+aplicación.
+
+No depende de Streamlit.
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from oposim.metrics import REGISTRY
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+RESULT_CACHE_VERSION = 1  # Súbelo si cambia el formato de las claves o los valores
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+RESULT_CACHE_TOUCH_SECONDS = 60  # Precisión de la fecha de último uso (evita escrituras)
+RESULT_CACHE_TIMEOUT_SECONDS = 5  # Espera máxima si otro proceso tiene el archivo bloqueado
+
+DEFAULT_RESULT_CACHE_PATH = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "oposim" / "results.sqlite3"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+# =============================================================================
+# ALMACÉN
+# =============================================================================
+@dataclass
+class ResultCacheStats:
+    """Ocupación de la caché."""
+    path: Path
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+
+class ResultCache:
+    """Almacén clave -> bytes en SQLite con expulsión LRU por tamaño."""
+
+    def __init__(self, path: str | Path, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Una conexión por proceso, compartida entre hilos con un lock;
+        # isolation_level=None: cada sentencia se confirma sola
+        self._conn = sqlite3.connect(
+            self.path,
+            timeout=RESULT_CACHE_TIMEOUT_SECONDS,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            # WAL: los lectores de otros procesos no bloquean al que escribe
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> bytes | None:
+        """Valor guardado para la clave o None si no está."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed = ? WHERE key = ? AND accessed < ?",
+                (now, key, now - RESULT_CACHE_TOUCH_SECONDS),
+            )
+        return row[0]
+
+    def put(self, key: str, value: bytes) -> None:
+        """Guarda un valor y expulsa los menos usados si se supera el tamaño."""
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """Borra las entradas usadas hace más tiempo hasta caber en max_bytes (con el lock)."""
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        expired = []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY accessed"):
+            expired.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM results WHERE key = ?", expired)
+
+    def clear(self) -> None:
+        """Borra todas las entradas."""
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.execute("VACUUM")
+
+    def stats(self) -> ResultCacheStats:
+        """Número de entradas y bytes ocupados."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return ResultCacheStats(self.path, entries, size, self.max_bytes)
+
+
+@lru_cache(maxsize=1)
+def get_result_cache() -> ResultCache | None:
+    """
+    Abre la caché por defecto una vez por proceso.
+
+    Returns:
+        La caché, o None si está desactivada o no se puede abrir
+    """
+    path = os.environ.get("OPOSIM_CACHE_PATH", str(DEFAULT_RESULT_CACHE_PATH))
+    if not path or path.lower() == "off":
+        return None
+    max_mb = os.environ.get("OPOSIM_CACHE_MAX_MB")
+    try:
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else RESULT_CACHE_MAX_BYTES
+        return ResultCache(path, max_bytes)
+    except (OSError, ValueError, sqlite3.Error):
+        return None
+
+
+# =============================================================================
+# CLAVES
+# =============================================================================
+def hash_argument(value: Any, digest: "hashlib._Hash") -> None:
+    """Añade un argumento al hash de la clave (por contenido, no por identidad)."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(type(value).__name__.encode())
+        digest.update(pickle.dumps(list(value.columns) if isinstance(value, pd.DataFrame) else value.name))
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}:{len(value)}".encode())
+        for item in value:
+            hash_argument(item, digest)
+    else:
+        digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def make_key(namespace: str, version: int, arguments: dict[str, Any]) -> str:
+    """Clave versionada de una llamada: formato, función, versión y argumentos."""
+    digest = hashlib.sha256()
+    for name, value in arguments.items():
+        digest.update(name.encode())
+        hash_argument(value, digest)
+    return f"{RESULT_CACHE_VERSION}:{namespace}:v{version}:{digest.hexdigest()}"
+
+
+# =============================================================================
+# DECORADOR
+# =============================================================================
+def persistent_cache(
+    version: int = 1,
+    cache: Callable[[], ResultCache | None] = get_result_cache
+) -> Callable:
+    """
+    Memoiza una función en la caché de disco (sustituye a `st.cache_data`).
+
+    Los resultados tienen que poder serializarse con pickle. Las
+    excepciones no se cachean. Los parámetros que empiezan por "_" no
+    forman parte de la clave.
+
+    Args:
+        version: Versión de la función; súbela cuando cambie su resultado
+        cache: Función que devuelve la caché a usar (None = sin caché)
+    """
+    def decorator(func: Callable) -> Callable:
+        namespace = f"{func.__module__}.{func.__qualname__}"
+        signature = inspect.signature(func)
+        requests = {
+            result: REGISTRY.counter(
+                "oposim_cache_requests_total",
+                "Consultas a las cachés de la aplicación",
+                cache=func.__name__,
+                result=result,
+            )
+            for result in ("hit", "miss")
+        }
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            store = cache()
+            if store is None:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            try:
+                key = make_key(namespace, version, {
+                    name: value for name, value in bound.arguments.items()
+                    if not name.startswith("_")
+                })
+            except (pickle.PicklingError, TypeError, AttributeError):
+                return func(*args, **kwargs)  # Argumentos sin clave estable
+
+            try:
+                data = store.get(key)
+                if data is not None:
+                    result = pickle.loads(data)
+                    requests["hit"].inc()
+                    return result
+            except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+                pass  # Entrada ilegible o caché bloqueada: se recalcula
+
+            requests["miss"].inc()
+            result = func(*args, **kwargs)
+            try:
+                store.put(key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+            except (sqlite3.Error, pickle.PicklingError, TypeError, AttributeError):
+                pass  # La caché nunca debe romper la aplicación
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,200 @@
+"""
+Cola de repasos espaciados a partir de repasos y estado.
+
+Cada tema con progreso tiene una fecha de repaso que se deriva, al estilo
+SM-2, de su número de repasos, su estado y la fecha de su último repaso
+(el último guardado que cambió repasos o estado, ver `review_anchor`):
+
+- Tras el primer repaso (o si el estado está por debajo de
+  REVIEW_PASS_ESTADO, que en SM-2 es un repaso fallido) toca a 1 día.
+- Tras el segundo, a 6 días.
+- Después, el intervalo anterior multiplicado por el factor de facilidad,
+  que sale del estado (2,36 con estado 6, 2,6 con estado 10).
+
+No se guarda el historial de cada repaso, solo el último, así que el
+factor de facilidad se calcula con el estado actual en lugar de ir
+acumulándose repaso a repaso.
+
+`ReviewQueue` guarda los temas en un heap ordenado por fecha de repaso.
+Actualizar un tema al guardarlo cuesta O(log N): se añade la entrada nueva
+y la antigua queda invalidada hasta que sale por la cima (borrado
+perezoso). Consultar los k siguientes cuesta O(k log N).
+
+No depende de Streamlit.
+"""
+
+import heapq
+import time
+from collections.abc import Container, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+
+from oposim.progress import MAX_ESTADO, parse_timestamp
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+REVIEW_PASS_ESTADO = 6  # Estado mínimo para que un repaso cuente como superado
+REVIEW_FIRST_INTERVAL_DAYS = 1
+REVIEW_SECOND_INTERVAL_DAYS = 6
+REVIEW_MIN_EASINESS = 1.3
+REVIEW_MAX_INTERVAL_DAYS = 365
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+# =============================================================================
+# INTERVALOS
+# =============================================================================
+def easiness_factor(estado: int) -> float:
+    """
+    Factor de facilidad de SM-2 para un estado 0-10.
+
+    La calidad de SM-2 (0-5) es estado / 2 y el factor parte de 2,5:
+    EF = 2,5 + 0,1 - (5 - q) * (0,08 + (5 - q) * 0,02), con mínimo 1,3.
+    """
+    miss = 5 - min(max(estado, 0), MAX_ESTADO) / 2
+    return max(REVIEW_MIN_EASINESS, 2.6 - miss * (0.08 + miss * 0.02))
+
+
+def review_interval_days(repasos: int, estado: int) -> float:
+    """Días hasta el siguiente repaso tras `repasos` repasos con ese estado."""
+    if repasos <= 1 or estado < REVIEW_PASS_ESTADO:
+        return REVIEW_FIRST_INTERVAL_DAYS
+    if repasos == 2:
+        return REVIEW_SECOND_INTERVAL_DAYS
+    interval = REVIEW_SECOND_INTERVAL_DAYS
+    easiness = easiness_factor(estado)
+    for _ in range(repasos - 2):
+        interval *= easiness
+        if interval >= REVIEW_MAX_INTERVAL_DAYS:
+            return REVIEW_MAX_INTERVAL_DAYS
+    return interval
+
+
+def is_reviewable(data: dict) -> bool:
+    """Un tema entra en la cola si se ha estudiado (estado o repasos) y no está descartado."""
+    return not data.get("descartado") and bool(data.get("estado") or data.get("repasos"))
+
+
+def due_timestamp(data: dict) -> float:
+    """
+    Fecha (segundos desde epoch) en que toca repasar un tema.
+
+    Los temas sin fecha de último guardado vencen ya (0).
+    """
+    updated = parse_timestamp(data.get("updated_at"))
+    if not updated:
+        return 0.0
+    interval = review_interval_days(int(data.get("repasos") or 0), int(data.get("estado") or 0))
+    return updated + interval * SECONDS_PER_DAY
+
+
+def review_anchor(old: dict, new: dict) -> str:
+    """
+    Fecha de último guardado que hay que guardar con `new` (ISO).
+
+    Solo avanza si cambian los repasos o el estado: renombrar un tema o
+    marcarlo como planeado/descartado no es un repaso y no debe reiniciar
+    su intervalo.
+    """
+    unchanged = all(
+        int(old.get(field) or 0) == int(new.get(field) or 0) for field in ("repasos", "estado")
+    )
+    if unchanged and old.get("updated_at"):
+        return old["updated_at"]
+    return datetime.now().isoformat()
+
+
+# =============================================================================
+# COLA DE REPASOS
+# =============================================================================
+@dataclass
+class ReviewItem:
+    """Un tema de la cola con su fecha de repaso."""
+    topic_num: int
+    due: float  # Segundos desde epoch (0 = sin fecha)
+
+    def days_until(self, now: float | None = None) -> float:
+        """Días que faltan (negativo si está vencido)."""
+        now = time.time() if now is None else now
+        return (self.due - now) / SECONDS_PER_DAY
+
+
+class ReviewQueue:
+    """Heap de (fecha de repaso, tema) con actualización en O(log N)."""
+
+    def __init__(self):
+        self._heap: list[tuple[float, int]] = []
+        self._due: dict[int, float] = {}
+
+    @classmethod
+    def from_progress(cls, progress: Mapping[int, dict]) -> "ReviewQueue":
+        """Construye la cola con todos los temas repasables, en O(N)."""
+        queue = cls()
+        for topic_num, data in progress.items():
+            if is_reviewable(data):
+                queue._due[topic_num] = due_timestamp(data)
+        queue._heap = [(due, topic_num) for topic_num, due in queue._due.items()]
+        heapq.heapify(queue._heap)
+        return queue
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, topic_num: object) -> bool:
+        return topic_num in self._due
+
+    def update(self, topic_num: int, data: dict) -> None:
+        """Recalcula la fecha de un tema tras guardarlo (o lo quita si ya no procede)."""
+        if not is_reviewable(data):
+            self.remove(topic_num)
+            return
+        due = due_timestamp(data)
+        if self._due.get(topic_num) == due:
+            return
+        self._due[topic_num] = due
+        heapq.heappush(self._heap, (due, topic_num))
+        self._compact()
+
+    def remove(self, topic_num: int) -> None:
+        """Quita un tema de la cola (su entrada del heap se descarta al salir)."""
+        if self._due.pop(topic_num, None) is not None:
+            self._compact()
+
+    def _is_current(self, entry: tuple[float, int]) -> bool:
+        due, topic_num = entry
+        return self._due.get(topic_num) == due
+
+    def _compact(self) -> None:
+        """Reconstruye el heap si las entradas obsoletas superan a las vigentes."""
+        if len(self._heap) > 2 * len(self._due) + 16:
+            self._heap = [(due, topic_num) for topic_num, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def peek(self, count: int, include: Container[int] | None = None) -> list[ReviewItem]:
+        """
+        Los `count` temas que antes toca repasar, sin sacarlos de la cola.
+
+        Args:
+            count: Número de temas
+            include: Si se indica, solo se devuelven temas contenidos en él
+                (p. ej. los del temario actual)
+
+        Returns:
+            Lista de ReviewItem por fecha de repaso (los vencidos primero)
+        """
+        items: list[ReviewItem] = []
+        popped: list[tuple[float, int]] = []
+        seen: set[int] = set()
+        while self._heap and len(items) < count:
+            entry = heapq.heappop(self._heap)
+            if not self._is_current(entry) or entry[1] in seen:
+                continue  # Entrada obsoleta (o repetida): se descarta para siempre
+            seen.add(entry[1])
+            popped.append(entry)
+            if include is None or entry[1] in include:
+                items.append(ReviewItem(topic_num=entry[1], due=entry[0]))
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return items
@@ -0,0 +1,318 @@
+"""
+Servicio HTTP/JSON de OpoSim.
+
+Aplicación ASGI mínima (sin framework) sobre el mismo motor que usa la web,
+pensada para que otras herramientas consulten probabilidades y sorteos sin
+pasar por la interfaz de Streamlit.
+
+Endpoints (el cuerpo de las peticiones POST es JSON):
+    GET  /health               Estado, versión y uso de la caché
+    POST /probability          {"queries": [{"total", "studied", "drawn"}, ...]}
+    POST /probability/curve    {"queries": [{"total", "drawn"}, ...]}
+    POST /minimum-studied      {"queries": [{"total", "drawn", "target"}, ...]}
+    POST /draws                {"total", "drawn", "runs", "studied"?, "seed"?}
+
+En las consultas por lotes cada resultado lleva su propio "error" si la
+consulta no es válida, sin invalidar el resto del lote. Todos los
+endpoints admiten como máximo MAX_TOTAL_TOPICS temas y MAX_DRAWN bolas, y
+las curvas MAX_CURVE_POINTS puntos por petición. Los cálculos se ejecutan
+en un hilo aparte para no bloquear el bucle de eventos.
+
+Para servirlo (requiere `uvicorn`, extra "service"):
+    oposim serve --workers 4
+"""
+
+import asyncio
+import json
+import random
+from collections.abc import Callable
+from functools import lru_cache
+
+from oposim import __version__
+from oposim.engine import (
+    calculate_probability,
+    draw_topic_positions,
+    minimum_studied_topics,
+    probability_curve,
+)
+from oposim.lut import lookup_curve, lookup_minimum_studied, lookup_probability
+from oposim.progress import TopicBitset
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+MAX_BATCH_QUERIES = 10_000  # Consultas por petición
+MAX_DRAW_RUNS = 10_000  # Sorteos por petición
+MAX_TOTAL_TOPICS = 2_000  # Temas por consulta (acota el cálculo y la caché de curvas)
+MAX_DRAWN = 50  # Bolas por sorteo
+MAX_CURVE_POINTS = 1_000_000  # Puntos de curva por petición
+MAX_BODY_BYTES = 4 * 1024 * 1024
+RESULT_CACHE_SIZE = 65_536  # Resultados en caché por proceso
+CURVE_CACHE_SIZE = 1_024  # Curvas completas en caché por proceso
+
+
+class RequestError(ValueError):
+    """Error de la petición que se devuelve al cliente con un código HTTP."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+# =============================================================================
+# CACHÉ DE RESULTADOS
+# =============================================================================
+# Cada proceso (worker) tiene su propia caché; los cálculos son deterministas.
+# Solo se usa fuera del rango de la tabla precalculada (ver oposim.lut)
+cached_probability = lru_cache(maxsize=RESULT_CACHE_SIZE)(calculate_probability)
+cached_minimum_studied = lru_cache(maxsize=RESULT_CACHE_SIZE)(minimum_studied_topics)
+
+
+@lru_cache(maxsize=CURVE_CACHE_SIZE)
+def cached_curve(total_topics: int, balls_drawn: int) -> tuple[float, ...]:
+    """Curva de probabilidades inmutable, apta para compartir desde la caché."""
+    return tuple(probability_curve(total_topics, balls_drawn))
+
+
+def cache_info() -> dict:
+    """Uso de las cachés del proceso, para /health."""
+    caches = {
+        "probability": cached_probability,
+        "minimum_studied": cached_minimum_studied,
+        "curve": cached_curve,
+    }
+    return {
+        name: {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+        for name, info in ((name, cache.cache_info()) for name, cache in caches.items())
+    }
+
+
+# =============================================================================
+# VALIDACIÓN
+# =============================================================================
+def get_int(data: dict, key: str, default: int | None = None) -> int:
+    """Lee un entero de un objeto JSON (los booleanos no cuentan como enteros)."""
+    value = data.get(key, default)
+    if value is None:
+        raise RequestError(f"Falta el campo '{key}'")
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise RequestError(f"El campo '{key}' debe ser un entero")
+    return value
+
+
+def get_total_drawn(data: dict) -> tuple[int, int]:
+    """Lee 'total' y 'drawn' y comprueba sus límites antes de calcular nada."""
+    total = get_int(data, "total")
+    drawn = get_int(data, "drawn")
+    if total > MAX_TOTAL_TOPICS:
+        raise RequestError(f"Como máximo {MAX_TOTAL_TOPICS} temas por consulta")
+    if drawn > MAX_DRAWN:
+        raise RequestError(f"Como máximo {MAX_DRAWN} bolas por sorteo")
+    return total, drawn
+
+
+def get_topic_list(values: list, key: str, total: int) -> list[int]:
+    """Valida una lista de números de tema entre 1 y `total` (mismas reglas que get_int)."""
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise RequestError(f"Los temas de '{key}' deben ser enteros")
+        if not 1 <= value <= total:
+            raise RequestError(f"Los temas de '{key}' deben estar entre 1 y {total}")
+    return values
+
+
+def get_queries(payload: dict) -> list:
+    """Extrae y valida la lista de consultas de un lote."""
+    queries = payload.get("queries")
+    if not isinstance(queries, list):
+        raise RequestError("El cuerpo debe incluir una lista 'queries'")
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise RequestError(f"Como máximo {MAX_BATCH_QUERIES} consultas por petición", 413)
+    return queries
+
+
+def run_batch(queries: list, solve: Callable[[dict], dict]) -> dict:
+    """Resuelve cada consulta por separado, anotando los errores en su resultado."""
+    results = []
+    for query in queries:
+        try:
+            if not isinstance(query, dict):
+                raise RequestError("Cada consulta debe ser un objeto")
+            results.append(solve(query))
+        except ValueError as e:
+            results.append({"error": str(e)})
+    return {"results": results}
+
+
+# =============================================================================
+# ENDPOINTS
+# =============================================================================
+def handle_health(payload: dict) -> dict:
+    """Estado del servicio."""
+    return {"status": "ok", "version": __version__, "cache": cache_info()}
+
+
+def handle_probability(payload: dict) -> dict:
+    """Lote de probabilidades P(al menos un tema estudiado)."""
+    def solve(query: dict) -> dict:
+        total, drawn = get_total_drawn(query)
+        studied = get_int(query, "studied")
+        return {
+            "total": total,
+            "studied": studied,
+            "drawn": drawn,
+            "probability": lookup_probability(total, studied, drawn, cached_probability),
+        }
+
+    return run_batch(get_queries(payload), solve)
+
+
+def handle_curve(payload: dict) -> dict:
+    """Lote de curvas de probabilidad para k de 0 a N."""
+    def solve(query: dict) -> dict:
+        total, drawn = get_total_drawn(query)
+        curve = lookup_curve(total, drawn, cached_curve)
+        return {"total": total, "drawn": drawn, "probabilities": list(curve)}
+
+    queries = get_queries(payload)
+    points = sum(
+        min(query["total"], MAX_TOTAL_TOPICS) + 1
+        for query in queries
+        if isinstance(query, dict) and isinstance(query.get("total"), int) and query["total"] > 0
+    )
+    if points > MAX_CURVE_POINTS:
+        raise RequestError(f"Como máximo {MAX_CURVE_POINTS} puntos de curva por petición", 413)
+    return run_batch(queries, solve)
+
+
+def handle_minimum_studied(payload: dict) -> dict:
+    """Lote de mínimos de temas a estudiar para una probabilidad objetivo."""
+    def solve(query: dict) -> dict:
+        total, drawn = get_total_drawn(query)
+        target = query.get("target")
+        if isinstance(target, bool) or not isinstance(target, (int, float)):
+            raise RequestError("El campo 'target' debe ser un número entre 0 y 1")
+        calculate_probability(total, 0, drawn)  # Validación de N y n
+        return {
+            "total": total,
+            "drawn": drawn,
+            "target": target,
+            "studied": lookup_minimum_studied(total, drawn, float(target), cached_minimum_studied),
+        }
+
+    return run_batch(get_queries(payload), solve)
+
+
+def handle_draws(payload: dict) -> dict:
+    """Lote de sorteos simulados (sin caché: cada petición es un sorteo nuevo)."""
+    total, drawn = get_total_drawn(payload)
+    runs = get_int(payload, "runs", 1)
+    if total <= 0 or drawn <= 0 or drawn > total:
+        raise RequestError("Las bolas del sorteo deben estar entre 1 y el total de temas")
+    if not 1 <= runs <= MAX_DRAW_RUNS:
+        raise RequestError(f"El número de sorteos debe estar entre 1 y {MAX_DRAW_RUNS}")
+
+    seed = payload.get("seed")
+    if seed is not None:
+        seed = get_int(payload, "seed")
+
+    studied = payload.get("studied")
+    if isinstance(studied, str):
+        studied = TopicBitset.from_ranges(studied, total)
+    elif isinstance(studied, list):
+        studied = TopicBitset.from_topics(get_topic_list(studied, "studied", total))
+    elif studied is not None:
+        raise RequestError("'studied' debe ser una lista de temas o un texto de rangos")
+
+    rng = random.Random(seed)
+    draws = []
+    successes = 0
+    for _ in range(runs):
+        topics = [pos + 1 for pos in draw_topic_positions(total, drawn, rng)]
+        draw = {"topics": topics}
+        if studied is not None:
+            hits = sum(1 for topic_num in topics if topic_num in studied)
+            draw["studied_hits"] = hits
+            successes += hits > 0
+        draws.append(draw)
+
+    result = {"total": total, "drawn": drawn, "runs": runs, "draws": draws}
+    if studied is not None:
+        result["success_rate"] = successes / runs
+    return result
+
+
+ROUTES: dict[tuple[str, str], Callable[[dict], dict]] = {
+    ("GET", "/health"): handle_health,
+    ("POST", "/probability"): handle_probability,
+    ("POST", "/probability/curve"): handle_curve,
+    ("POST", "/minimum-studied"): handle_minimum_studied,
+    ("POST", "/draws"): handle_draws,
+}
+
+
+# =============================================================================
+# APLICACIÓN ASGI
+# =============================================================================
+async def read_body(receive: Callable) -> bytes:
+    """Lee el cuerpo completo de la petición, con un límite de tamaño."""
+    body = bytearray()
+    while True:
+        message = await receive()
+        body.extend(message.get("body", b""))
+        if len(body) > MAX_BODY_BYTES:
+            raise RequestError("El cuerpo de la petición es demasiado grande", 413)
+        if not message.get("more_body", False):
+            return bytes(body)
+
+
+async def send_json(send: Callable, status: int, data: dict) -> None:
+    """Envía una respuesta JSON."""
+    body = json.dumps(data, ensure_ascii=False, allow_nan=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def app(scope: dict, receive: Callable, send: Callable) -> None:
+    """Punto de entrada ASGI."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    path = scope["path"].rstrip("/") or "/"
+    handler = ROUTES.get((scope["method"], path))
+    try:
+        if handler is None:
+            if any(route_path == path for _, route_path in ROUTES):
+                raise RequestError("Método no permitido", 405)
+            raise RequestError("Ruta no encontrada", 404)
+
+        payload = {}
+        if scope["method"] == "POST":
+            try:
+                payload = json.loads(await read_body(receive) or b"{}")
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise RequestError(f"JSON no válido: {e}") from e
+            if not isinstance(payload, dict):
+                raise RequestError("El cuerpo debe ser un objeto JSON")
+
+        await send_json(send, 200, await asyncio.to_thread(handler, payload))
+    except RequestError as e:
+        await send_json(send, e.status, {"error": str(e)})
+    except ValueError as e:
+        await send_json(send, 400, {"error": str(e)})
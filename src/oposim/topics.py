@@ -0,0 +1,316 @@
+"""
+Temarios de OpoSim: generación, lectura de texto/Excel y caché compartida.
+
+No depende de Streamlit.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO, NamedTuple
+
+import pandas as pd
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+DEFAULT_TOTAL_TOPICS = 100
+TEMARIO_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Memoria para temarios compartidos
+
+
+# =============================================================================
+# MODELOS DE DATOS
+# =============================================================================
+class Topic(NamedTuple):
+    """Representa un tema del temario."""
+    numero: int
+    nombre: str
+
+
+# =============================================================================
+# FUNCIONES DE GENERACIÓN DE DATOS
+# =============================================================================
+def generate_default_topics(count: int = DEFAULT_TOTAL_TOPICS) -> pd.DataFrame:
+    """
+    Genera un listado automático de temas por defecto.
+    
+    Args:
+        count: Número de temas a generar
+        
+    Returns:
+        DataFrame con columnas 'Número' y 'Nombre del Tema'
+    """
+    topics = [
+        {"Número": i, "Nombre del Tema": f"Tema {i} - Contenido del tema número {i}"}
+        for i in range(1, count + 1)
+    ]
+    return pd.DataFrame(topics)
+
+
+def normalize_topic_columns(df: pd.DataFrame) -> pd.DataFrame | None:
+    """
+    Extrae las columnas de número y nombre de un DataFrame leído de archivo.
+    
+    Args:
+        df: DataFrame con los datos tal cual se leyeron
+        
+    Returns:
+        DataFrame con columnas 'Número' y 'Nombre del Tema' o None si no
+        tiene al menos dos columnas
+    """
+    # Buscar columnas requeridas (case-insensitive)
+    columns_lower = {str(col).lower(): col for col in df.columns}
+    
+    numero_col = None
+    nombre_col = None
+    
+    for key, original in columns_lower.items():
+        if "número" in key or "numero" in key:
+            numero_col = original
+        if "nombre" in key or "tema" in key:
+            nombre_col = original
+    
+    if numero_col and nombre_col:
+        result = df[[numero_col, nombre_col]].copy()
+        result.columns = ["Número", "Nombre del Tema"]
+        return result
+    
+    # Si no encuentra las columnas, intenta usar las dos primeras
+    if len(df.columns) >= 2:
+        result = df.iloc[:, :2].copy()
+        result.columns = ["Número", "Nombre del Tema"]
+        return result
+    
+    return None
+
+
+def parse_excel_topics(source) -> pd.DataFrame | None:
+    """
+    Parsea un archivo Excel y extrae los temas.
+    
+    Args:
+        source: Ruta o archivo Excel (por ejemplo, el subido por el usuario)
+        
+    Returns:
+        DataFrame con los temas o None si no tiene al menos dos columnas
+        
+    Raises:
+        ValueError: Si el archivo no se puede leer
+    """
+    try:
+        df = pd.read_excel(source, engine="openpyxl")
+    except Exception as e:
+        raise ValueError(f"Error al leer el archivo Excel: {e}") from e
+    return normalize_topic_columns(df)
+
+
+def parse_text_topics(text: str) -> pd.DataFrame | None:
+    """
+    Parsea un bloque de texto donde cada línea es un tema.
+    
+    Args:
+        text: Texto con temas separados por líneas
+        
+    Returns:
+        DataFrame con los temas o None si no hay temas válidos
+    """
+    if not text or not text.strip():
+        return None
+    
+    lines = [line.strip() for line in text.strip().split("\n") if line.strip()]
+    
+    if not lines:
+        return None
+    
+    topics = [
+        {"Número": i, "Nombre del Tema": line}
+        for i, line in enumerate(lines, start=1)
+    ]
+    
+    return pd.DataFrame(topics)
+
+
+def topics_to_text(topics_df: pd.DataFrame) -> str:
+    """
+    Convierte un temario a texto, una línea por tema ("Tema N: nombre").
+    
+    Es el formato con el que se guarda el temario en la cuenta del usuario
+    y que `parse_text_topics` vuelve a leer.
+    """
+    return "\n".join(
+        f"Tema {numero}: {nombre}"
+        for numero, nombre in zip(topics_df["Número"], topics_df["Nombre del Tema"])
+    )
+
+
+def read_topics_file(path: str | Path) -> pd.DataFrame | None:
+    """
+    Lee un temario de un archivo según su extensión.
+    
+    - .xlsx/.xls: como `parse_excel_topics`
+    - .csv: columnas de número y nombre (mismas reglas que Excel)
+    - Otro (.txt...): un tema por línea, como `parse_text_topics`
+    
+    Raises:
+        ValueError: Si el archivo no se puede leer
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in (".xlsx", ".xls"):
+        return parse_excel_topics(path)
+    try:
+        if suffix == ".csv":
+            return normalize_topic_columns(pd.read_csv(path))
+        return parse_text_topics(path.read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError, pd.errors.ParserError) as e:
+        raise ValueError(f"Error al leer el archivo {path}: {e}") from e
+
+
+def write_topics(topics_df: pd.DataFrame, target: str | Path | IO[str]) -> None:
+    """
+    Escribe un temario en el formato indicado por la extensión del destino.
+    
+    - .xlsx: hoja con columnas 'Número' y 'Nombre del Tema'
+    - .txt: un nombre de tema por línea (se lee con `parse_text_topics`)
+    - .csv o un flujo de texto abierto (p. ej. stdout): CSV con cabecera
+    """
+    if not isinstance(target, (str, Path)):
+        topics_df.to_csv(target, index=False)
+        return
+    
+    path = Path(target)
+    suffix = path.suffix.lower()
+    if suffix == ".xlsx":
+        topics_df.to_excel(path, index=False, engine="openpyxl")
+    elif suffix == ".txt":
+        names = topics_df["Nombre del Tema"].astype(str)
+        path.write_text("\n".join(names) + "\n", encoding="utf-8")
+    else:
+        topics_df.to_csv(path, index=False)
+
+
+# =============================================================================
+# CACHÉ COMPARTIDA DE TEMARIOS
+# =============================================================================
+def hash_topics(topics_df: pd.DataFrame) -> str:
+    """Calcula un hash del contenido del temario."""
+    row_hashes = pd.util.hash_pandas_object(topics_df, index=False).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+
+class TemarioIndex:
+    """
+    Índices de búsqueda de un temario, construidos una vez por temario.
+
+    Evitan recorrer el DataFrame en cada rerun: número de tema -> posición
+    de la fila y número de tema -> nombre, ambos en O(1). Es inmutable y se
+    comparte entre las sesiones que usan el mismo temario.
+    """
+
+    def __init__(self, topics_df: pd.DataFrame, temario_hash: str):
+        self.temario_hash = temario_hash
+        self.num_topics = len(topics_df)
+        self.positions: dict[int, int] = {}
+        self.names: dict[int, str] = {}
+
+        numbers = topics_df["Número"].tolist()
+        names = topics_df["Nombre del Tema"].tolist()
+        for position, (numero, nombre) in enumerate(zip(numbers, names)):
+            try:
+                numero = int(numero)
+            except (TypeError, ValueError):
+                continue
+            # Ante números repetidos, manda la primera fila (como el filtro anterior)
+            if numero not in self.positions:
+                self.positions[numero] = position
+                self.names[numero] = str(nombre)
+
+    def __contains__(self, topic_num: object) -> bool:
+        return topic_num in self.positions
+
+    def position(self, topic_num: int) -> int | None:
+        """Posición de la fila del tema en el DataFrame o None si no existe."""
+        return self.positions.get(topic_num)
+
+    def name(self, topic_num: int, default: str | None = None) -> str | None:
+        """Nombre del tema o `default` si no existe."""
+        return self.names.get(topic_num, default)
+
+
+class TemarioCache:
+    """
+    Caché de temarios compartida por todas las sesiones del proceso.
+
+    Los temarios se indexan por el hash de su contenido, de modo que los
+    estudiantes que cargan el mismo temario comparten un único DataFrame
+    y cada sesión guarda solo el hash. Los DataFrames cacheados son de
+    solo lectura por convenio: nadie debe modificarlos. Cuando se supera
+    el presupuesto de memoria se expulsan los menos usados (LRU).
+    """
+
+    def __init__(self, max_bytes: int = TEMARIO_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._indexes: dict[str, TemarioIndex] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, topics_df: pd.DataFrame) -> str:
+        """
+        Añade un temario a la caché (si no estaba) y devuelve su hash.
+
+        Args:
+            topics_df: DataFrame con columnas 'Número' y 'Nombre del Tema'
+
+        Returns:
+            Hash del contenido del temario
+        """
+        topics_hash = hash_topics(topics_df)
+        with self._lock:
+            if topics_hash in self._entries:
+                self._entries.move_to_end(topics_hash)
+                return topics_hash
+
+            size = int(topics_df.memory_usage(deep=True).sum())
+            self._entries[topics_hash] = (topics_df, size)
+            self._total_bytes += size
+
+            # Expulsar los menos usados, sin tocar el recién añadido
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                evicted_hash, (_, evicted_size) = self._entries.popitem(last=False)
+                self._indexes.pop(evicted_hash, None)
+                self._total_bytes -= evicted_size
+        return topics_hash
+
+    def get(self, topics_hash: str | None) -> pd.DataFrame | None:
+        """Obtiene un temario por su hash o None si no está (o fue expulsado)."""
+        if topics_hash is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(topics_hash)
+            if entry is None:
+                return None
+            self._entries.move_to_end(topics_hash)
+            return entry[0]
+
+    def get_index(self, topics_hash: str | None) -> TemarioIndex | None:
+        """Obtiene (construyéndolo la primera vez) el índice de un temario cacheado."""
+        topics_df = self.get(topics_hash)
+        if topics_df is None:
+            return None
+        with self._lock:
+            index = self._indexes.get(topics_hash)
+            if index is None:
+                index = TemarioIndex(topics_df, topics_hash)
+                self._indexes[topics_hash] = index
+            return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        """Memoria ocupada por los temarios cacheados."""
+        return self._total_bytes
@@ -0,0 +1,24 @@
+"""Pruebas de la línea de comandos."""
+
+from oposim.cli import main
+
+
+def test_simulate_temario_not_starting_at_one(tmp_path, capsys):
+    """Los rangos de --studied usan la numeración del temario (101-104), no la posición."""
+    temario = tmp_path / "temario.csv"
+    temario.write_text(
+        "Número,Nombre del Tema\n101,Uno\n102,Dos\n103,Tres\n104,Cuatro\n", encoding="utf-8"
+    )
+
+    code = main([
+        "simulate", "--temario", str(temario), "--drawn", "2", "--runs", "200",
+        "--studied", "101-102", "--seed", "1",
+    ])
+
+    captured = capsys.readouterr()
+    rows = captured.out.strip().splitlines()[1:]
+    assert code == 0
+    assert "Estudiados: 2" in captured.err
+    assert "P exacta: 0.8333" in captured.err
+    # Con 2 de 4 temas estudiados y 2 bolas, casi todos los sorteos aciertan alguno
+    assert sum(int(row.rsplit(",", 1)[1]) > 0 for row in rows) > 100
@@ -0,0 +1,78 @@
+"""Pruebas del almacén de progreso."""
+
+import pickle
+
+import pandas as pd
+
+from oposim.progress import MAX_REPASOS, ProgressStats, ProgressStore, TopicBitset
+from oposim.topics import TemarioIndex
+
+
+def test_store_keeps_topic_zero():
+    """El tema 0 (temarios que empiezan en 0) se guarda como cualquier otro."""
+    progress = ProgressStore.from_records([(0, {"estado": 4, "repasos": 2}), (2, {"estado": 9})])
+    stats = ProgressStats.from_progress(progress)
+
+    progress[0] = {"estado": 6, "repasos": 3}
+    stats.replace({"estado": 4, "repasos": 2}, progress[0])
+
+    assert list(progress) == [0, 2]
+    assert progress[0]["estado"] == 6
+    assert stats == ProgressStats.from_progress(progress)
+
+
+def test_store_clips_large_repasos():
+    """Un número de repasos enorme se recorta en lugar de desbordar."""
+    progress = ProgressStore.from_records([(1, {"repasos": 40_000}), (2, {"repasos": 10**12})])
+
+    assert progress[1]["repasos"] == 40_000
+    assert progress[2]["repasos"] == MAX_REPASOS
+
+
+def test_columns_for_temario_starting_at_zero():
+    """Un temario numerado 0, 1, 2 lee cada tema por su número, no por número - 1."""
+    topics_df = pd.DataFrame({"Número": [0, 1, 2], "Nombre del Tema": ["Cero", "Uno", "Dos"]})
+    topic_nums = sorted(TemarioIndex(topics_df, "hash").positions)
+    progress = ProgressStore.from_records([
+        (0, {"estado": 3}),
+        (1, {"estado": 5, "descartado": True}),
+        (2, {"estado": 9}),
+    ])
+
+    estado, _, descartado, _, present = progress.columns_for(topic_nums)
+
+    assert estado.tolist() == [3, 5, 9]
+    assert descartado.tolist() == [False, True, False]
+    assert present.tolist() == [True, True, True]
+
+
+def test_columns_for_only_topic_zero():
+    """Un temario con solo el tema 0 y sin progreso no falla."""
+    estado, repasos, descartado, planeado, present = ProgressStore().columns_for([0, -1])
+
+    assert estado.tolist() == [0, 0]
+    assert repasos.tolist() == [0, 0]
+    assert not descartado.any() and not planeado.any() and not present.any()
+
+
+def test_columns_for_matches_columns():
+    """Para un temario 1..N coincide con `columns`."""
+    progress = ProgressStore.from_records([(3, {"estado": 7, "repasos": 2, "planeado": True})])
+
+    expected = progress.columns(5)
+    actual = progress.columns_for(range(1, 6))
+
+    for expected_column, actual_column in zip(expected, actual):
+        assert actual_column.tolist() == expected_column.tolist()
+
+
+def test_bitset_membership():
+    """La pertenencia coincide con el conjunto y no cambia la serialización."""
+    studied = TopicBitset.from_ranges("1-40, 55, 1000")
+    before = pickle.dumps(studied)
+
+    members = [topic_num for topic_num in range(-1, 1100) if topic_num in studied]
+
+    assert members == [*range(1, 41), 55, 1000]
+    assert "x" not in studied and 0 not in TopicBitset()
+    assert pickle.dumps(studied) == before
@@ -0,0 +1,39 @@
+"""Pruebas de la cola de repasos espaciados."""
+
+from oposim.progress import ProgressStore
+from oposim.review import ReviewQueue, due_timestamp, review_anchor
+
+
+def saved(progress: ProgressStore, topic_num: int, changes: dict) -> dict:
+    """Simula un guardado desde el editor: datos nuevos con su fecha de repaso."""
+    old = progress[topic_num]
+    new = {**old, **changes}
+    new["updated_at"] = review_anchor(old, new)
+    return new
+
+
+def test_rename_does_not_move_due_date():
+    """Renombrar o marcar planeado/descartado no reinicia el intervalo."""
+    progress = ProgressStore.from_records([
+        (7, {"nombre_tema": "Tema 7", "estado": 8, "repasos": 3, "updated_at": "2026-01-10T09:00:00"}),
+    ])
+    queue = ReviewQueue.from_progress(progress)
+    due = due_timestamp(progress[7])
+
+    for changes in ({"nombre_tema": "Constitución"}, {"planeado": True}):
+        data = saved(progress, 7, changes)
+        queue.update(7, data)
+        progress[7] = data
+        assert due_timestamp(progress[7]) == due
+        assert queue.peek(1)[0].due == due
+
+
+def test_new_review_moves_due_date():
+    """Un repaso nuevo (más repasos o otro estado) sí mueve la fecha."""
+    progress = ProgressStore.from_records([
+        (7, {"estado": 8, "repasos": 3, "updated_at": "2026-01-10T09:00:00"}),
+    ])
+    due = due_timestamp(progress[7])
+
+    assert due_timestamp(saved(progress, 7, {"repasos": 4})) > due
+    assert saved(progress, 7, {"estado": 9})["updated_at"] != progress[7]["updated_at"]
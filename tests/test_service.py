@@ -0,0 +1,114 @@
+"""Pruebas del servicio HTTP/JSON."""
+
+import asyncio
+import json
+
+import pytest
+
+from oposim.service import (
+    MAX_BATCH_QUERIES,
+    MAX_DRAWN,
+    MAX_TOTAL_TOPICS,
+    RequestError,
+    app,
+    handle_draws,
+    handle_probability,
+)
+
+
+def request(method: str, path: str, payload: object = None) -> tuple[int, dict]:
+    """Envía una petición a la aplicación ASGI y devuelve (estado, cuerpo JSON)."""
+    body = b"" if payload is None else json.dumps(payload).encode()
+    received = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive() -> dict:
+        return received.pop(0)
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def test_probability_ok():
+    status, data = request("POST", "/probability", {
+        "queries": [{"total": 100, "studied": 40, "drawn": 5}],
+    })
+
+    assert status == 200
+    assert 0.9 < data["results"][0]["probability"] < 1
+
+
+@pytest.mark.parametrize("path, query", [
+    ("/probability", {"total": MAX_TOTAL_TOPICS + 1, "studied": 1, "drawn": 5}),
+    ("/probability", {"total": 100, "studied": 1, "drawn": MAX_DRAWN + 1}),
+    ("/probability/curve", {"total": MAX_TOTAL_TOPICS + 1, "drawn": 5}),
+    ("/minimum-studied", {"total": MAX_TOTAL_TOPICS + 1, "drawn": 5, "target": 0.9}),
+    ("/minimum-studied", {"total": 100, "drawn": "5", "target": 0.9}),
+])
+def test_batch_query_limits(path, query):
+    """Una consulta fuera de límites lleva su error sin invalidar el lote."""
+    status, data = request("POST", path, {"queries": [query, {**query, "total": 10, "drawn": 2}]})
+
+    assert status == 200
+    assert "error" in data["results"][0]
+    assert "error" not in data["results"][1]
+
+
+def test_batch_too_large():
+    queries = [{"total": 10, "studied": 1, "drawn": 2}] * (MAX_BATCH_QUERIES + 1)
+
+    status, data = request("POST", "/probability", {"queries": queries})
+
+    assert status == 413
+    assert "error" in data
+
+
+def test_curve_points_limit():
+    queries = [{"total": MAX_TOTAL_TOPICS, "drawn": 5}] * 1_000
+
+    status, _ = request("POST", "/probability/curve", {"queries": queries})
+
+    assert status == 413
+
+
+@pytest.mark.parametrize("payload", [
+    {"total": MAX_TOTAL_TOPICS + 1, "drawn": 5, "studied": "1-99999999"},
+    {"total": 100, "drawn": MAX_DRAWN + 1},
+    {"total": 100, "drawn": 5, "runs": 0},
+    {"total": 100, "drawn": 5, "studied": ["a"]},
+    {"total": 100, "drawn": 5, "studied": [1.5]},
+    {"total": 100, "drawn": 5, "studied": [101]},
+])
+def test_draws_rejects_invalid(payload):
+    status, data = request("POST", "/draws", payload)
+
+    assert status == 400
+    assert "error" in data
+
+
+def test_draws_ok():
+    status, data = request("POST", "/draws", {
+        "total": 10, "drawn": 10, "runs": 3, "studied": "1-2", "seed": 1,
+    })
+
+    assert status == 200
+    assert data["success_rate"] == 1.0
+    assert [sorted(draw["topics"]) for draw in data["draws"]] == [list(range(1, 11))] * 3
+
+
+def test_validation_runs_before_computing():
+    """Los límites se comprueban antes de calcular o construir el conjunto de temas."""
+    with pytest.raises(RequestError):
+        handle_draws({"total": 10**8, "drawn": 5, "studied": "1-99999999"})
+    result = handle_probability({"queries": [{"total": 200_000, "studied": 1, "drawn": 100_000}]})
+    assert "error" in result["results"][0]
+
+
+def test_routes():
+    assert request("GET", "/nope")[0] == 404
+    assert request("GET", "/probability")[0] == 405
+    assert request("GET", "/health")[0] == 200